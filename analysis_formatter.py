@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+分析内容格式化
+将小结Markdown渲染为网页HTML；小结写入数据库时预先渲染并保存，
+网页直接使用保存的HTML
+"""
+
+import re
+from functools import lru_cache
+
+
+@lru_cache(maxsize=256)
+def format_analysis(content):
+    """格式化Claude分析内容为HTML（按内容缓存，相同内容只渲染一次）"""
+    if not content:
+        return ""
+    
+    # 先处理HTML转义
+    content = content.replace('<br>', '\n').replace('<br/>', '\n')
+    
+    # 分割成段落
+    paragraphs = content.split('\n\n')
+    formatted_html = []
+    
+    for para in paragraphs:
+        if not para.strip():
+            continue
+            
+        # 处理标题
+        if para.startswith('##'):
+            title = para.replace('##', '').strip()
+            formatted_html.append(f'<h2>{title}</h2>')
+        elif para.startswith('**核心观点**'):
+            content_part = para.replace('**核心观点**:', '').strip()
+            formatted_html.append(f'''
+                <div class="analysis-section core-points">
+                    <h3>🎯 核心观点</h3>
+                    <p>{content_part}</p>
+                </div>
+            ''')
+        elif para.startswith('**主要内容**'):
+            content_part = para.replace('**主要内容**:', '').strip()
+            # 处理列表项
+            if '- ' in content_part:
+                items = content_part.split('- ')
+                list_html = '<ul>'
+                for item in items:
+                    if item.strip():
+                        list_html += f'<li>{item.strip()}</li>'
+                list_html += '</ul>'
+                formatted_html.append(f'''
+                    <div class="analysis-section main-content">
+                        <h3>📋 主要内容</h3>
+                        {list_html}
+                    </div>
+                ''')
+            else:
+                formatted_html.append(f'''
+                    <div class="analysis-section main-content">
+                        <h3>📋 主要内容</h3>
+                        <p>{content_part}</p>
+                    </div>
+                ''')
+        elif para.startswith('**语调特点**'):
+            content_part = para.replace('**语调特点**:', '').strip()
+            formatted_html.append(f'''
+                <div class="analysis-section tone-analysis">
+                    <h3>🎭 语调特点</h3>
+                    <p>{content_part}</p>
+                </div>
+            ''')
+        elif para.startswith('**值得关注**'):
+            content_part = para.replace('**值得关注**:', '').strip()
+            formatted_html.append(f'''
+                <div class="analysis-section notable-points">
+                    <h3>⚠️ 值得关注</h3>
+                    <p>{content_part}</p>
+                </div>
+            ''')
+        else:
+            # 处理加粗文本
+            para = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', para)
+            # 处理换行
+            para = para.replace('\n', '<br>')
+            if para.strip():
+                formatted_html.append(f'<p>{para}</p>')
+    
+    return ''.join(formatted_html)
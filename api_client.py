@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+小结API客户端
+Claude和Hugging Face小结器共用的HTTP层：
+- 每个服务一个长连接池（keep-alive），不再每次请求重新握手
+- 429/5xx和网络错误按指数退避加随机抖动重试，遵守Retry-After
+- 按端点熔断：连续失败的模型在冷却时间内直接跳过
+- 记录每个端点的调用次数、重试次数和延迟
+"""
+
+import time
+import random
+import logging
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    API_POOL_SIZE, API_MAX_RETRIES, API_BACKOFF_BASE, API_BACKOFF_MAX,
+    API_BREAKER_THRESHOLD, API_BREAKER_COOLDOWN
+)
+
+logger = logging.getLogger(__name__)
+
+# 值得重试的状态码：限流和服务端暂时不可用
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# 值得重试的网络错误；其他请求错误（响应解码失败、重定向过多等）直接记为失败
+RETRY_EXCEPTIONS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """端点处于熔断冷却期，请求未发出"""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析Retry-After响应头（秒数或HTTP日期），无法解析时返回None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """单个端点的熔断器：连续失败达到阈值后打开，冷却结束后放行一次试探请求"""
+
+    def __init__(self, threshold: int = API_BREAKER_THRESHOLD, cooldown: float = API_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def allow(self) -> bool:
+        """是否允许发出请求"""
+        if self.opened_at is None:
+            return True
+        if self.probing or time.monotonic() - self.opened_at < self.cooldown:
+            return False
+        # 冷却结束：半开状态，只放行一个试探请求
+        self.probing = True
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self) -> bool:
+        """记录一次失败，返回熔断器是否因此打开"""
+        self.failures += 1
+        if self.probing or self.failures >= self.threshold:
+            was_closed = self.opened_at is None or self.probing
+            self.opened_at = time.monotonic()
+            self.probing = False
+            return was_closed
+        return False
+
+    def remaining_cooldown(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+
+class ApiClient:
+    """带连接池、重试退避、熔断和延迟统计的HTTP客户端"""
+
+    def __init__(self, name: str, pool_size: int = API_POOL_SIZE, max_retries: int = API_MAX_RETRIES,
+                 backoff_base: float = API_BACKOFF_BASE, backoff_max: float = API_BACKOFF_MAX,
+                 breaker_threshold: int = API_BREAKER_THRESHOLD, breaker_cooldown: float = API_BREAKER_COOLDOWN):
+        self.name = name
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+
+        # 重试由本类处理，连接池只负责复用连接
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.lock = threading.Lock()
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.stats: Dict[str, Dict] = {}
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        with self.lock:
+            if endpoint not in self.breakers:
+                self.breakers[endpoint] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            return self.breakers[endpoint]
+
+    def is_available(self, endpoint: str) -> bool:
+        """端点当前是否未熔断（不会占用半开试探名额）"""
+        with self.lock:
+            breaker = self.breakers.get(endpoint)
+            return breaker is None or breaker.opened_at is None or (
+                not breaker.probing and breaker.remaining_cooldown() == 0)
+
+    def backoff_delay(self, attempt: int, response: Optional[requests.Response]) -> Optional[float]:
+        """第attempt次重试前的等待时间；Retry-After超过上限时返回None表示放弃重试"""
+        retry_after = parse_retry_after(response.headers.get('Retry-After')) if response is not None else None
+        if retry_after is not None:
+            return retry_after if retry_after <= self.backoff_max else None
+        # 全抖动指数退避
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def record_call(self, endpoint: str, latency: float, retries: int, success: bool):
+        with self.lock:
+            entry = self.stats.setdefault(endpoint, {
+                'calls': 0, 'failures': 0, 'retries': 0, 'latencies': deque(maxlen=200)
+            })
+            entry['calls'] += 1
+            entry['retries'] += retries
+            entry['failures'] += 0 if success else 1
+            entry['latencies'].append(latency)
+
+    def post(self, url: str, endpoint: Optional[str] = None, **kwargs) -> requests.Response:
+        """
+        发送POST请求，暂时性失败按退避重试。返回最后一次的响应（可能是非200），
+        网络错误重试耗尽时抛出原异常，端点熔断时抛出CircuitOpenError
+        """
+        endpoint = endpoint or url
+        breaker = self.breaker(endpoint)
+        with self.lock:
+            allowed = breaker.allow()
+        if not allowed:
+            raise CircuitOpenError(f"{endpoint} 熔断中，{breaker.remaining_cooldown():.0f} 秒后重试")
+
+        started = time.monotonic()
+        attempt = 0
+        try:
+            while True:
+                response, error = None, None
+                try:
+                    response = self.session.post(url, **kwargs)
+                except requests.exceptions.RequestException as e:
+                    error = e
+
+                if error is not None:
+                    retryable = isinstance(error, RETRY_EXCEPTIONS)
+                else:
+                    retryable = response.status_code in RETRY_STATUS_CODES
+                delay = self.backoff_delay(attempt, response) if retryable and attempt < self.max_retries else None
+                if delay is None:
+                    break
+
+                attempt += 1
+                reason = error or f"HTTP {response.status_code}"
+                if response is not None:
+                    response.close()  # 流式请求的连接需要显式归还连接池
+                logger.warning(f"{self.name} 请求 {endpoint} 失败 ({reason})，{delay:.1f} 秒后第 {attempt} 次重试")
+                time.sleep(delay)
+        except BaseException:
+            # 非请求错误（参数错误、中断等）不计入端点失败，但要释放半开试探名额，否则端点永远不再放行
+            with self.lock:
+                breaker.probing = False
+            raise
+
+        success = error is None and response.status_code not in RETRY_STATUS_CODES
+        latency = time.monotonic() - started
+        self.record_call(endpoint, latency, attempt, success)
+        with self.lock:
+            if success:
+                breaker.record_success()
+            elif breaker.record_failure():
+                logger.warning(f"{self.name} 端点 {endpoint} 连续失败，熔断 {self.breaker_cooldown:.0f} 秒")
+
+        logger.debug(f"{self.name} 请求 {endpoint} 完成: {latency:.2f} 秒，重试 {attempt} 次")
+        if error is not None:
+            raise error
+        return response
+
+    def metrics(self) -> Dict[str, Dict]:
+        """每个端点的调用次数、失败次数、重试次数、延迟分位数和熔断状态"""
+        with self.lock:
+            result = {}
+            for endpoint, entry in self.stats.items():
+                latencies = sorted(entry['latencies'])
+                breaker = self.breakers.get(endpoint)
+                result[endpoint] = {
+                    'calls': entry['calls'],
+                    'failures': entry['failures'],
+                    'retries': entry['retries'],
+                    'p50_seconds': round(latencies[len(latencies) // 2], 3),
+                    'p95_seconds': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+                    'circuit_open': bool(breaker and breaker.remaining_cooldown() > 0)
+                }
+            return result
+
+
+_clients: Dict[str, ApiClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_api_client(name: str) -> ApiClient:
+    """按服务名获取进程内共享的客户端（同一服务的所有小结器共用连接池和熔断状态）"""
+    with _clients_lock:
+        if name not in _clients:
+            _clients[name] = ApiClient(name)
+        return _clients[name]
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+离线性能基准测试
+在合成数据集上测量数据库读写、页面解析、本地小结、每日导出和网站路由的耗时，
+输出吞吐量、p50/p99延迟和峰值内存，结果保存为JSON，可与之前的结果对比发现性能回退
+"""
+
+import io
+import os
+import math
+import shutil
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import sqlite3
+import tempfile
+import tracemalloc
+import subprocess
+from contextlib import redirect_stdout
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import pytz
+
+from config import TIMEZONE, BENCHMARK_RESULTS_DIR, BENCHMARK_REGRESSION_THRESHOLD
+from database import TrumpPostsDB
+from corpus_generator import SyntheticCorpusGenerator
+from local_summarizer import LocalTrumpSummarizer
+from daily_export import DailyExporter
+from page_parser import parse_page_source
+import web_app
+
+logger = logging.getLogger(__name__)
+
+PAGE_SOURCE_FILE = 'trump_page_source.html'
+
+# 绝对差值低于该值的p50变化视为测量噪声，不算回退
+NOISE_FLOOR_MS = 0.05
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近秩法计算百分位数"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def git_commit() -> Optional[str]:
+    """当前代码的提交号，便于跨版本对比"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class BenchmarkSuite:
+    """基准测试集合"""
+
+    def __init__(self, db_path: Optional[str] = None, posts: int = 20000, days: int = 60,
+                 seed: int = 42, iterations: int = 50):
+        self.et_tz = pytz.timezone(TIMEZONE)
+        self.work_dir = tempfile.mkdtemp(prefix='trump_bench_')
+        self.seed = seed
+        self.iterations = iterations
+        self.corpus = {'seed': seed}
+
+        # 没有指定数据集时在临时目录生成一个小型合成数据集
+        if db_path is None:
+            db_path = os.path.join(self.work_dir, 'corpus.db')
+            with redirect_stdout(io.StringIO()):
+                result = SyntheticCorpusGenerator(db_path=db_path, seed=seed).load(posts, days)
+            self.corpus.update(posts=result['posts'], days=days, generated=True)
+
+        self.db_path = db_path
+        self.db = TrumpPostsDB(db_path)
+        self.corpus.update(db_path=db_path, posts=self.db.get_posts_count(),
+                           summaries=self.db.get_summaries_count())
+
+        stats = self.db.get_daily_post_stats()
+        if not stats:
+            raise ValueError(f"数据集 {db_path} 中没有帖子")
+        self.dates = sorted(row['post_date'] for row in stats)
+        self.busiest_date = max(stats, key=lambda row: row['post_count'])['post_date']
+        self.summary_dates = [row['summary_date'] for row in self.db.get_summary_index()]
+        self.corpus.update(start_date=min(self.dates), end_date=max(self.dates))
+
+        self.results = {}
+
+    def sample_dates(self, count: int, group: str) -> List[str]:
+        """按测试组固定种子抽样日期，保证每次运行（包括只跑部分测试组时）测量相同的数据"""
+        rng = random.Random(f"{self.seed}:{group}")
+        return [rng.choice(self.dates) for _ in range(count)]
+
+    def measure(self, name: str, func: Callable[[int], int], iterations: Optional[int] = None,
+                unit: str = 'ops'):
+        """
+        执行 func(i) 若干次并记录耗时，func 返回本次处理的条目数。
+        先计时（不开tracemalloc，避免拖慢测量），再单独跑一次记录峰值内存
+        """
+        iterations = iterations or self.iterations
+        func(0)  # 预热：填充页缓存和模板缓存
+
+        timings = []
+        items = 0
+        for i in range(iterations):
+            started = time.perf_counter()
+            items += func(i + 1) or 0
+            timings.append(time.perf_counter() - started)
+
+        tracemalloc.start()
+        func(iterations + 1)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        total = sum(timings)
+        self.results[name] = {
+            'iterations': iterations,
+            'items': items,
+            'unit': unit,
+            'total_seconds': round(total, 4),
+            'throughput_per_second': round(items / total, 1) if total else None,
+            'mean_ms': round(total / iterations * 1000, 3),
+            'p50_ms': round(percentile(timings, 50) * 1000, 3),
+            'p99_ms': round(percentile(timings, 99) * 1000, 3),
+            'peak_memory_kb': round(peak / 1024, 1)
+        }
+        print(f"  {name:<44} p50 {self.results[name]['p50_ms']:>9.3f} ms  "
+              f"p99 {self.results[name]['p99_ms']:>9.3f} ms  "
+              f"{self.results[name]['throughput_per_second'] or 0:>12,.1f} {unit}/s  "
+              f"峰值内存 {self.results[name]['peak_memory_kb']:>9,.1f} KB")
+
+    def bench_database(self):
+        """数据库写入和查询路径"""
+        template = self.db.get_posts_by_date(self.busiest_date)
+        write_db = TrumpPostsDB(os.path.join(self.work_dir, 'write.db'))
+        sequence = iter(range(10 ** 9))
+
+        def fresh_posts(count: int) -> List[Dict]:
+            posts = []
+            for _ in range(count):
+                post = dict(template[len(posts) % len(template)])
+                post['post_id'] = f"bench{next(sequence)}"
+                posts.append(post)
+            return posts
+
+        def insert_post(_):
+            write_db.insert_post(fresh_posts(1)[0])
+            return 1
+
+        def bulk_upsert(_):
+            posts = fresh_posts(200)
+            write_db.bulk_upsert_posts(posts)
+            return len(posts)
+
+        self.measure('db.insert_post', insert_post, iterations=self.iterations * 4, unit='posts')
+        self.measure('db.bulk_upsert_posts[200]', bulk_upsert, unit='posts')
+
+        dates = self.sample_dates(self.iterations + 2, 'database')
+        self.measure('db.get_posts_by_date', lambda i: len(self.db.get_posts_by_date(dates[i])), unit='posts')
+        self.measure('db.get_daily_stats', lambda i: bool(self.db.get_daily_stats(dates[i])), unit='days')
+        self.measure('db.get_posts_in_range[7d]',
+                     lambda i: len(self.db.get_posts_in_range(self.dates[max(0, self.dates.index(dates[i]) - 6)],
+                                                              dates[i])),
+                     unit='posts')
+        self.measure('db.get_latest_post_id', lambda i: bool(self.db.get_latest_post_id()), unit='ops')
+
+        terms = ['border', 'election', 'fake news', 'tariff*', 'economy', 'witch hunt']
+        self.measure('db.search_posts',
+                     lambda i: len(self.db.search_posts(terms[i % len(terms)])), unit='queries')
+
+    def bench_parsing(self):
+        """解析保存的页面快照"""
+        if not os.path.exists(PAGE_SOURCE_FILE):
+            logger.warning(f"页面快照 {PAGE_SOURCE_FILE} 不存在，跳过解析测试")
+            return
+
+        with open(PAGE_SOURCE_FILE, 'r', encoding='utf-8') as f:
+            html = f.read()
+        self.measure('page_parser.parse_page_source', lambda i: len(parse_page_source(html)), unit='posts')
+
+    def bench_summarizer(self):
+        """本地智能小结（数据预先读出，只测生成本身）"""
+        summarizer = LocalTrumpSummarizer(db_path=self.db_path)
+        days = [(date, self.db.get_posts_by_date(date), self.db.get_daily_stats(date))
+                for date in self.sample_dates(self.iterations + 2, 'summarizer')]
+
+        def summarize(i):
+            date, posts, stats = days[i]
+            summarizer.create_intelligent_summary(posts, date, stats=stats)
+            return len(posts)
+
+        self.measure('local_summarizer.create_intelligent_summary', summarize, unit='posts')
+
+    def bench_export(self):
+        """每日导出文件"""
+        exporter = DailyExporter(export_dir=os.path.join(self.work_dir, 'exports'), db_path=self.db_path)
+        dates = self.sample_dates(self.iterations + 2, 'export')
+        self.measure('daily_export.save_daily_export',
+                     lambda i: len(exporter.save_daily_export(dates[i], ['md', 'json'])), unit='files')
+
+    def bench_web(self):
+        """网站路由（Flask测试客户端）：cold 每次清空缓存并请求不同日期，warm 重复请求同一地址"""
+        web_app.DATABASE_PATH = self.db_path
+        web_app._posts_db = None
+        client = web_app.app.test_client()
+        daily_dates = self.summary_dates or self.dates
+        search_terms = ['border', 'election', 'economy']
+
+        def request_route(url_for: Callable[[int], str], cold: bool):
+            def run(i):
+                url = url_for(i if cold else 0)
+                if cold:
+                    web_app._data_cache.clear()
+                # 路由会打印加载日志，测量时屏蔽
+                with redirect_stdout(io.StringIO()):
+                    response = client.get(url)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{url} 返回 {response.status_code}")
+                return 1
+            return run
+
+        routes = [
+            ('/', lambda i: '/'),
+            ('/daily/<date>', lambda i: f'/daily/{daily_dates[i % len(daily_dates)]}'),
+            ('/archive', lambda i: '/archive'),
+            ('/api/stats', lambda i: '/api/stats'),
+            ('/api/search', lambda i: f'/api/search?q={search_terms[i % len(search_terms)]}')
+        ]
+
+        for route, url_for in routes:
+            self.measure(f'web GET {route} (cold)', request_route(url_for, True), unit='requests')
+            self.measure(f'web GET {route} (warm)', request_route(url_for, False), unit='requests')
+
+    def cleanup(self):
+        """删除临时目录（临时数据集、写入测试库和导出文件）"""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def run(self, groups: List[str]) -> Dict:
+        """执行指定的测试组，返回完整结果"""
+        for group in groups:
+            print(f"\n▶️ {group}")
+            getattr(self, f'bench_{group}')()
+
+        return {
+            'meta': {
+                'commit': git_commit(),
+                'created_at': datetime.now(self.et_tz).isoformat(),
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'platform': platform.platform(),
+                'iterations': self.iterations,
+                'corpus': self.corpus
+            },
+            'results': self.results
+        }
+
+
+BENCHMARK_GROUPS = ['database', 'parsing', 'summarizer', 'export', 'web']
+
+
+def compare_results(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """与基线对比p50延迟，返回超过阈值的回退项"""
+    regressions = []
+
+    print(f"\n📈 与基线对比 (基线提交: {baseline['meta'].get('commit')})")
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if not base or not base['p50_ms']:
+            continue
+        change = result['p50_ms'] / base['p50_ms'] - 1
+        regressed = change > threshold and result['p50_ms'] - base['p50_ms'] > NOISE_FLOOR_MS
+        marker = '❌' if regressed else '✅'
+        print(f"  {marker} {name:<44} {base['p50_ms']:>9.3f} → {result['p50_ms']:>9.3f} ms ({change:+.1%})")
+        if regressed:
+            regressions.append(name)
+
+    return regressions
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="离线性能基准测试")
+    parser.add_argument('--db', type=str, help='使用已有的合成数据集 (默认: 临时生成小型数据集)')
+    parser.add_argument('--posts', type=int, default=20000, help='临时数据集的帖子数 (默认: 20000)')
+    parser.add_argument('--days', type=int, default=60, help='临时数据集的天数 (默认: 60)')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子 (默认: 42)')
+    parser.add_argument('--iterations', type=int, default=50, help='每项测试的次数 (默认: 50)')
+    parser.add_argument('--only', nargs='+', choices=BENCHMARK_GROUPS, help='只运行指定的测试组')
+    parser.add_argument('--output', type=str, help=f'结果文件 (默认: {BENCHMARK_RESULTS_DIR}/<时间>_<提交>.json)')
+    parser.add_argument('--compare', type=str, metavar='BASELINE', help='与之前的结果文件对比，出现回退时返回非零退出码')
+    parser.add_argument('--threshold', type=float, default=BENCHMARK_REGRESSION_THRESHOLD,
+                        help=f'p50延迟变慢超过该比例视为回退 (默认: {BENCHMARK_REGRESSION_THRESHOLD})')
+    args = parser.parse_args()
+
+    # 被测代码的逐条INFO日志会干扰计时
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    print("⏱️ Trump Truth Social 性能基准测试")
+    print("=" * 50)
+
+    suite = BenchmarkSuite(db_path=args.db, posts=args.posts, days=args.days,
+                           seed=args.seed, iterations=args.iterations)
+    corpus = suite.corpus
+    print(f"📊 数据集: {corpus['posts']:,} 条帖子、{corpus['summaries']:,} 篇小结 "
+          f"({corpus['start_date']} ~ {corpus['end_date']})")
+
+    try:
+        report = suite.run(args.only or BENCHMARK_GROUPS)
+    finally:
+        suite.cleanup()
+
+    output = args.output
+    if not output:
+        stamp = datetime.now(suite.et_tz).strftime('%Y%m%d_%H%M%S')
+        output = os.path.join(BENCHMARK_RESULTS_DIR, f"{stamp}_{report['meta']['commit'] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 结果已保存: {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(report, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} 项性能回退超过 {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print("✅ 没有发现性能回退")
+
+
+if __name__ == "__main__":
+    main()
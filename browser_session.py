@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+常驻浏览器会话管理
+由调度器持有，跨多次定时爬取复用同一个Chrome实例，
+每次只刷新时间线；按运行次数或内存占用自动回收，失败时重建
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+from config import TRUTH_SOCIAL_URL, BROWSER_MAX_RUNS, BROWSER_MAX_MEMORY_MB
+from scraper import create_chrome_driver
+
+logger = logging.getLogger(__name__)
+
+
+class ManagedBrowserSession:
+    """常驻浏览器会话"""
+
+    def __init__(self, max_runs: int = BROWSER_MAX_RUNS,
+                 max_memory_mb: int = BROWSER_MAX_MEMORY_MB,
+                 driver_factory=create_chrome_driver):
+        self.max_runs = max_runs
+        self.max_memory_mb = max_memory_mb
+        self.driver_factory = driver_factory
+        self.driver = None
+        self.runs = 0
+        # 定时任务可能并发执行，同一时间只允许一个任务使用浏览器
+        self.lock = threading.Lock()
+
+    def start(self):
+        """启动新的浏览器实例"""
+        self.driver = self.driver_factory()
+        self.runs = 0
+        logger.info("常驻浏览器会话已启动")
+
+    def close(self):
+        """关闭浏览器实例"""
+        if self.driver:
+            try:
+                self.driver.quit()
+                logger.info("常驻浏览器会话已关闭")
+            except Exception as e:
+                logger.error(f"关闭常驻浏览器会话失败: {e}")
+            finally:
+                self.driver = None
+
+    def recycle(self, reason: str):
+        """回收并重建浏览器实例"""
+        logger.info(f"回收常驻浏览器会话: {reason}")
+        self.close()
+        self.start()
+
+    def is_healthy(self) -> bool:
+        """健康检查：浏览器进程和WebDriver连接是否可用"""
+        if self.driver is None:
+            return False
+        try:
+            return self.driver.execute_script("return document.readyState") is not None
+        except Exception as e:
+            logger.warning(f"常驻浏览器健康检查失败: {e}")
+            return False
+
+    def memory_usage_mb(self) -> Optional[float]:
+        """当前页面的JS堆内存占用（MB），无法获取时返回None"""
+        try:
+            used_bytes = self.driver.execute_script(
+                "return window.performance && performance.memory ? performance.memory.usedJSHeapSize : null"
+            )
+            return used_bytes / (1024 * 1024) if used_bytes else None
+        except Exception:
+            return None
+
+    def ensure_driver(self):
+        """确保有可用的浏览器实例，必要时启动或回收"""
+        if self.driver is None:
+            self.start()
+            return
+
+        if not self.is_healthy():
+            self.recycle("健康检查失败")
+            return
+
+        if self.runs >= self.max_runs:
+            self.recycle(f"已运行 {self.runs} 次")
+            return
+
+        memory_mb = self.memory_usage_mb()
+        if memory_mb is not None and memory_mb > self.max_memory_mb:
+            self.recycle(f"内存占用 {memory_mb:.0f}MB 超过 {self.max_memory_mb}MB")
+
+    def load_timeline(self):
+        """加载时间线：已在时间线页面时只刷新，否则重新访问"""
+        current_url = self.driver.current_url or ''
+        if current_url.startswith(TRUTH_SOCIAL_URL):
+            logger.info(f"刷新时间线 {TRUTH_SOCIAL_URL}")
+            self.driver.refresh()
+        else:
+            logger.info(f"访问 {TRUTH_SOCIAL_URL}")
+            self.driver.get(TRUTH_SOCIAL_URL)
+
+        # 刷新后回到页面顶部，从最新帖子开始
+        self.driver.execute_script("window.scrollTo(0, 0);")
+
+    def prepare(self):
+        """准备一次爬取：检查浏览器并加载时间线，失败时换新浏览器重试一次"""
+        self.ensure_driver()
+        try:
+            self.load_timeline()
+        except Exception as e:
+            logger.warning(f"常驻浏览器加载时间线失败，改用新浏览器: {e}")
+            self.recycle("加载时间线失败")
+            self.load_timeline()
+
+        self.runs += 1
+        return self.driver
+
+    @contextmanager
+    def lease(self):
+        """独占使用浏览器完成一次爬取；出错时丢弃浏览器，下次重新创建"""
+        with self.lock:
+            try:
+                yield self.prepare()
+            except Exception:
+                self.close()
+                raise
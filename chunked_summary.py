@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+分块小结（map-reduce）
+帖子很多的日期一次性放进提示词会超出模型上下文、请求也最慢。
+这里按token预算把帖子分组，各组并发生成要点（map），再合并成当日小结（reduce）。
+Claude和Hugging Face小结器共用
+"""
+
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from config import SUMMARY_CHUNK_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+# 中日韩字符大约每字一个token，其余文本大约每4个字符一个token
+CJK_PATTERN = re.compile(r'[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]')
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估计文本的token数（偏保守，不依赖具体模型的分词器）"""
+    cjk = len(CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def truncate_to_budget(text: str, budget: int) -> str:
+    """把单段文本截断到token预算以内（只用于单条帖子就超出预算的极端情况）"""
+    if estimate_tokens(text) <= budget:
+        return text
+
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low].rstrip() + "…\n"
+
+
+def pack_blocks(blocks: List[str], budget: int) -> List[List[str]]:
+    """按顺序把文本块装进不超过token预算的分组；单块超出预算时截断后单独成组"""
+    groups = []
+    current, used = [], 0
+
+    for block in blocks:
+        tokens = estimate_tokens(block)
+        if tokens > budget:
+            block, tokens = truncate_to_budget(block, budget), budget
+
+        if current and used + tokens > budget:
+            groups.append(current)
+            current, used = [], 0
+
+        current.append(block)
+        used += tokens
+
+    if current:
+        groups.append(current)
+    return groups
+
+
+def reduce_to_budget(partials: List[str],
+                     combine: Callable[[List[str]], Optional[str]],
+                     budget: int,
+                     max_workers: int = SUMMARY_CHUNK_CONCURRENCY) -> List[str]:
+    """
+    分层合并：各组要点合计超出token预算时，按预算把要点分组、并发调用combine合并成更精简的要点，
+    逐层进行直到能放进一次合并请求。某组合并失败时直接拼接该组（拼接后仍在预算内），
+    每层的要点数都严格减少，因此一定会结束
+    """
+    level = 1
+    while len(partials) > 1 and sum(estimate_tokens(partial) for partial in partials) > budget:
+        groups = pack_blocks(partials, budget)
+        if len(groups) >= len(partials):
+            # 每组要点单独就接近预算，无法两两合并：按平均份额截断
+            share = max(1, budget // len(partials))
+            return [truncate_to_budget(partial, share) for partial in partials]
+
+        logger.info(f"第 {level} 层合并: {len(partials)} 组要点 -> {len(groups)} 组")
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(groups))),
+                                thread_name_prefix='summary-combine') as executor:
+            combined = list(executor.map(combine, groups))
+
+        partials = [result or '\n\n'.join(group) for result, group in zip(combined, groups)]
+        level += 1
+
+    if len(partials) == 1:
+        partials = [truncate_to_budget(partials[0], budget)]
+    return partials
+
+
+def map_reduce(groups: List[List[str]],
+               summarize_group: Callable[[List[str], int], Optional[str]],
+               merge: Callable[[List[str]], Optional[str]],
+               max_workers: int = SUMMARY_CHUNK_CONCURRENCY,
+               budget: Optional[int] = None,
+               combine: Optional[Callable[[List[str]], Optional[str]]] = None) -> Optional[str]:
+    """
+    并发执行 summarize_group(分组, 序号从1开始)，按原顺序把成功的分组要点交给merge合并。
+    部分分组失败时用其余分组继续，全部失败时返回None。
+    给出budget和combine时，要点合计超出预算会先分层合并（见reduce_to_budget）
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(groups))),
+                            thread_name_prefix='summary-map') as executor:
+        partials = list(executor.map(summarize_group, groups, range(1, len(groups) + 1)))
+
+    failed = [index for index, partial in enumerate(partials, 1) if not partial]
+    if failed:
+        logger.warning(f"第 {', '.join(map(str, failed))} 组帖子小结失败，使用其余 {len(groups) - len(failed)} 组合并")
+
+    partials = [partial for partial in partials if partial]
+    if not partials:
+        return None
+
+    if budget and combine:
+        partials = reduce_to_budget(partials, combine, budget, max_workers)
+    return merge(partials)
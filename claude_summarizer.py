@@ -5,6 +5,7 @@ Claude API 小结生成器
 """
 
 import os
+import time
 import requests
 import json
 import logging
@@ -13,7 +14,13 @@ from typing import List, Dict, Optional
 import pytz
 
 from database import TrumpPostsDB
-from config import TIMEZONE
+from response_cache import ResponseCache
+from chunked_summary import pack_blocks, map_reduce, estimate_tokens
+from api_client import get_api_client, CircuitOpenError
+from config import (
+    TIMEZONE, CLAUDE_PROMPT_TOKEN_BUDGET, CLAUDE_STREAMING, CLAUDE_STREAM_READ_TIMEOUT,
+    CLAUDE_STREAM_RESUMES, CLAUDE_DRAFT_FLUSH_SECONDS
+)
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +28,7 @@ logger = logging.getLogger(__name__)
 class ClaudeSummarizer:
     """Claude API 小结生成器"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, use_cache: bool = True, stream: bool = CLAUDE_STREAMING):
         self.db = TrumpPostsDB()
         self.et_tz = pytz.timezone(TIMEZONE)
         
@@ -36,6 +43,24 @@ class ClaudeSummarizer:
             "anthropic-version": "2023-06-01",
             "content-type": "application/json"
         }
+        
+        # API响应缓存（与Hugging Face小结器共用）
+        self.cache = ResponseCache(enabled=use_cache)
+        
+        # 共享连接池，带重试退避和熔断
+        self.client = get_api_client('claude')
+        
+        # 流式接收：生成中的内容写入草稿，中断后可续写
+        self.stream = stream
+    
+    @staticmethod
+    def render_post(index: int, post: Dict) -> str:
+        """提示词中的单条帖子"""
+        post_time = post.get('post_time', '未知时间')
+        content = post.get('content', '').strip()
+        post_url = post.get('post_url', '')
+        
+        return f"帖子{index} [{post_time}]:\n{content}\n链接: {post_url}\n"
     
     def create_summary_prompt(self, posts: List[Dict], date: str) -> str:
         """创建小结提示词"""
@@ -44,13 +69,7 @@ class ClaudeSummarizer:
         sorted_posts = sorted(posts, key=lambda x: x.get('post_time', ''))
         
         # 构建帖子内容
-        posts_content = []
-        for i, post in enumerate(sorted_posts, 1):
-            post_time = post.get('post_time', '未知时间')
-            content = post.get('content', '').strip()
-            post_url = post.get('post_url', '')
-            
-            posts_content.append(f"帖子{i} [{post_time}]:\n{content}\n链接: {post_url}\n")
+        posts_content = [self.render_post(i, post) for i, post in enumerate(sorted_posts, 1)]
         
         prompt = f"""请为以下Trump在Truth Social上{date}发布的帖子生成一份专业的中文小结：
 
@@ -84,8 +103,93 @@ class ClaudeSummarizer:
 
         return prompt
     
-    def call_claude_api(self, prompt: str) -> Optional[str]:
-        """调用Claude API生成小结"""
+    def create_chunk_prompt(self, blocks: List[str], date: str, part: int, total: int) -> str:
+        """分块模式：单组帖子的要点提炼提示词"""
+        return f"""以下是Trump在Truth Social上{date}发布的第{part}/{total}组帖子（当天帖子较多，分组整理）：
+
+=== 第{part}组帖子 ===
+{''.join(blocks)}
+
+请用中文提炼这一组帖子的要点：
+1. 按重要性列出3-5个要点，每个要点注明对应的帖子编号和时间
+2. 理解帖子的真实含义，突出政策立场、重要声明和争议点
+3. 简要记录这一组帖子的情绪和语调
+4. 只整理本组内容，不要推测其他帖子"""
+    
+    def create_reduce_prompt(self, partials: List[str], date: str, post_count: int) -> str:
+        """分块模式：合并各组要点的提示词"""
+        sections = '\n\n'.join(f"=== 第{i}组要点 ===\n{partial}" for i, partial in enumerate(partials, 1))
+        
+        return f"""以下是Trump在Truth Social上{date}发布的{post_count}条帖子的分组要点（按时间顺序）：
+
+{sections}
+
+请在这些要点的基础上生成一份专业的中文小结：
+
+1. **主题归纳**: 识别当日的主要话题和观点，合并各组之间重复的内容
+2. **语调分析**: 分析Trump的情绪和态度
+3. **重要信息提取**: 突出政策立场、重要声明、争议点等
+4. **客观总结**: 保持新闻报道的客观性
+
+小结格式要求：
+## {date} Trump Truth Social 动态深度分析
+
+**核心观点**: [总结当日最重要的1-2个观点]
+
+**主要内容**: 
+- [按重要性排列的3-5个要点]
+
+**语调特点**: [分析整体语调和情绪]
+
+**值得关注**: [指出特别重要或争议性的内容]
+
+只输出小结本身，原文链接会自动附在后面。"""
+    
+    def create_combine_prompt(self, partials: List[str], date: str) -> str:
+        """分块模式：分组要点过多时，先把一部分要点合并去重（分层合并的中间步骤）"""
+        sections = '\n\n'.join(f"=== 第{i}组要点 ===\n{partial}" for i, partial in enumerate(partials, 1))
+        
+        return f"""以下是Trump在Truth Social上{date}发布的部分帖子的分组要点（按时间顺序）：
+
+{sections}
+
+请把这些要点合并为一份更精简的要点列表：
+1. 合并重复的内容，按重要性保留5-8个要点，保留对应的帖子编号和时间
+2. 简要记录这些帖子的情绪和语调
+3. 只输出要点，不要写成最终小结的格式"""
+    
+    def summarize_posts(self, posts: List[Dict], date: str) -> Optional[str]:
+        """
+        生成小结：帖子内容在token预算内时一次请求；
+        超出时分组并发提炼要点，再合并成当日小结并附上原文链接
+        """
+        sorted_posts = sorted(posts, key=lambda x: x.get('post_time', ''))
+        blocks = [self.render_post(i, post) for i, post in enumerate(sorted_posts, 1)]
+        groups = pack_blocks(blocks, CLAUDE_PROMPT_TOKEN_BUDGET)
+        
+        if len(groups) <= 1:
+            return self.call_claude_api(self.create_summary_prompt(posts, date), draft_date=date)
+        
+        logger.info(f"{date} 共 {len(posts)} 条帖子，分 {len(groups)} 组生成要点后合并")
+        summary = map_reduce(
+            groups,
+            lambda group, part: self.call_claude_api(self.create_chunk_prompt(group, date, part, len(groups))),
+            lambda partials: self.call_claude_api(self.create_reduce_prompt(partials, date, len(posts)),
+                                                  draft_date=date),
+            budget=CLAUDE_PROMPT_TOKEN_BUDGET,
+            combine=lambda partials: self.call_claude_api(self.create_combine_prompt(partials, date))
+        )
+        if not summary:
+            return None
+        
+        links = '\n'.join(f"• [{post.get('post_time', '时间未知')}] {post.get('post_url', '')}" for post in sorted_posts)
+        return f"{summary}\n\n### 原文链接参考：\n{links}"
+    
+    def call_claude_api(self, prompt: str, draft_date: Optional[str] = None) -> Optional[str]:
+        """
+        调用Claude API生成小结（相同请求优先读取响应缓存）。
+        流式模式下传入draft_date时，生成中的内容写入该日期的草稿
+        """
         try:
             payload = {
                 "model": "claude-3-sonnet-20240229",
@@ -98,9 +202,31 @@ class ClaudeSummarizer:
                 ]
             }
             
+            cached = self.cache.get('claude', payload['model'], payload)
+            if cached:
+                return cached
+            
             logger.info("调用Claude API生成小结")
-            response = requests.post(
+            if self.stream:
+                content = self.stream_claude_api(payload, draft_date)
+            else:
+                content = self.request_claude_api(payload)
+            
+            if content:
+                logger.info("Claude API调用成功")
+                self.cache.put('claude', payload['model'], payload, content)
+            return content
+                
+        except Exception as e:
+            logger.error(f"调用Claude API失败: {e}")
+            return None
+    
+    def request_claude_api(self, payload: Dict) -> Optional[str]:
+        """非流式请求：等待完整响应"""
+        try:
+            response = self.client.post(
                 self.api_url, 
+                endpoint=payload['model'],
                 headers=self.headers, 
                 json=payload, 
                 timeout=30
@@ -108,9 +234,7 @@ class ClaudeSummarizer:
             
             if response.status_code == 200:
                 result = response.json()
-                content = result['content'][0]['text']
-                logger.info("Claude API调用成功")
-                return content.strip()
+                return result['content'][0]['text'].strip()
             else:
                 logger.error(f"Claude API调用失败: {response.status_code} - {response.text}")
                 return None
@@ -118,9 +242,121 @@ class ClaudeSummarizer:
         except requests.exceptions.Timeout:
             logger.error("Claude API调用超时")
             return None
-        except Exception as e:
-            logger.error(f"调用Claude API失败: {e}")
-            return None
+    
+    def stream_claude_api(self, payload: Dict, draft_date: Optional[str] = None) -> Optional[str]:
+        """
+        流式请求：边接收边（按间隔）写入草稿。流中断时以已收到的内容作为assistant前缀续写，
+        最多CLAUDE_STREAM_RESUMES次；仍未完成时草稿保留在数据库中，下次生成同一请求时从草稿继续
+        """
+        draft_key = ResponseCache.make_key('claude', payload['model'], payload)
+        received = {'text': '', 'flushed_at': 0.0}
+        
+        stats = None
+        if draft_date:
+            stats = self.db.get_daily_stats(draft_date)
+            draft = self.db.get_summary_draft(draft_date)
+            if draft and draft['draft_key'] == draft_key:
+                received['text'] = draft['summary_content']
+                logger.info(f"从已保存的草稿（{len(received['text'])} 字）继续生成 {draft_date} 的小结")
+        
+        def flush(force: bool = False):
+            if not draft_date or not received['text']:
+                return
+            now = time.monotonic()
+            if force or now - received['flushed_at'] >= CLAUDE_DRAFT_FLUSH_SECONDS:
+                received['flushed_at'] = now
+                self.db.save_summary_draft({
+                    'summary_date': draft_date,
+                    'summary_content': received['text'],
+                    'post_count': stats['post_count'],
+                    'total_likes': stats['total_likes'],
+                    'total_reposts': stats['total_reposts'],
+                    'total_comments': stats['total_comments'],
+                    'generated_by': 'Claude'
+                }, draft_key)
+        
+        def on_text(text: str):
+            received['text'] = text
+            flush()
+        
+        for attempt in range(CLAUDE_STREAM_RESUMES + 1):
+            try:
+                if self.read_stream(payload, received['text'], on_text):
+                    return received['text'].strip()
+                if not received['text']:
+                    return None  # 请求被拒绝（非200），重试也不会成功
+                logger.warning("续写请求被拒绝，从头重新生成")
+                received['text'] = ''
+            
+            except CircuitOpenError as e:
+                logger.warning(f"Claude API暂不可用: {e}")
+                break
+            except (requests.exceptions.RequestException, ValueError) as e:
+                flush(force=True)
+                if attempt < CLAUDE_STREAM_RESUMES:
+                    logger.warning(f"Claude流式响应中断 ({e})，已收到 {len(received['text'])} 字，继续生成")
+                else:
+                    logger.error(f"Claude流式响应中断 ({e})，已收到 {len(received['text'])} 字")
+        
+        flush(force=True)
+        if draft_date and received['text']:
+            logger.info(f"{draft_date} 的部分小结已保存为草稿，下次生成时继续")
+        return None
+    
+    def read_stream(self, payload: Dict, prefix: str, on_text) -> bool:
+        """
+        发送一次流式请求，每收到文本调用on_text(目前的全部文本)。
+        prefix非空时作为assistant消息前缀续写。正常结束返回True，非200响应返回False，
+        中途断开或服务端报错时抛出异常
+        """
+        request = dict(payload, stream=True)
+        text = ''
+        if prefix:
+            # assistant前缀不能以空白结尾；续写部分计入原max_tokens预算
+            text = prefix.rstrip()
+            request['messages'] = payload['messages'] + [{"role": "assistant", "content": text}]
+            request['max_tokens'] = max(100, payload['max_tokens'] - estimate_tokens(text))
+        
+        response = self.client.post(
+            self.api_url,
+            endpoint=payload['model'],
+            headers=self.headers,
+            json=request,
+            stream=True,
+            timeout=(10, CLAUDE_STREAM_READ_TIMEOUT)
+        )
+        
+        with response:
+            if response.status_code != 200:
+                logger.error(f"Claude API调用失败: {response.status_code} - {response.text}")
+                return False
+            
+            for event in self.iter_sse_events(response):
+                event_type = event.get('type')
+                if event_type == 'content_block_delta' and event['delta'].get('type') == 'text_delta':
+                    text += event['delta']['text']
+                    on_text(text)
+                elif event_type == 'message_stop':
+                    return True
+                elif event_type == 'error':
+                    raise requests.exceptions.RequestException(event.get('error', {}).get('message', event))
+        
+        raise requests.exceptions.ChunkedEncodingError("响应流在message_stop之前结束")
+    
+    @staticmethod
+    def iter_sse_events(response: requests.Response):
+        """逐个解析SSE事件的data（JSON）"""
+        data_lines = []
+        for line in response.iter_lines():
+            line = line.decode('utf-8')
+            if not line:
+                if data_lines:
+                    yield json.loads('\n'.join(data_lines))
+                    data_lines = []
+            elif line.startswith('data:'):
+                data_lines.append(line[5:].lstrip())
+        if data_lines:
+            yield json.loads('\n'.join(data_lines))
     
     def generate_daily_summary(self, date: str) -> Optional[str]:
         """生成指定日期的小结"""
@@ -136,26 +372,20 @@ class ClaudeSummarizer:
             
             logger.info(f"找到 {len(posts)} 条帖子，开始生成小结")
             
-            # 创建提示词
-            prompt = self.create_summary_prompt(posts, date)
-            
-            # 调用Claude API
-            summary = self.call_claude_api(prompt)
+            # 调用Claude API（帖子过多时分块生成）
+            summary = self.summarize_posts(posts, date)
             
             if summary:
-                # 保存到数据库
-                post_count = len(posts)
-                total_likes = sum(post.get('likes_count', 0) for post in posts)
-                total_reposts = sum(post.get('reposts_count', 0) for post in posts)
-                total_comments = sum(post.get('comments_count', 0) for post in posts)
+                # 保存到数据库（统计数据读取每日统计汇总表）
+                stats = self.db.get_daily_stats(date)
                 
                 summary_data = {
                     'summary_date': date,
                     'summary_content': summary,
-                    'post_count': post_count,
-                    'total_likes': total_likes,
-                    'total_reposts': total_reposts,
-                    'total_comments': total_comments,
+                    'post_count': stats['post_count'],
+                    'total_likes': stats['total_likes'],
+                    'total_reposts': stats['total_reposts'],
+                    'total_comments': stats['total_comments'],
                     'generated_by': 'Claude'
                 }
                 
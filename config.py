@@ -1,6 +1,16 @@
 # 数据库配置
 DATABASE_PATH = "trump_posts.db"
 
+# SQLite连接配置（见db_connection.py）
+SQLITE_BUSY_TIMEOUT_MS = 10000       # 遇到锁时最长等待时间
+SQLITE_SYNCHRONOUS = "NORMAL"        # WAL模式下NORMAL即可保证一致性
+SQLITE_CACHE_SIZE_KB = 20000         # 每个连接的页缓存大小
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024  # 内存映射读取大小
+
+# 数据库迁移配置（见db_migrations.py）
+MIGRATION_BACKFILL_CHUNK = 2000      # 回填时每个事务处理的行数
+MIGRATION_BACKFILL_PAUSE = 0.01      # 每块之间让出写锁的时间（秒）
+
 # 爬虫配置
 TRUTH_SOCIAL_URL = "https://truthsocial.com/@realDonaldTrump"
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
@@ -10,10 +20,24 @@ MAX_SCROLL_ATTEMPTS = 30  # 减少滚动次数，专注质量
 MAX_NO_NEW_POSTS = 8     # 增加连续无新帖子的容忍度
 SCROLL_PAUSE_TIME = 4    # 增加等待时间，确保内容充分加载
 
+# 提取配置
+# batch: 每轮用一次execute_script批量提取所有帖子，减少WebDriver往返
+# html: 获取page_source后用lxml离线解析（见page_parser.py）
+# element: 逐元素逐字段调用WebDriver（原始方式）
+EXTRACTION_MODE = "batch"
+
+# 增量爬取配置 - 无目标日期时以库中最新帖子ID为水位线
+INCREMENTAL_STOP = True   # 遇到水位线之前的已存储帖子后提前停止
+INCREMENTAL_OVERLAP = 3   # 连续多少个已存储旧帖子后停止（容忍置顶帖等乱序）
+
 # 调度配置
 SCHEDULE_HOUR = 1  # 每小时运行一次
 SCHEDULE_MINUTE = 0
 
+# 互动数据刷新配置 - 定期重新读取最近帖子的点赞/转发/评论数并记录快照
+ENGAGEMENT_REFRESH_DAYS = 3      # 刷新最近几天发布的帖子
+ENGAGEMENT_REFRESH_MINUTE = 30   # 每小时第几分钟执行（与整点爬取错开）
+
 # 时区配置
 TIMEZONE = "US/Eastern"
 
@@ -26,6 +50,59 @@ BROWSER_OPTIONS = [
     "--window-size=1920,1080"
 ]
 
+# 常驻浏览器会话配置（调度器跨多次爬取复用浏览器）
+BROWSER_MAX_RUNS = 24        # 复用多少次后回收重建
+BROWSER_MAX_MEMORY_MB = 512  # 页面JS堆内存超过该值时回收重建
+
+# 本地小结批量回填配置（main.py --backfill-summaries）
+SUMMARY_BACKFILL_BATCH = 200  # 每个事务写入的小结天数
+
+# Hugging Face 小结配置（summarizer.py）
+HF_REQUEST_TIMEOUT = 30          # 单个模型请求超时（秒）
+HF_HEDGE_FANOUT = 2              # 同时在途的模型请求数，1 表示逐个尝试
+HF_HEDGE_DELAY = 3.0             # 前一个请求多久未返回就对冲下一个模型（秒），0 表示同时发出
+HF_MODEL_STATS_FILE = "hf_model_stats.json"  # 各模型延迟和成功率统计，决定尝试顺序
+
+# 小结API响应缓存配置（response_cache.py，Claude和Hugging Face共用）
+API_CACHE_PATH = "api_cache.db"
+API_CACHE_MAX_MB = 50            # 缓存总大小上限，超出时淘汰最久未使用的响应，0 表示关闭缓存
+API_CACHE_TTL_HOURS = 24 * 30    # 响应过期时间（小时），None 表示不过期
+
+# 分块小结配置（chunked_summary.py）：帖子部分超过预算时分组生成要点再合并
+CLAUDE_PROMPT_TOKEN_BUDGET = 4000  # Claude单次请求中帖子内容的token预算
+HF_PROMPT_TOKEN_BUDGET = 350       # Hugging Face模型上下文很小（flan-t5为512）
+SUMMARY_CHUNK_CONCURRENCY = 4      # 同时生成的分组数
+
+# 小结API客户端配置（api_client.py，Claude和Hugging Face共用）
+API_POOL_SIZE = 8                # 每个服务保持的长连接数
+API_MAX_RETRIES = 2              # 429/5xx和网络错误的最多重试次数
+API_BACKOFF_BASE = 1.0           # 指数退避基数（秒），实际等待在 [0, base*2^n] 内随机
+API_BACKOFF_MAX = 20.0           # 单次等待上限（秒），Retry-After超过该值时不再重试
+API_BREAKER_THRESHOLD = 3        # 端点连续失败多少次后熔断
+API_BREAKER_COOLDOWN = 300       # 熔断冷却时间（秒），期间跳过该端点
+
+# Claude流式输出配置（claude_summarizer.py）
+CLAUDE_STREAMING = True           # 以SSE流式接收小结，边生成边写入草稿
+CLAUDE_STREAM_READ_TIMEOUT = 30   # 流中超过多少秒没有收到任何数据视为中断（秒），不再限制总耗时
+CLAUDE_STREAM_RESUMES = 2         # 流中断后从已收到的内容续写的次数
+CLAUDE_DRAFT_FLUSH_SECONDS = 1.0  # 草稿写入数据库的最短间隔（秒）
+DRAFT_PAGE_MAX_RELOADS = 40       # 网页显示生成中的草稿时最多自动刷新的次数（每3秒一次）
+
+# 多日小结流水线配置（summary_pipeline.py，main.py --summarize-missing）
+SUMMARY_PIPELINE_CONCURRENCY = 8  # 同时生成小结的日期数
+SUMMARY_CATCHUP_DAYS = 7          # 未指定起始日期时检查最近几天
+
+# 网页数据缓存配置（web_app.py）
+WEB_CACHE_MAX_ENTRIES = 256  # 进程内缓存的最多条目数（首页数据和每个日期页面各一条）
+
+# 静态网站生成配置（main.py --build-site）
+SITE_OUTPUT_DIR = "site"
+
+# 性能测试配置
+SYNTHETIC_DB_PATH = "synthetic_trump_posts.db"  # corpus_generator.py 生成的合成数据集
+BENCHMARK_RESULTS_DIR = "benchmark_results"     # benchmark.py 结果文件目录
+BENCHMARK_REGRESSION_THRESHOLD = 0.2            # p50延迟变慢超过20%视为回退
+
 # 日志配置
 LOG_LEVEL = "INFO"
 LOG_FILE = "trump_scraper.log"
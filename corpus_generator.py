@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+合成数据集生成器
+按固定随机种子生成百万级、分布接近真实的帖子和每日小结，用于性能测试：
+帖子长度长尾分布、发帖时间成簇、互动数据高度偏斜、部分帖子带媒体链接。
+写入时走批量导入路径：暂时移除维护触发器，导入完成后一次性重建汇总表和全文索引。
+"""
+
+import json
+import time
+import random
+import hashlib
+import logging
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Tuple
+import pytz
+
+from config import TIMEZONE, DATABASE_PATH, SQLITE_SYNCHRONOUS, SYNTHETIC_DB_PATH
+from database import TrumpPostsDB
+from db_connection import get_connection
+from db_migrations import (
+    schema_transaction, create_engagement_snapshots, create_daily_stats, create_fulltext_index
+)
+from analysis_formatter import format_analysis
+
+logger = logging.getLogger(__name__)
+
+# 未指定最后一天时使用的固定日期，保证相同种子每次生成完全相同的数据集
+DEFAULT_END_DATE = "2025-06-30"
+
+# 批量导入期间移除的触发器，导入完成后由对应迁移重新创建
+LOAD_TRIGGERS = [
+    'daily_stats_insert', 'daily_stats_update', 'daily_stats_delete',
+    'trump_posts_fts_insert', 'trump_posts_fts_update', 'trump_posts_fts_delete'
+]
+
+# 每小时发帖权重（东部时间），深夜和清晨最活跃
+HOUR_WEIGHTS = [
+    6, 5, 3, 2, 1, 2, 5, 8, 9, 8, 6, 5,
+    4, 4, 4, 4, 5, 5, 5, 6, 7, 8, 9, 8
+]
+
+# 内容素材，覆盖本地小结器的话题关键词
+TOPIC_PHRASES = {
+    'election': ['the Rigged Election', 'millions of illegal ballots', 'Voter I.D.', 'the polls are looking great',
+                 'a massive landslide victory', 'mail-in voting is a disaster'],
+    'economy': ['record high Stock Market', 'jobs are coming back', 'the greatest economy in history',
+                'Tariffs are making us rich', 'inflation is coming down', 'business is booming'],
+    'border': ['the Southern Border', 'the Border Wall', 'illegal immigration', 'border security',
+               'criminals pouring into our Country', 'REMIGRATION'],
+    'media': ['the Fake News Media', 'the failing New York Times', 'Fake News CNN', 'corrupt journalists',
+              'the Lamestream press', 'Fake Polls'],
+    'political': ['Radical Left Democrats', 'weak Republicans', 'Congress must act', 'the Senate',
+                  'Crooked Joe Biden', 'Kamala Harris'],
+    'legal': ['a Corrupt Judge', 'this Witch Hunt trial', 'the court case', 'Election Interference',
+              'the Weaponized DOJ', 'a totally illegal case'],
+    'campaign': ['our great rally tonight', 'MAKE AMERICA GREAT AGAIN', 'thank you for your support',
+                 'the campaign is surging', 'a record crowd', 'please donate']
+}
+OPENERS = ['', '', 'Wow!', 'Just in:', 'BIG NEWS:', 'Thank you!', 'Congratulations to', 'Remember,']
+VERBS = ['is', 'will be', 'was never', 'has become', 'must stop', 'is destroying', 'is saving', 'loves']
+CLOSERS = ['!', '!!!', '.', '. Sad!', '. MAGA!', '. So true!', '. Thank you!', '...']
+MENTIONS = ['@realDonaldTrump', '@TeamTrump', '@DonaldJTrumpJr', '@EricTrump', '@WhiteHouse', '@JDVance']
+FILLER = ['very', 'totally', 'really', 'incredibly', 'so', 'absolutely', 'tremendous', 'beautiful',
+          'great', 'terrible', 'corrupt', 'winning', 'failing', 'strong', 'weak', 'disaster', 'amazing']
+MEDIA_HOST = 'https://static-assets-1.truthsocial.com/tmtg:prime-ts-assets/media_attachments/files'
+
+
+class SyntheticCorpusGenerator:
+    """合成帖子数据集生成器"""
+
+    def __init__(self, db_path: str = SYNTHETIC_DB_PATH, seed: int = 42):
+        self.db_path = db_path
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.et_tz = pytz.timezone(TIMEZONE)
+        self.id_sequence = 0
+
+    def day_post_counts(self, total_posts: int, days: int) -> List[int]:
+        """把总帖子数分配到每天，日发帖量服从过度离散的伽马分布"""
+        weights = [self.rng.gammavariate(1.5, 1.0) for _ in range(days)]
+        scale = total_posts / sum(weights)
+        counts = [int(weight * scale) for weight in weights]
+
+        # 余数随机分给若干天，保证总数准确
+        for _ in range(total_posts - sum(counts)):
+            counts[self.rng.randrange(days)] += 1
+        return counts
+
+    def day_post_times(self, date: datetime, count: int) -> List[datetime]:
+        """生成一天内成簇的发帖时间：先选若干爆发时段，再在其中以分钟级间隔连续发帖"""
+        bursts = max(1, min(count, int(self.rng.expovariate(1 / max(1.0, count / 5))) + 1))
+        hours = self.rng.choices(range(24), weights=HOUR_WEIGHTS, k=bursts)
+
+        # 每个爆发时段内的帖子间隔服从均值4分钟的指数分布
+        cursors = [date + timedelta(hours=hour, minutes=self.rng.uniform(0, 60)) for hour in hours]
+        day_end = date + timedelta(hours=23, minutes=59, seconds=59)
+
+        times = []
+        for index in range(count):
+            burst = index % bursts
+            cursors[burst] += timedelta(minutes=self.rng.expovariate(1 / 4.0))
+            times.append(min(cursors[burst], day_end - timedelta(seconds=self.rng.uniform(0, 600))))
+        return sorted(times)
+
+    def post_content(self) -> str:
+        """生成一条帖子正文，词数服从对数正态分布（多数几十个词，少数长文）"""
+        kind = self.rng.random()
+        if kind < 0.05:
+            return f"https://truthsocial.com/@realDonaldTrump/posts/{self.rng.getrandbits(56)}"
+        if kind < 0.12:
+            return f"RT {self.rng.choice(MENTIONS)}: {self.sentence(self.rng.choice(list(TOPIC_PHRASES)))}"
+
+        target_words = max(3, min(900, int(self.rng.lognormvariate(3.4, 0.9))))
+        topics = self.rng.sample(list(TOPIC_PHRASES), k=self.rng.randint(1, 3))
+
+        sentences = []
+        words = 0
+        while words < target_words:
+            sentence = self.sentence(self.rng.choice(topics))
+            sentences.append(sentence)
+            words += len(sentence.split())
+        return ' '.join(sentences)
+
+    def sentence(self, topic: str) -> str:
+        """按模板拼一句话"""
+        parts = [self.rng.choice(OPENERS), self.rng.choice(TOPIC_PHRASES[topic]), self.rng.choice(VERBS)]
+        parts += self.rng.choices(FILLER, k=self.rng.randint(1, 4))
+        if self.rng.random() < 0.3:
+            parts.append(self.rng.choice(TOPIC_PHRASES[topic]))
+        if self.rng.random() < 0.08:
+            parts.append(self.rng.choice(MENTIONS))
+
+        text = ' '.join(part for part in parts if part)
+        if self.rng.random() < 0.15:
+            text = text.upper()
+        return text + self.rng.choice(CLOSERS)
+
+    def engagement(self, burst_size: int) -> Tuple[int, int, int]:
+        """互动数据：点赞对数正态分布，少数帖子以帕累托倍数爆红"""
+        likes = self.rng.lognormvariate(9.3, 0.9)
+        if self.rng.random() < 0.02:
+            likes *= self.rng.paretovariate(1.5)
+        # 连续刷屏时单条帖子的互动被摊薄
+        likes /= 1 + 0.05 * burst_size
+
+        likes = int(likes)
+        reposts = int(likes * self.rng.uniform(0.12, 0.35))
+        comments = int(likes * self.rng.uniform(0.04, 0.15))
+        return likes, reposts, comments
+
+    def media_urls(self, post_id: int) -> str:
+        """约四分之一的帖子带1-4个图片或视频"""
+        if self.rng.random() >= 0.25:
+            return json.dumps([])
+
+        urls = []
+        for index in range(self.rng.choice([1, 1, 1, 2, 3, 4])):
+            digest = hashlib.md5(f"{post_id}-{index}".encode('utf-8')).hexdigest()[:16]
+            extension = 'mp4' if self.rng.random() < 0.2 else 'jpg'
+            urls.append(f"{MEDIA_HOST}/{str(post_id)[:3]}/{str(post_id)[3:6]}/original/{digest}.{extension}")
+        return json.dumps(urls)
+
+    def next_post_id(self, moment: datetime) -> int:
+        """与Truth Social一致的递增ID：毫秒时间戳左移16位加序号"""
+        self.id_sequence = (self.id_sequence + 1) & 0xFFFF
+        return (int(moment.timestamp() * 1000) << 16) + self.id_sequence
+
+    def generate_posts(self, start_date: datetime, counts: List[int], scraped_at: str) -> Iterator[tuple]:
+        """按时间顺序逐行生成帖子（列顺序与批量导入的INSERT一致）"""
+        for day_index, count in enumerate(counts):
+            if not count:
+                continue
+            date = start_date + timedelta(days=day_index)
+
+            for naive_time in self.day_post_times(date, count):
+                moment_et = self.et_tz.localize(naive_time)
+                moment_utc = moment_et.astimezone(pytz.UTC)
+                post_id = self.next_post_id(moment_utc)
+                likes, reposts, comments = self.engagement(count)
+
+                yield (
+                    str(post_id),
+                    self.post_content(),
+                    moment_et.strftime("%Y-%m-%d"),
+                    moment_et.strftime("%H:%M:%S"),
+                    moment_utc.isoformat(),
+                    moment_et.isoformat(),
+                    likes,
+                    reposts,
+                    comments,
+                    self.media_urls(post_id),
+                    f"https://truthsocial.com/@realDonaldTrump/posts/{post_id}",
+                    scraped_at,
+                    int(moment_utc.timestamp())
+                )
+
+    def summary_content(self, stats: Dict) -> str:
+        """生成一篇结构与真实分析一致的Markdown小结"""
+        topics = self.rng.sample(list(TOPIC_PHRASES), k=3)
+        lines = [
+            f"## {stats['stat_date']} Trump Truth Social 动态深度分析",
+            "",
+            f"**核心观点**: 当天共发布{stats['post_count']}条帖子，重点围绕"
+            f"{'、'.join(self.rng.choice(TOPIC_PHRASES[topic]) for topic in topics)}展开。",
+            "",
+            "**主要内容**: "
+        ]
+        for topic in topics:
+            lines.append(f"- {self.sentence(topic)}")
+        lines += [
+            "",
+            f"**互动数据**: 获得{stats['total_likes']:,}个赞、{stats['total_reposts']:,}次转发、"
+            f"{stats['total_comments']:,}条评论。",
+            "",
+            "### 深度解读",
+            ' '.join(self.sentence(self.rng.choice(topics)) for _ in range(self.rng.randint(3, 8)))
+        ]
+        return '\n'.join(lines)
+
+    def load(self, total_posts: int, days: int, end_date: str = None,
+             summary_ratio: float = 0.9, batch_size: int = 20000, force: bool = False) -> Dict:
+        """生成并批量导入数据集，返回导入统计"""
+        if self.db_path == DATABASE_PATH and not force:
+            raise ValueError(f"拒绝向正式数据库 {DATABASE_PATH} 写入合成数据，请指定其他路径或使用force")
+
+        end = datetime.strptime(end_date or DEFAULT_END_DATE, "%Y-%m-%d")
+        start_date = end - timedelta(days=days - 1)
+        counts = self.day_post_counts(total_posts, days)
+        # 抓取和小结生成时间同样由最后一天推出（次日零点），不取当前时间
+        collected_at = self.et_tz.localize(end + timedelta(days=1)).isoformat()
+
+        # 执行迁移建好表结构
+        TrumpPostsDB(self.db_path)
+        conn = get_connection(self.db_path)
+        started = time.time()
+
+        # 导入期间不逐行维护汇总表和全文索引，也不等待fsync
+        schema_transaction(conn, [f'DROP TRIGGER IF EXISTS {name}' for name in LOAD_TRIGGERS])
+        conn.execute('PRAGMA synchronous = OFF')
+
+        inserted = 0
+        try:
+            batch = []
+            for row in self.generate_posts(start_date, counts, collected_at):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    inserted += self.insert_batch(conn, batch)
+                    batch = []
+                    print(f"\r📥 已导入 {inserted:,}/{total_posts:,} 条帖子", end="", flush=True)
+            inserted += self.insert_batch(conn, batch)
+            print(f"\r📥 已导入 {inserted:,}/{total_posts:,} 条帖子")
+        finally:
+            # 重新创建触发器并一次性重建派生数据
+            print("🔧 重建每日统计、互动快照和全文索引...")
+            create_daily_stats(conn)
+            create_engagement_snapshots(conn)
+            if create_fulltext_index(conn) is not False:
+                schema_transaction(conn, ["INSERT INTO trump_posts_fts(trump_posts_fts) VALUES ('rebuild')"])
+            conn.execute(f'PRAGMA synchronous = {SQLITE_SYNCHRONOUS}')
+
+        summaries = self.load_summaries(conn, summary_ratio, collected_at)
+        elapsed = time.time() - started
+
+        result = {
+            'db_path': self.db_path,
+            'seed': self.seed,
+            'posts': inserted,
+            'summaries': summaries,
+            'days': days,
+            'start_date': start_date.strftime("%Y-%m-%d"),
+            'end_date': (start_date + timedelta(days=days - 1)).strftime("%Y-%m-%d"),
+            'elapsed_seconds': round(elapsed, 2),
+            'posts_per_second': round(inserted / elapsed) if elapsed else inserted
+        }
+        logger.info(f"合成数据集生成完成: {result}")
+        return result
+
+    @staticmethod
+    def insert_batch(conn, rows: List[tuple]) -> int:
+        """一个事务写入一批帖子"""
+        if not rows:
+            return 0
+        with conn:
+            cursor = conn.executemany('''
+                INSERT OR IGNORE INTO trump_posts
+                (post_id, content, post_date, post_time, timestamp_utc,
+                 timestamp_et, likes_count, reposts_count, comments_count,
+                 media_urls, post_url, scraped_at, timestamp_epoch)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+        return cursor.rowcount
+
+    def load_summaries(self, conn, summary_ratio: float, generated_at: str) -> int:
+        """按比例为有帖子的日期生成小结（统计数据来自daily_stats）"""
+        rows = []
+
+        for stats in conn.execute('SELECT * FROM daily_stats ORDER BY stat_date'):
+            if self.rng.random() >= summary_ratio:
+                continue
+            content = self.summary_content(dict(stats))
+            rows.append((
+                stats['stat_date'], content, stats['post_count'], stats['total_likes'],
+                stats['total_reposts'], stats['total_comments'],
+                self.rng.choice(['Claude', 'Local_AI', 'AI']), generated_at, format_analysis(content)
+            ))
+
+        with conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO daily_summaries
+                (summary_date, summary_content, post_count, total_likes, total_reposts,
+                 total_comments, generated_by, generated_at, summary_html)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+        return len(rows)
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="生成用于性能测试的合成帖子数据集")
+    parser.add_argument('--posts', type=int, default=1_000_000, help='帖子总数 (默认: 1000000)')
+    parser.add_argument('--days', type=int, default=1500, help='覆盖的天数 (默认: 1500)')
+    parser.add_argument('--end-date', type=str, metavar='DATE', help=f'最后一天 (格式: YYYY-MM-DD，默认: {DEFAULT_END_DATE})')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子，相同种子生成相同数据 (默认: 42)')
+    parser.add_argument('--summary-ratio', type=float, default=0.9, help='有小结的日期比例 (默认: 0.9)')
+    parser.add_argument('--output', type=str, default=SYNTHETIC_DB_PATH, help=f'输出数据库 (默认: {SYNTHETIC_DB_PATH})')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    print("🧪 Trump Truth Social 合成数据集生成")
+    print("=" * 50)
+    print(f"📊 帖子: {args.posts:,}  📅 天数: {args.days}  🎲 种子: {args.seed}  💾 输出: {args.output}")
+
+    generator = SyntheticCorpusGenerator(db_path=args.output, seed=args.seed)
+    result = generator.load(args.posts, args.days, end_date=args.end_date, summary_ratio=args.summary_ratio)
+
+    print(f"✅ 导入 {result['posts']:,} 条帖子、{result['summaries']:,} 篇小结 "
+          f"({result['start_date']} ~ {result['end_date']})")
+    print(f"⏱️ 耗时 {result['elapsed_seconds']} 秒，{result['posts_per_second']:,} 条/秒")
+
+
+if __name__ == "__main__":
+    main()
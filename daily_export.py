@@ -11,14 +11,14 @@ from typing import List, Dict
 import pytz
 
 from database import TrumpPostsDB
-from config import TIMEZONE
+from config import TIMEZONE, DATABASE_PATH
 
 
 class DailyExporter:
     """每日帖子导出器"""
     
-    def __init__(self, export_dir: str = "daily_exports"):
-        self.db = TrumpPostsDB()
+    def __init__(self, export_dir: str = "daily_exports", db_path: str = DATABASE_PATH):
+        self.db = TrumpPostsDB(db_path)
         self.et_tz = pytz.timezone(TIMEZONE)
         self.export_dir = export_dir
         
@@ -190,9 +190,9 @@ class DailyExporter:
             if not posts:
                 continue
             
-            # 检查是否已有小结
+            # 检查是否已有小结（生成中断留下的草稿不算）
             summary = self.db.get_summary_by_date(current_date)
-            if not summary:
+            if not summary or summary.get('status') == 'draft':
                 pending_dates.append(current_date)
         
         return pending_dates
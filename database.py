@@ -1,121 +1,180 @@
+import re
 import sqlite3
 import logging
-from datetime import datetime
-from typing import List, Dict, Optional
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import List, Dict, Optional, Set, Iterable, Iterator, Tuple
 import pytz
 from config import DATABASE_PATH, TIMEZONE
+from db_connection import get_connection, configure_connection
+from analysis_formatter import format_analysis
+from db_migrations import run_migrations, get_schema_version, table_exists
 
 logger = logging.getLogger(__name__)
 
+# 写入帖子：已存在时原地更新，保留行id（FTS索引等依赖rowid）
+UPSERT_POST_SQL = '''
+    INSERT INTO trump_posts 
+    (post_id, content, post_date, post_time, timestamp_utc, 
+     timestamp_et, likes_count, reposts_count, comments_count, 
+     media_urls, post_url, scraped_at, timestamp_epoch)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(post_id) DO UPDATE SET
+        content = excluded.content,
+        post_date = excluded.post_date,
+        post_time = excluded.post_time,
+        timestamp_utc = excluded.timestamp_utc,
+        timestamp_et = excluded.timestamp_et,
+        likes_count = excluded.likes_count,
+        reposts_count = excluded.reposts_count,
+        comments_count = excluded.comments_count,
+        media_urls = excluded.media_urls,
+        post_url = excluded.post_url,
+        scraped_at = excluded.scraped_at,
+        timestamp_epoch = excluded.timestamp_epoch
+'''
+
+# 追加互动数据快照（帖子不在库中时跳过）
+INSERT_SNAPSHOT_SQL = '''
+    INSERT INTO post_engagement_snapshots 
+    (post_id, captured_at, likes_count, reposts_count, comments_count)
+    SELECT ?, ?, ?, ?, ?
+    WHERE EXISTS (SELECT 1 FROM trump_posts WHERE post_id = ?)
+'''
+
+
+# 批量写入小结：已存在时原地更新，replace_others为False时只覆盖同一生成方的小结
+UPSERT_SUMMARY_SQL = '''
+    INSERT INTO daily_summaries
+    (summary_date, summary_content, post_count, total_likes, total_reposts,
+     total_comments, generated_by, generated_at, summary_html)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(summary_date) DO UPDATE SET
+        summary_content = excluded.summary_content,
+        post_count = excluded.post_count,
+        total_likes = excluded.total_likes,
+        total_reposts = excluded.total_reposts,
+        total_comments = excluded.total_comments,
+        generated_by = excluded.generated_by,
+        generated_at = excluded.generated_at,
+        summary_html = excluded.summary_html,
+        status = 'final',
+        draft_key = NULL
+'''
+
+# 写入流式生成中的草稿：只覆盖草稿，不覆盖已完成的小结（重新生成时网页继续显示旧小结）
+UPSERT_DRAFT_SQL = '''
+    INSERT INTO daily_summaries
+    (summary_date, summary_content, post_count, total_likes, total_reposts,
+     total_comments, generated_by, generated_at, summary_html, status, draft_key)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'draft', ?)
+    ON CONFLICT(summary_date) DO UPDATE SET
+        summary_content = excluded.summary_content,
+        post_count = excluded.post_count,
+        total_likes = excluded.total_likes,
+        total_reposts = excluded.total_reposts,
+        total_comments = excluded.total_comments,
+        generated_by = excluded.generated_by,
+        generated_at = excluded.generated_at,
+        summary_html = excluded.summary_html,
+        draft_key = excluded.draft_key
+    WHERE daily_summaries.status = 'draft'
+'''
 
 class TrumpPostsDB:
     """Trump帖子数据库管理类"""
     
-    def __init__(self, db_path: str = DATABASE_PATH):
+    def __init__(self, db_path: str = DATABASE_PATH, migrate: bool = True):
         self.db_path = db_path
-        self.init_database()
+        self.init_database(migrate)
     
-    def init_database(self):
-        """初始化数据库表结构"""
+    def init_database(self, migrate: bool = True):
+        """
+        初始化数据库：按版本执行尚未应用的结构迁移（见db_migrations.py）。
+        只读的调用方（如网站）传入migrate=False，结构升级留给写入进程
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # 创建帖子表
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS trump_posts (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        post_id TEXT UNIQUE NOT NULL,
-                        content TEXT NOT NULL,
-                        post_date TEXT NOT NULL,
-                        post_time TEXT NOT NULL,
-                        timestamp_utc TEXT NOT NULL,
-                        timestamp_et TEXT NOT NULL,
-                        likes_count INTEGER DEFAULT 0,
-                        reposts_count INTEGER DEFAULT 0,
-                        comments_count INTEGER DEFAULT 0,
-                        media_urls TEXT,
-                        post_url TEXT,
-                        scraped_at TEXT NOT NULL,
-                        created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                # 创建每日小结表
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS daily_summaries (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        summary_date TEXT UNIQUE NOT NULL,
-                        summary_content TEXT NOT NULL,
-                        post_count INTEGER DEFAULT 0,
-                        total_likes INTEGER DEFAULT 0,
-                        total_reposts INTEGER DEFAULT 0,
-                        total_comments INTEGER DEFAULT 0,
-                        generated_by TEXT DEFAULT 'AI',
-                        generated_at TEXT NOT NULL,
-                        created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                # 创建帖子表索引
-                cursor.execute('''
-                    CREATE INDEX IF NOT EXISTS idx_post_date 
-                    ON trump_posts(post_date)
-                ''')
-                
-                cursor.execute('''
-                    CREATE INDEX IF NOT EXISTS idx_post_id 
-                    ON trump_posts(post_id)
-                ''')
-                
-                cursor.execute('''
-                    CREATE INDEX IF NOT EXISTS idx_scraped_at 
-                    ON trump_posts(scraped_at)
-                ''')
-                
-                # 创建小结表索引
-                cursor.execute('''
-                    CREATE INDEX IF NOT EXISTS idx_summary_date 
-                    ON daily_summaries(summary_date)
-                ''')
-                
-                conn.commit()
-                logger.info("数据库初始化成功")
-                
+            conn = get_connection(self.db_path)
+            if migrate:
+                version = run_migrations(conn)
+            else:
+                version = get_schema_version(conn) if table_exists(conn, 'schema_version') else 0
+            self.fts_enabled = table_exists(conn, 'trump_posts_fts')
+            logger.info(f"数据库初始化成功，结构版本: {version}")
+            
         except sqlite3.Error as e:
             logger.error(f"数据库初始化失败: {e}")
             raise
     
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """把用户输入转换成安全的FTS5查询：每个词加引号，结尾的*保留为前缀匹配"""
+        terms = []
+        for match in re.finditer(r'(\w+)(\*?)', query):
+            word, prefix = match.groups()
+            terms.append(f'"{word}"{prefix}')
+        return ' '.join(terms)
+    
+    @staticmethod
+    def _timestamp_epoch(post_data: Dict) -> Optional[int]:
+        """帖子的UTC秒级时间戳，未提供时从timestamp_utc解析"""
+        if post_data.get('timestamp_epoch') is not None:
+            return int(post_data['timestamp_epoch'])
+        
+        timestamp_utc = post_data.get('timestamp_utc')
+        if not timestamp_utc:
+            return None
+        try:
+            parsed = datetime.fromisoformat(str(timestamp_utc).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+        if parsed.tzinfo is None:
+            parsed = pytz.UTC.localize(parsed)
+        return int(parsed.timestamp())
+    
+    @staticmethod
+    def _post_row(post_data: Dict, scraped_at: str) -> tuple:
+        """将帖子字典转换为trump_posts表的一行"""
+        return (
+            post_data.get('post_id'),
+            post_data.get('content'),
+            post_data.get('post_date'),
+            post_data.get('post_time'),
+            post_data.get('timestamp_utc'),
+            post_data.get('timestamp_et'),
+            post_data.get('likes_count', 0),
+            post_data.get('reposts_count', 0),
+            post_data.get('comments_count', 0),
+            post_data.get('media_urls'),
+            post_data.get('post_url'),
+            scraped_at,
+            TrumpPostsDB._timestamp_epoch(post_data)
+        )
+    
+    @staticmethod
+    def _snapshot_row(post_data: Dict, captured_at: str) -> tuple:
+        """将帖子字典转换为post_engagement_snapshots表的一行"""
+        return (
+            post_data.get('post_id'),
+            captured_at,
+            post_data.get('likes_count', 0),
+            post_data.get('reposts_count', 0),
+            post_data.get('comments_count', 0),
+            post_data.get('post_id')
+        )
+    
     def insert_post(self, post_data: Dict) -> bool:
         """插入新帖子数据"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 
                 # 转换时间戳
                 et_tz = pytz.timezone(TIMEZONE)
                 scraped_at = datetime.now(et_tz).isoformat()
                 
-                cursor.execute('''
-                    INSERT OR REPLACE INTO trump_posts 
-                    (post_id, content, post_date, post_time, timestamp_utc, 
-                     timestamp_et, likes_count, reposts_count, comments_count, 
-                     media_urls, post_url, scraped_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    post_data.get('post_id'),
-                    post_data.get('content'),
-                    post_data.get('post_date'),
-                    post_data.get('post_time'),
-                    post_data.get('timestamp_utc'),
-                    post_data.get('timestamp_et'),
-                    post_data.get('likes_count', 0),
-                    post_data.get('reposts_count', 0),
-                    post_data.get('comments_count', 0),
-                    post_data.get('media_urls'),
-                    post_data.get('post_url'),
-                    scraped_at
-                ))
+                cursor.execute(UPSERT_POST_SQL, self._post_row(post_data, scraped_at))
+                cursor.execute(INSERT_SNAPSHOT_SQL, self._snapshot_row(post_data, scraped_at))
                 
                 conn.commit()
                 logger.info(f"成功插入帖子: {post_data.get('post_id')}")
@@ -125,20 +184,80 @@ class TrumpPostsDB:
             logger.error(f"插入帖子失败: {e}")
             return False
     
+    def bulk_upsert_posts(self, posts: List[Dict]) -> bool:
+        """在一个事务中批量写入帖子（已存在的帖子更新内容和互动数据）"""
+        if not posts:
+            return True
+        
+        try:
+            with get_connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                
+                et_tz = pytz.timezone(TIMEZONE)
+                scraped_at = datetime.now(et_tz).isoformat()
+                
+                cursor.executemany(UPSERT_POST_SQL, [self._post_row(post_data, scraped_at) for post_data in posts])
+                cursor.executemany(INSERT_SNAPSHOT_SQL, [self._snapshot_row(post_data, scraped_at) for post_data in posts])
+                
+                conn.commit()
+                logger.info(f"成功批量写入 {len(posts)} 个帖子")
+                return True
+                
+        except sqlite3.Error as e:
+            logger.error(f"批量写入帖子失败: {e}")
+            return False
+    
+    def update_engagement(self, posts: List[Dict]) -> int:
+        """刷新已存储帖子的互动计数并追加快照，返回更新的帖子数（库中没有的帖子忽略）"""
+        if not posts:
+            return 0
+        
+        try:
+            with get_connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                
+                et_tz = pytz.timezone(TIMEZONE)
+                captured_at = datetime.now(et_tz).isoformat()
+                
+                cursor.executemany('''
+                    UPDATE trump_posts 
+                    SET likes_count = ?, reposts_count = ?, comments_count = ?
+                    WHERE post_id = ?
+                ''', [
+                    (post_data.get('likes_count', 0), post_data.get('reposts_count', 0),
+                     post_data.get('comments_count', 0), post_data.get('post_id'))
+                    for post_data in posts
+                ])
+                updated = cursor.rowcount
+                
+                cursor.executemany(INSERT_SNAPSHOT_SQL, [self._snapshot_row(post_data, captured_at) for post_data in posts])
+                
+                conn.commit()
+                logger.info(f"成功刷新 {updated} 个帖子的互动数据")
+                return updated
+                
+        except sqlite3.Error as e:
+            logger.error(f"刷新互动数据失败: {e}")
+            return 0
+    
     def insert_daily_summary(self, summary_data: Dict) -> bool:
         """插入每日小结数据"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 
                 et_tz = pytz.timezone(TIMEZONE)
                 generated_at = datetime.now(et_tz).isoformat()
                 
+                # 预先渲染网页使用的HTML，网页端直接读取
+                summary_html = format_analysis(summary_data.get('summary_content'))
+                
                 cursor.execute('''
                     INSERT OR REPLACE INTO daily_summaries 
                     (summary_date, summary_content, post_count, total_likes,
-                     total_reposts, total_comments, generated_by, generated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                     total_reposts, total_comments, generated_by, generated_at,
+                     summary_html)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (
                     summary_data.get('summary_date'),
                     summary_data.get('summary_content'),
@@ -147,7 +266,8 @@ class TrumpPostsDB:
                     summary_data.get('total_reposts', 0),
                     summary_data.get('total_comments', 0),
                     summary_data.get('generated_by', 'AI'),
-                    generated_at
+                    generated_at,
+                    summary_html
                 ))
                 
                 conn.commit()
@@ -158,17 +278,99 @@ class TrumpPostsDB:
             logger.error(f"插入小结失败: {e}")
             return False
     
+    def save_summary_draft(self, summary_data: Dict, draft_key: str) -> bool:
+        """保存流式生成中的部分小结（status为draft），完成后由insert_daily_summary覆盖为正式小结"""
+        try:
+            with get_connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                
+                generated_at = datetime.now(pytz.timezone(TIMEZONE)).isoformat()
+                cursor.execute(UPSERT_DRAFT_SQL, (
+                    summary_data.get('summary_date'),
+                    summary_data.get('summary_content'),
+                    summary_data.get('post_count', 0),
+                    summary_data.get('total_likes', 0),
+                    summary_data.get('total_reposts', 0),
+                    summary_data.get('total_comments', 0),
+                    summary_data.get('generated_by', 'AI'),
+                    generated_at,
+                    format_analysis(summary_data.get('summary_content')),
+                    draft_key
+                ))
+                
+                conn.commit()
+                return cursor.rowcount > 0
+                
+        except sqlite3.Error as e:
+            logger.error(f"保存小结草稿失败: {e}")
+            return False
+    
+    def get_summary_draft(self, date: str) -> Optional[Dict]:
+        """获取指定日期未完成的小结草稿"""
+        try:
+            with get_connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT summary_content, draft_key, generated_by, generated_at
+                    FROM daily_summaries
+                    WHERE summary_date = ? AND status = 'draft'
+                ''', (date,))
+                
+                result = cursor.fetchone()
+                return dict(result) if result else None
+                
+        except sqlite3.Error as e:
+            logger.error(f"查询小结草稿失败: {e}")
+            return None
+    
+    def bulk_upsert_summaries(self, summaries: List[Dict], replace_others: bool = False) -> int:
+        """
+        在一个事务中批量写入小结（summary_html需预先渲染），返回实际写入的行数。
+        replace_others为False时，已存在的其他生成方（如Claude）的小结保持不变
+        """
+        if not summaries:
+            return 0
+        
+        sql = UPSERT_SUMMARY_SQL
+        if not replace_others:
+            sql += ' WHERE daily_summaries.generated_by = excluded.generated_by'
+        
+        try:
+            with get_connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                
+                generated_at = datetime.now(pytz.timezone(TIMEZONE)).isoformat()
+                cursor.executemany(sql, [(
+                    summary_data.get('summary_date'),
+                    summary_data.get('summary_content'),
+                    summary_data.get('post_count', 0),
+                    summary_data.get('total_likes', 0),
+                    summary_data.get('total_reposts', 0),
+                    summary_data.get('total_comments', 0),
+                    summary_data.get('generated_by', 'AI'),
+                    summary_data.get('generated_at', generated_at),
+                    summary_data.get('summary_html')
+                ) for summary_data in summaries])
+                
+                conn.commit()
+                logger.info(f"成功批量写入 {cursor.rowcount} 篇小结")
+                return cursor.rowcount
+                
+        except sqlite3.Error as e:
+            logger.error(f"批量写入小结失败: {e}")
+            return 0
+    
     def get_posts_by_date(self, date: str) -> List[Dict]:
         """按日期获取帖子"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
                     SELECT * FROM trump_posts 
                     WHERE post_date = ? 
-                    ORDER BY timestamp_et DESC
+                    ORDER BY timestamp_epoch DESC, post_id DESC
                 ''', (date,))
                 
                 return [dict(row) for row in cursor.fetchall()]
@@ -177,11 +379,58 @@ class TrumpPostsDB:
             logger.error(f"查询帖子失败: {e}")
             return []
     
+    def get_posts_in_range(self, date_from: str, date_to: str) -> List[Dict]:
+        """获取日期范围内（含两端）的帖子，按发布时间升序"""
+        try:
+            with get_connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT * FROM trump_posts 
+                    WHERE post_date BETWEEN ? AND ? 
+                    ORDER BY post_date, timestamp_epoch
+                ''', (date_from, date_to))
+                
+                return [dict(row) for row in cursor.fetchall()]
+                
+        except sqlite3.Error as e:
+            logger.error(f"按日期范围查询帖子失败: {e}")
+            return []
+    
+    def iter_posts_by_day(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                          fetch_size: int = 2000) -> Iterator[Tuple[str, List[Dict]]]:
+        """
+        用一个按日期排序的游标流式读取日期范围内的帖子，逐日返回 (日期, 当日帖子)。
+        当日帖子的顺序与get_posts_by_date一致；使用独立连接，迭代期间可以正常写入
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            configure_connection(conn)
+            cursor = conn.execute('''
+                SELECT * FROM trump_posts 
+                WHERE post_date BETWEEN ? AND ? 
+                ORDER BY post_date, timestamp_epoch DESC, post_id DESC
+            ''', (date_from or '0000-00-00', date_to or '9999-99-99'))
+            
+            def rows():
+                while True:
+                    batch = cursor.fetchmany(fetch_size)
+                    if not batch:
+                        return
+                    yield from batch
+            
+            for date, day_rows in groupby(rows(), key=lambda row: row['post_date']):
+                yield date, [dict(row) for row in day_rows]
+                
+        except sqlite3.Error as e:
+            logger.error(f"流式读取帖子失败: {e}")
+        finally:
+            conn.close()
+    
     def get_summary_by_date(self, date: str) -> Optional[Dict]:
         """按日期获取小结"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -197,14 +446,14 @@ class TrumpPostsDB:
             return None
     
     def get_recent_summaries(self, days: int = 7) -> List[Dict]:
-        """获取最近几天的小结"""
+        """获取最近几天的小结（不含生成中的草稿）"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
                     SELECT * FROM daily_summaries 
+                    WHERE status = 'final'
                     ORDER BY summary_date DESC 
                     LIMIT ?
                 ''', (days,))
@@ -215,14 +464,113 @@ class TrumpPostsDB:
             logger.error(f"查询最近小结失败: {e}")
             return []
     
+    def get_summary_index(self) -> List[Dict]:
+        """获取所有小结的日期和生成信息（不含正文）"""
+        try:
+            with get_connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT summary_date, post_count, generated_by, generated_at, status
+                    FROM daily_summaries 
+                    ORDER BY summary_date DESC
+                ''')
+                
+                return [dict(row) for row in cursor.fetchall()]
+                
+        except sqlite3.Error as e:
+            logger.error(f"查询小结索引失败: {e}")
+            return []
+    
+    def get_daily_post_stats(self) -> List[Dict]:
+        """按日期汇总帖子数量、互动数据和最后抓取时间（读取daily_stats汇总表）"""
+        try:
+            with get_connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT stat_date AS post_date, post_count, total_likes, 
+                           total_reposts, total_comments, last_scraped_at
+                    FROM daily_stats 
+                    ORDER BY stat_date DESC
+                ''')
+                
+                return [dict(row) for row in cursor.fetchall()]
+                
+        except sqlite3.Error as e:
+            logger.error(f"查询每日帖子统计失败: {e}")
+            return []
+    
+    def get_daily_stats(self, date: str) -> Dict:
+        """获取指定日期的帖子数量和互动总数，没有帖子时全部为0"""
+        stats = {'post_count': 0, 'total_likes': 0, 'total_reposts': 0, 'total_comments': 0}
+        
+        try:
+            with get_connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT post_count, total_likes, total_reposts, total_comments
+                    FROM daily_stats 
+                    WHERE stat_date = ?
+                ''', (date,))
+                
+                row = cursor.fetchone()
+                if row:
+                    stats.update(dict(row))
+                return stats
+                
+        except sqlite3.Error as e:
+            logger.error(f"查询每日统计失败: {e}")
+            return stats
+    
+    def get_daily_stats_range(self, date_from: Optional[str] = None,
+                              date_to: Optional[str] = None) -> Dict[str, Dict]:
+        """一次读取日期范围内每天的统计，返回 日期 -> 统计"""
+        try:
+            with get_connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT stat_date, post_count, total_likes, total_reposts, total_comments
+                    FROM daily_stats 
+                    WHERE stat_date BETWEEN ? AND ?
+                ''', (date_from or '0000-00-00', date_to or '9999-99-99'))
+                
+                return {row['stat_date']: {key: row[key] for key in row.keys() if key != 'stat_date'}
+                        for row in cursor.fetchall()}
+                
+        except sqlite3.Error as e:
+            logger.error(f"按日期范围查询每日统计失败: {e}")
+            return {}
+    
+    def get_recent_daily_stats(self, days: int = 7) -> List[Dict]:
+        """获取最近N个有帖子的日期的统计"""
+        try:
+            with get_connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT stat_date AS date, post_count, total_likes, total_reposts, total_comments
+                    FROM daily_stats 
+                    ORDER BY stat_date DESC 
+                    LIMIT ?
+                ''', (days,))
+                
+                return [dict(row) for row in cursor.fetchall()]
+                
+        except sqlite3.Error as e:
+            logger.error(f"查询最近每日统计失败: {e}")
+            return []
+    
     def summary_exists(self, date: str) -> bool:
-        """检查小结是否已存在"""
+        """检查小结是否已存在（未完成的草稿不算）"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
-                    SELECT 1 FROM daily_summaries WHERE summary_date = ?
+                    SELECT 1 FROM daily_summaries WHERE summary_date = ? AND status = 'final'
                 ''', (date,))
                 
                 return cursor.fetchone() is not None
@@ -234,12 +582,12 @@ class TrumpPostsDB:
     def get_latest_post_id(self) -> Optional[str]:
         """获取最新帖子ID"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
                     SELECT post_id FROM trump_posts 
-                    ORDER BY timestamp_et DESC 
+                    ORDER BY timestamp_epoch DESC 
                     LIMIT 1
                 ''')
                 
@@ -253,7 +601,7 @@ class TrumpPostsDB:
     def get_posts_count(self) -> int:
         """获取帖子总数"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('SELECT COUNT(*) FROM trump_posts')
@@ -265,12 +613,12 @@ class TrumpPostsDB:
             return 0
     
     def get_summaries_count(self) -> int:
-        """获取小结总数"""
+        """获取小结总数（不含生成中的草稿）"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 
-                cursor.execute('SELECT COUNT(*) FROM daily_summaries')
+                cursor.execute("SELECT COUNT(*) FROM daily_summaries WHERE status = 'final'")
                 result = cursor.fetchone()
                 return result[0] if result else 0
                 
@@ -281,7 +629,7 @@ class TrumpPostsDB:
     def post_exists(self, post_id: str) -> bool:
         """检查帖子是否已存在"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with get_connection(self.db_path) as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -292,4 +640,153 @@ class TrumpPostsDB:
                 
         except sqlite3.Error as e:
             logger.error(f"检查帖子存在性失败: {e}")
-            return False 
\ No newline at end of file
+            return False
+    
+    def existing_post_ids(self, post_ids: Iterable[str]) -> Set[str]:
+        """批量检查帖子是否已存在，返回其中已存储的帖子ID"""
+        post_ids = list({post_id for post_id in post_ids if post_id})
+        existing = set()
+        
+        try:
+            with get_connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                
+                # 分块查询，避免超过SQLite的变量数量限制
+                for start in range(0, len(post_ids), 500):
+                    chunk = post_ids[start:start + 500]
+                    placeholders = ','.join('?' * len(chunk))
+                    cursor.execute(f'''
+                        SELECT post_id FROM trump_posts WHERE post_id IN ({placeholders})
+                    ''', chunk)
+                    existing.update(row[0] for row in cursor.fetchall())
+                
+                return existing
+                
+        except sqlite3.Error as e:
+            logger.error(f"批量检查帖子存在性失败: {e}")
+            return set()
+    
+    def search_posts(self, query: str, date_from: Optional[str] = None,
+                     date_to: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """全文搜索帖子，按BM25相关度排序并返回命中片段"""
+        match_query = self._fts_query(query or '')
+        if not match_query:
+            return []
+        
+        filters = []
+        params = []
+        if date_from:
+            filters.append('p.post_date >= ?')
+            params.append(date_from)
+        if date_to:
+            filters.append('p.post_date <= ?')
+            params.append(date_to)
+        date_filter = ''.join(f' AND {condition}' for condition in filters)
+        
+        try:
+            with get_connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                
+                if getattr(self, 'fts_enabled', False):
+                    cursor.execute(f'''
+                        SELECT p.post_id, p.post_date, p.post_time, p.timestamp_et, p.post_url,
+                               p.likes_count, p.reposts_count, p.comments_count,
+                               snippet(trump_posts_fts, 0, '**', '**', '…', 12) AS snippet,
+                               bm25(trump_posts_fts) AS rank
+                        FROM trump_posts_fts
+                        JOIN trump_posts p ON p.id = trump_posts_fts.rowid
+                        WHERE trump_posts_fts MATCH ?{date_filter}
+                        ORDER BY rank
+                        LIMIT ?
+                    ''', [match_query] + params + [limit])
+                else:
+                    # 不支持FTS5时退化为LIKE扫描，所有词都需出现
+                    words = [term.strip('"*') for term in match_query.split()]
+                    like_filter = ''.join(' AND p.content LIKE ?' for _ in words)
+                    cursor.execute(f'''
+                        SELECT p.post_id, p.post_date, p.post_time, p.timestamp_et, p.post_url,
+                               p.likes_count, p.reposts_count, p.comments_count,
+                               substr(p.content, 1, 200) AS snippet,
+                               0 AS rank
+                        FROM trump_posts p
+                        WHERE 1 = 1{like_filter}{date_filter}
+                        ORDER BY p.timestamp_epoch DESC
+                        LIMIT ?
+                    ''', [f'%{word}%' for word in words] + params + [limit])
+                
+                return [dict(row) for row in cursor.fetchall()]
+                
+        except sqlite3.Error as e:
+            logger.error(f"搜索帖子失败: {e}")
+            return []
+    
+    def get_engagement_history(self, post_id: str) -> List[Dict]:
+        """获取单个帖子的互动数据时间序列"""
+        try:
+            with get_connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT captured_at, likes_count, reposts_count, comments_count
+                    FROM post_engagement_snapshots 
+                    WHERE post_id = ?
+                    ORDER BY captured_at
+                ''', (post_id,))
+                
+                return [dict(row) for row in cursor.fetchall()]
+                
+        except sqlite3.Error as e:
+            logger.error(f"获取互动数据历史失败: {e}")
+            return []
+    
+    def get_engagement_velocity(self, hours: int = 24, limit: int = 20,
+                                post_id: Optional[str] = None) -> List[Dict]:
+        """计算最近N小时内每个帖子的互动增速（每小时新增点赞/转发/评论），按点赞增速降序"""
+        et_tz = pytz.timezone(TIMEZONE)
+        since = (datetime.now(et_tz) - timedelta(hours=hours)).isoformat()
+        
+        post_filter = 'AND post_id = ?' if post_id else ''
+        params = [since, post_id] if post_id else [since]
+        
+        try:
+            with get_connection(self.db_path) as conn:
+                cursor = conn.cursor()
+                
+                # 取时间窗口内每个帖子的第一个和最后一个快照
+                cursor.execute(f'''
+                    WITH window_snapshots AS (
+                        SELECT post_id, captured_at, likes_count, reposts_count, comments_count,
+                               ROW_NUMBER() OVER (PARTITION BY post_id ORDER BY captured_at) AS first_rank,
+                               ROW_NUMBER() OVER (PARTITION BY post_id ORDER BY captured_at DESC) AS last_rank
+                        FROM post_engagement_snapshots 
+                        WHERE captured_at >= ? {post_filter}
+                    ),
+                    spans AS (
+                        SELECT first.post_id,
+                               first.captured_at AS first_captured_at,
+                               last.captured_at AS last_captured_at,
+                               (julianday(last.captured_at) - julianday(first.captured_at)) * 24 AS span_hours,
+                               last.likes_count - first.likes_count AS likes_gained,
+                               last.reposts_count - first.reposts_count AS reposts_gained,
+                               last.comments_count - first.comments_count AS comments_gained,
+                               last.likes_count, last.reposts_count, last.comments_count
+                        FROM window_snapshots first
+                        JOIN window_snapshots last 
+                          ON last.post_id = first.post_id AND last.last_rank = 1
+                        WHERE first.first_rank = 1
+                    )
+                    SELECT spans.*,
+                           likes_gained / span_hours AS likes_per_hour,
+                           reposts_gained / span_hours AS reposts_per_hour,
+                           comments_gained / span_hours AS comments_per_hour
+                    FROM spans 
+                    WHERE span_hours > 0
+                    ORDER BY likes_per_hour DESC
+                    LIMIT ?
+                ''', params + [limit])
+                
+                return [dict(row) for row in cursor.fetchall()]
+                
+        except sqlite3.Error as e:
+            logger.error(f"计算互动增速失败: {e}")
+            return []
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+SQLite连接管理
+每个线程复用一个长连接，统一开启WAL并设置PRAGMA，
+让网站的读请求与爬虫的写入互不阻塞
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from typing import Dict
+
+from config import (
+    SQLITE_BUSY_TIMEOUT_MS, SQLITE_SYNCHRONOUS, SQLITE_CACHE_SIZE_KB, SQLITE_MMAP_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def configure_connection(conn: sqlite3.Connection):
+    """为新连接设置WAL和性能相关的PRAGMA"""
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {int(SQLITE_BUSY_TIMEOUT_MS)}")
+
+    try:
+        # WAL模式写在数据库文件里，只读文件系统上会失败，此时沿用原模式
+        conn.execute("PRAGMA journal_mode = WAL")
+    except sqlite3.Error as e:
+        logger.warning(f"无法启用WAL模式: {e}")
+
+    conn.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA cache_size = -{int(SQLITE_CACHE_SIZE_KB)}")
+    conn.execute(f"PRAGMA mmap_size = {int(SQLITE_MMAP_SIZE)}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
+
+def _thread_connections() -> Dict[str, sqlite3.Connection]:
+    """当前线程的连接表（fork后的子进程不复用父进程的连接）"""
+    if getattr(_local, 'pid', None) != os.getpid():
+        _local.pid = os.getpid()
+        _local.connections = {}
+    return _local.connections
+
+
+def get_connection(db_path: str) -> sqlite3.Connection:
+    """获取当前线程的数据库长连接
+
+    可以像sqlite3.connect一样用作上下文管理器（成功提交、异常回滚），
+    但退出时不会关闭连接，请勿手动close。
+    """
+    connections = _thread_connections()
+    key = os.path.abspath(db_path)
+
+    conn = connections.get(key)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+        configure_connection(conn)
+        connections[key] = conn
+
+    return conn
+
+
+def close_connections():
+    """关闭当前线程持有的所有连接"""
+    connections = _thread_connections()
+    for conn in connections.values():
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"关闭数据库连接失败: {e}")
+    connections.clear()
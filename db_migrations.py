@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+数据库结构版本迁移
+schema_version表记录已应用的版本，启动时按顺序执行尚未应用的迁移；
+每个迁移都可重复执行，大表回填按rowid分块提交，可以在运行中的数据库上进行
+"""
+
+import time
+import sqlite3
+import logging
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+import pytz
+
+from config import TIMEZONE, MIGRATION_BACKFILL_CHUNK, MIGRATION_BACKFILL_PAUSE
+from analysis_formatter import format_analysis
+
+logger = logging.getLogger(__name__)
+
+# (版本号, 说明, 迁移函数)，迁移函数返回False表示本次未能应用，下次启动时重试
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], Optional[bool]]]] = []
+
+
+def migration(version: int, description: str):
+    """注册一个迁移步骤"""
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return func
+    return register
+
+
+def schema_transaction(conn: sqlite3.Connection, statements: List[str]):
+    """在一个写事务中执行一组结构变更语句"""
+    conn.commit()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        for statement in statements:
+            conn.execute(statement)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+
+def column_exists(conn: sqlite3.Connection, table: str, column: str) -> bool:
+    """检查表中是否已有某列"""
+    return any(row[1] == column for row in conn.execute(f'PRAGMA table_info({table})'))
+
+
+def add_columns(conn: sqlite3.Connection, table: str, columns: List[Tuple[str, str]]):
+    """在写事务中为表增加尚不存在的列（列名, 定义）
+
+    先取得写锁再检查列是否存在，多个进程同时启动迁移时不会重复增加同一列。
+    """
+    conn.commit()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        for column, definition in columns:
+            if not column_exists(conn, table, column):
+                conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+
+def table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    """检查表（含虚拟表）是否存在"""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone()
+    return row is not None
+
+
+def backfill_in_chunks(conn: sqlite3.Connection, table: str,
+                       apply_chunk: Callable[[sqlite3.Cursor, int, int], int],
+                       chunk_size: int = MIGRATION_BACKFILL_CHUNK,
+                       pause: float = MIGRATION_BACKFILL_PAUSE) -> int:
+    """按rowid区间分块回填，每块单独提交并短暂让出写锁，返回更新的行数
+
+    apply_chunk(cursor, low, high) 处理 low < rowid <= high 的行，
+    只应更新仍待回填的行，这样中断后重新执行会从剩余部分继续。
+    """
+    max_rowid = conn.execute(f'SELECT MAX(rowid) FROM {table}').fetchone()[0] or 0
+    updated = 0
+
+    for low in range(0, max_rowid, chunk_size):
+        with conn:
+            updated += apply_chunk(conn.cursor(), low, low + chunk_size)
+        if pause:
+            time.sleep(pause)
+
+    return updated
+
+
+def sql_backfill(table: str, set_clause: str, pending_condition: str):
+    """生成用一条UPDATE回填一个rowid区间的处理函数"""
+    def apply_chunk(cursor: sqlite3.Cursor, low: int, high: int) -> int:
+        cursor.execute(f'''
+            UPDATE {table} SET {set_clause}
+            WHERE rowid > ? AND rowid <= ? AND ({pending_condition})
+        ''', (low, high))
+        return cursor.rowcount
+    return apply_chunk
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """当前已应用的最高版本号"""
+    return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+
+def run_migrations(conn: sqlite3.Connection) -> int:
+    """执行所有尚未应用的迁移，返回迁移后的版本号"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    ''')
+    conn.commit()
+
+    applied = {row[0] for row in conn.execute('SELECT version FROM schema_version')}
+
+    for version, description, apply in MIGRATIONS:
+        if version in applied:
+            continue
+
+        logger.info(f"执行数据库迁移 {version}: {description}")
+        started = time.time()
+
+        if apply(conn) is False:
+            logger.warning(f"数据库迁移 {version} 未应用，下次启动时重试")
+            continue
+
+        applied_at = datetime.now(pytz.timezone(TIMEZONE)).isoformat()
+        with conn:
+            conn.execute(
+                'INSERT OR IGNORE INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)',
+                (version, description, applied_at)
+            )
+        logger.info(f"数据库迁移 {version} 完成，耗时 {time.time() - started:.2f} 秒")
+
+    return get_schema_version(conn)
+
+
+@migration(1, '创建帖子表和每日小结表')
+def create_base_tables(conn: sqlite3.Connection):
+    schema_transaction(conn, [
+        '''
+        CREATE TABLE IF NOT EXISTS trump_posts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            post_id TEXT UNIQUE NOT NULL,
+            content TEXT NOT NULL,
+            post_date TEXT NOT NULL,
+            post_time TEXT NOT NULL,
+            timestamp_utc TEXT NOT NULL,
+            timestamp_et TEXT NOT NULL,
+            likes_count INTEGER DEFAULT 0,
+            reposts_count INTEGER DEFAULT 0,
+            comments_count INTEGER DEFAULT 0,
+            media_urls TEXT,
+            post_url TEXT,
+            scraped_at TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS daily_summaries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            summary_date TEXT UNIQUE NOT NULL,
+            summary_content TEXT NOT NULL,
+            post_count INTEGER DEFAULT 0,
+            total_likes INTEGER DEFAULT 0,
+            total_reposts INTEGER DEFAULT 0,
+            total_comments INTEGER DEFAULT 0,
+            generated_by TEXT DEFAULT 'AI',
+            generated_at TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_post_id ON trump_posts(post_id)',
+        'CREATE INDEX IF NOT EXISTS idx_scraped_at ON trump_posts(scraped_at)',
+        'CREATE INDEX IF NOT EXISTS idx_summary_date ON daily_summaries(summary_date)'
+    ])
+
+
+@migration(2, '小结表增加预渲染HTML列')
+def add_summary_html(conn: sqlite3.Connection):
+    add_columns(conn, 'daily_summaries', [('summary_html', 'TEXT')])
+
+    def render_chunk(cursor: sqlite3.Cursor, low: int, high: int) -> int:
+        cursor.execute('''
+            SELECT id, summary_content FROM daily_summaries
+            WHERE rowid > ? AND rowid <= ? AND summary_html IS NULL
+        ''', (low, high))
+        rows = [(format_analysis(content), row_id) for row_id, content in cursor.fetchall()]
+        cursor.executemany('UPDATE daily_summaries SET summary_html = ? WHERE id = ?', rows)
+        return len(rows)
+
+    backfill_in_chunks(conn, 'daily_summaries', render_chunk)
+
+
+@migration(3, '创建互动数据快照表')
+def create_engagement_snapshots(conn: sqlite3.Connection):
+    schema_transaction(conn, [
+        '''
+        CREATE TABLE IF NOT EXISTS post_engagement_snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            post_id TEXT NOT NULL,
+            captured_at TEXT NOT NULL,
+            likes_count INTEGER DEFAULT 0,
+            reposts_count INTEGER DEFAULT 0,
+            comments_count INTEGER DEFAULT 0
+        )
+        ''',
+        # 按帖子的时间序列查询只读索引即可完成
+        '''
+        CREATE INDEX IF NOT EXISTS idx_snapshot_post_time
+        ON post_engagement_snapshots(post_id, captured_at, likes_count, reposts_count, comments_count)
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_snapshot_captured_at ON post_engagement_snapshots(captured_at)'
+    ])
+
+    # 以现有计数作为每个帖子的第一个快照
+    def seed_chunk(cursor: sqlite3.Cursor, low: int, high: int) -> int:
+        cursor.execute('''
+            INSERT INTO post_engagement_snapshots
+            (post_id, captured_at, likes_count, reposts_count, comments_count)
+            SELECT post_id, scraped_at, likes_count, reposts_count, comments_count
+            FROM trump_posts p
+            WHERE p.rowid > ? AND p.rowid <= ?
+              AND NOT EXISTS (SELECT 1 FROM post_engagement_snapshots s WHERE s.post_id = p.post_id)
+        ''', (low, high))
+        return cursor.rowcount
+
+    backfill_in_chunks(conn, 'trump_posts', seed_chunk)
+
+
+# daily_stats触发器的公共片段：计入新行 / 扣除旧行 / 删除空日期
+_ADD_NEW_POST = '''
+    INSERT INTO daily_stats
+    (stat_date, post_count, total_likes, total_reposts, total_comments, last_scraped_at)
+    VALUES (new.post_date, 1, COALESCE(new.likes_count, 0), COALESCE(new.reposts_count, 0),
+            COALESCE(new.comments_count, 0), new.scraped_at)
+    ON CONFLICT(stat_date) DO UPDATE SET
+        post_count = post_count + 1,
+        total_likes = total_likes + excluded.total_likes,
+        total_reposts = total_reposts + excluded.total_reposts,
+        total_comments = total_comments + excluded.total_comments,
+        last_scraped_at = MAX(COALESCE(last_scraped_at, ''), excluded.last_scraped_at);
+'''
+_REMOVE_OLD_POST = '''
+    UPDATE daily_stats SET
+        post_count = post_count - 1,
+        total_likes = total_likes - COALESCE(old.likes_count, 0),
+        total_reposts = total_reposts - COALESCE(old.reposts_count, 0),
+        total_comments = total_comments - COALESCE(old.comments_count, 0)
+    WHERE stat_date = old.post_date;
+'''
+_DROP_EMPTY_DAY = '''
+    DELETE FROM daily_stats WHERE stat_date = old.post_date AND post_count <= 0;
+'''
+
+
+@migration(4, '创建每日统计汇总表及维护触发器')
+def create_daily_stats(conn: sqlite3.Connection):
+    # 建表、触发器和重新汇总在同一事务中完成，避免期间写入的帖子被漏算或重复计算
+    schema_transaction(conn, [
+        '''
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            stat_date TEXT PRIMARY KEY,
+            post_count INTEGER NOT NULL DEFAULT 0,
+            total_likes INTEGER NOT NULL DEFAULT 0,
+            total_reposts INTEGER NOT NULL DEFAULT 0,
+            total_comments INTEGER NOT NULL DEFAULT 0,
+            last_scraped_at TEXT
+        )
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS daily_stats_insert AFTER INSERT ON trump_posts BEGIN
+            {_ADD_NEW_POST}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS daily_stats_delete AFTER DELETE ON trump_posts BEGIN
+            {_REMOVE_OLD_POST}
+            {_DROP_EMPTY_DAY}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS daily_stats_update
+        AFTER UPDATE OF post_date, likes_count, reposts_count, comments_count, scraped_at ON trump_posts BEGIN
+            {_REMOVE_OLD_POST}
+            {_ADD_NEW_POST}
+            {_DROP_EMPTY_DAY}
+        END
+        ''',
+        'DELETE FROM daily_stats',
+        '''
+        INSERT INTO daily_stats
+        (stat_date, post_count, total_likes, total_reposts, total_comments, last_scraped_at)
+        SELECT post_date, COUNT(*),
+               COALESCE(SUM(likes_count), 0), COALESCE(SUM(reposts_count), 0),
+               COALESCE(SUM(comments_count), 0), MAX(scraped_at)
+        FROM trump_posts
+        GROUP BY post_date
+        '''
+    ])
+
+
+@migration(5, '帖子表增加整数时间戳列及范围查询索引')
+def add_timestamp_epoch(conn: sqlite3.Connection):
+    add_columns(conn, 'trump_posts', [('timestamp_epoch', 'INTEGER')])
+
+    # 先回填再建索引，建索引时只需一次排序
+    backfill_in_chunks(conn, 'trump_posts', sql_backfill(
+        'trump_posts',
+        "timestamp_epoch = CAST(strftime('%s', timestamp_utc) AS INTEGER)",
+        'timestamp_epoch IS NULL'
+    ))
+
+    # (post_date, timestamp_epoch) 覆盖按日查询、按日排序和按日计数，取代原来的单列日期索引
+    schema_transaction(conn, [
+        'DROP INDEX IF EXISTS idx_post_date',
+        'CREATE INDEX IF NOT EXISTS idx_post_date_epoch ON trump_posts(post_date, timestamp_epoch)',
+        'CREATE INDEX IF NOT EXISTS idx_timestamp_epoch ON trump_posts(timestamp_epoch)'
+    ])
+
+
+@migration(6, '创建帖子内容的FTS5全文索引')
+def create_fulltext_index(conn: sqlite3.Connection):
+    is_new = not table_exists(conn, 'trump_posts_fts')
+
+    try:
+        # 外部内容表：只存倒排索引，正文仍在trump_posts里
+        statements = ['''
+            CREATE VIRTUAL TABLE IF NOT EXISTS trump_posts_fts USING fts5(
+                content,
+                content='trump_posts',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        ''']
+        statements += [
+            '''
+            CREATE TRIGGER IF NOT EXISTS trump_posts_fts_insert AFTER INSERT ON trump_posts BEGIN
+                INSERT INTO trump_posts_fts(rowid, content) VALUES (new.id, new.content);
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trump_posts_fts_delete AFTER DELETE ON trump_posts BEGIN
+                INSERT INTO trump_posts_fts(trump_posts_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            END
+            ''',
+            '''
+            CREATE TRIGGER IF NOT EXISTS trump_posts_fts_update AFTER UPDATE OF content ON trump_posts BEGIN
+                INSERT INTO trump_posts_fts(trump_posts_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                INSERT INTO trump_posts_fts(rowid, content) VALUES (new.id, new.content);
+            END
+            '''
+        ]
+        # 首次创建时为已有帖子建立索引（rebuild是单条语句，与建表在同一事务中完成）
+        if is_new:
+            statements.append("INSERT INTO trump_posts_fts(trump_posts_fts) VALUES ('rebuild')")
+
+        schema_transaction(conn, statements)
+
+    except sqlite3.OperationalError as e:
+        logger.warning(f"SQLite不支持FTS5，搜索将退化为LIKE查询: {e}")
+        return False
+
+
+@migration(7, '小结表增加草稿状态列（流式生成中的部分内容）')
+def add_summary_status(conn: sqlite3.Connection):
+    # status: final为完整小结，draft为流式生成中写入的部分内容；draft_key标识草稿对应的请求，用于续写
+    add_columns(conn, 'daily_summaries', [
+        ('status', "TEXT NOT NULL DEFAULT 'final'"),
+        ('draft_key', 'TEXT')
+    ])
@@ -7,9 +7,14 @@ import sqlite3
 import json
 from datetime import datetime
 
+from database import TrumpPostsDB
+
 def export_database_to_json():
     """导出数据库到JSON文件"""
     try:
+        # 确保daily_stats等汇总表已创建
+        TrumpPostsDB('trump_posts.db')
+        
         # 连接数据库
         conn = sqlite3.connect('trump_posts.db')
         conn.row_factory = sqlite3.Row
@@ -19,6 +24,7 @@ def export_database_to_json():
         cursor.execute('''
             SELECT summary_date, summary_content, post_count, generated_at, generated_by 
             FROM daily_summaries 
+            WHERE status = 'final'
             ORDER BY summary_date DESC
         ''')
         
@@ -33,14 +39,13 @@ def export_database_to_json():
             })
         
         # 获取统计数据
-        cursor.execute('SELECT COUNT(*) as total FROM trump_posts')
+        cursor.execute('SELECT COALESCE(SUM(post_count), 0) as total FROM daily_stats')
         total_posts = cursor.fetchone()['total']
         
         cursor.execute('''
-            SELECT DATE(timestamp_et) as date, COUNT(*) as post_count 
-            FROM trump_posts 
-            GROUP BY DATE(timestamp_et) 
-            ORDER BY date DESC 
+            SELECT stat_date as date, post_count 
+            FROM daily_stats 
+            ORDER BY stat_date DESC 
             LIMIT 7
         ''')
         
@@ -55,7 +60,7 @@ def export_database_to_json():
         cursor.execute('''
             SELECT post_id, content, timestamp_et, likes_count 
             FROM trump_posts 
-            ORDER BY timestamp_et DESC 
+            ORDER BY timestamp_epoch DESC 
             LIMIT 10
         ''')
         
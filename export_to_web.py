@@ -11,6 +11,8 @@ import os
 from datetime import datetime
 import logging
 
+from database import TrumpPostsDB
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -22,6 +24,9 @@ logger = logging.getLogger(__name__)
 def connect_to_database():
     """连接到数据库"""
     try:
+        # 先执行结构迁移，保证下面查询的表和列都存在
+        TrumpPostsDB('data/trump_posts.db')
+        
         conn = sqlite3.connect('data/trump_posts.db')
         conn.row_factory = sqlite3.Row  # 使结果可以像字典一样访问
         return conn
@@ -35,27 +40,26 @@ def get_daily_statistics(conn):
     try:
         cursor = conn.cursor()
         
-        # 获取每日帖子数量
+        # 获取每日帖子数量（读取daily_stats汇总表）
         query = """
-        SELECT DATE(created_at) as date, COUNT(*) as post_count
-        FROM posts
-        WHERE created_at >= date('now', '-30 days')
-        GROUP BY DATE(created_at)
-        ORDER BY date DESC
+        SELECT stat_date as date, post_count
+        FROM daily_stats
+        WHERE stat_date >= date('now', '-30 days')
+        ORDER BY stat_date DESC
         """
         cursor.execute(query)
         daily_stats = [dict(row) for row in cursor.fetchall()]
         
         # 获取总体统计
-        cursor.execute("SELECT COUNT(*) as total_posts FROM posts")
-        total_posts = cursor.fetchone()['total_posts']
-        
-        cursor.execute("SELECT COUNT(DISTINCT DATE(created_at)) as total_days FROM posts")
-        total_days = cursor.fetchone()['total_days']
+        cursor.execute("SELECT COALESCE(SUM(post_count), 0) as total_posts, COUNT(*) as total_days FROM daily_stats")
+        totals = cursor.fetchone()
+        total_posts = totals['total_posts']
+        total_days = totals['total_days']
         
         # 获取最新帖子时间
-        cursor.execute("SELECT MAX(created_at) as latest_post FROM posts")
-        latest_post = cursor.fetchone()['latest_post']
+        cursor.execute("SELECT timestamp_et as latest_post FROM trump_posts ORDER BY timestamp_epoch DESC LIMIT 1")
+        latest_row = cursor.fetchone()
+        latest_post = latest_row['latest_post'] if latest_row else None
         
         return {
             'total_posts': total_posts,
@@ -73,25 +77,24 @@ def get_claude_summaries(conn):
         cursor = conn.cursor()
         
         query = """
-        SELECT analysis_date, summary_text, post_count, key_topics
-        FROM claude_summaries 
-        ORDER BY analysis_date DESC
+        SELECT summary_date, summary_content, post_count, generated_at, generated_by
+        FROM daily_summaries 
+        WHERE status = 'final'
+        ORDER BY summary_date DESC
         """
         cursor.execute(query)
         summaries = []
         
+        # 转换为网站JSON使用的字段名
         for row in cursor.fetchall():
-            summary_data = dict(row)
-            # 解析key_topics JSON
-            if summary_data['key_topics']:
-                try:
-                    summary_data['key_topics'] = json.loads(summary_data['key_topics'])
-                except:
-                    summary_data['key_topics'] = []
-            else:
-                summary_data['key_topics'] = []
-            
-            summaries.append(summary_data)
+            summaries.append({
+                'analysis_date': row['summary_date'],
+                'summary_text': row['summary_content'],
+                'post_count': row['post_count'],
+                'key_topics': [],
+                'generated_at': row['generated_at'],
+                'generated_by': row['generated_by']
+            })
         
         return summaries
     except Exception as e:
@@ -104,14 +107,14 @@ def get_recent_posts(conn, days=7):
         cursor = conn.cursor()
         
         query = """
-        SELECT post_id, content, created_at, engagement_score
-        FROM posts 
-        WHERE created_at >= date('now', '-{} days')
-        ORDER BY created_at DESC
+        SELECT post_id, content, timestamp_et as created_at, likes_count as engagement_score
+        FROM trump_posts 
+        WHERE post_date >= date('now', ?)
+        ORDER BY timestamp_epoch DESC
         LIMIT 50
-        """.format(days)
+        """
         
-        cursor.execute(query)
+        cursor.execute(query, (f'-{int(days)} days',))
         posts = [dict(row) for row in cursor.fetchall()]
         
         return posts
@@ -23,9 +23,9 @@ class SummaryImporter:
         """导入Claude分析的小结"""
         
         try:
-            # 检查日期是否有帖子数据
-            posts = self.db.get_posts_by_date(date)
-            if not posts:
+            # 检查日期是否有帖子数据（读取每日统计汇总表）
+            stats = self.db.get_daily_stats(date)
+            if not stats['post_count']:
                 print(f"❌ 错误：{date} 没有帖子数据")
                 return False
             
@@ -37,21 +37,14 @@ class SummaryImporter:
                     print("取消导入")
                     return False
             
-            # 计算统计数据
-            total_likes = sum(post.get('likes_count', 0) for post in posts)
-            total_reposts = sum(post.get('reposts_count', 0) 
-                              for post in posts)
-            total_comments = sum(post.get('comments_count', 0) 
-                               for post in posts)
-            
             # 保存小结
             summary_data = {
                 'summary_date': date,
                 'summary_content': summary_content,
-                'post_count': len(posts),
-                'total_likes': total_likes,
-                'total_reposts': total_reposts,
-                'total_comments': total_comments,
+                'post_count': stats['post_count'],
+                'total_likes': stats['total_likes'],
+                'total_reposts': stats['total_reposts'],
+                'total_comments': stats['total_comments'],
                 'generated_by': 'Claude'
             }
             
@@ -59,7 +52,7 @@ class SummaryImporter:
             
             if success:
                 print(f"✅ 成功保存 {date} 的Claude分析小结")
-                print(f"📊 包含 {len(posts)} 条帖子的分析")
+                print(f"📊 包含 {stats['post_count']} 条帖子的分析")
                 return True
             else:
                 print("❌ 保存失败")
@@ -4,23 +4,93 @@
 不依赖外部API，使用本地算法生成智能小结
 """
 
+import os
 import re
+import time
 import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from itertools import islice
+from typing import List, Dict, Optional, Iterable, Tuple
 import pytz
 
 from database import TrumpPostsDB
-from config import TIMEZONE
+from analysis_formatter import format_analysis
+from config import TIMEZONE, DATABASE_PATH, SUMMARY_BACKFILL_BATCH
 
 logger = logging.getLogger(__name__)
 
 
+def _is_word_char(char: str) -> bool:
+    """与正则 \\w 一致的单词字符判断"""
+    return char.isalnum() or char == '_'
+
+
+class KeywordMatcher:
+    """
+    多词典单遍匹配器
+    所有词典的词合成一个前瞻正则，一次扫描文本找出每个位置开始的词（允许重叠），
+    再按词所属的分组计数。按词边界匹配的分组与 re.findall(r'\\b词\\b') 计数一致，
+    子串分组与 `词 in text` 判断一致
+    """
+    
+    def __init__(self):
+        self.roles = {}  # 词 -> [(分组, 标签, 是否要求词边界)]
+        self.groups = []
+        self.pattern = None
+        self.implied = {}
+    
+    def add_group(self, group: str, labels: Dict[str, Iterable[str]], word_boundary: bool):
+        """添加一个分组：labels 为 标签 -> 词列表"""
+        self.groups.append(group)
+        for label, words in labels.items():
+            for word in words:
+                self.roles.setdefault(word.lower(), []).append((group, label, word_boundary))
+        self.pattern = None
+    
+    def compile(self):
+        """编译匹配正则；长词优先，同一位置被长词遮住的前缀词通过 implied 补回"""
+        terms = sorted(self.roles, key=len, reverse=True)
+        # 先用首字符集合快速跳过不可能匹配的位置
+        first_chars = ''.join(sorted({re.escape(term[0]) for term in terms}))
+        self.pattern = re.compile(f'(?=[{first_chars}])(?=(' + '|'.join(re.escape(term) for term in terms) + '))')
+        self.implied = {
+            term: [other for other in terms if term.startswith(other)]
+            for term in terms
+        }
+        return self
+    
+    @staticmethod
+    def _bounded(text: str, start: int, end: int) -> bool:
+        """text[start:end] 两端是否满足 \\b 词边界"""
+        before = start > 0 and _is_word_char(text[start - 1])
+        after = end < len(text) and _is_word_char(text[end])
+        return (before != _is_word_char(text[start])) and (after != _is_word_char(text[end - 1]))
+    
+    def scan(self, text: str) -> Dict[str, Counter]:
+        """扫描一遍文本，返回 分组 -> Counter(标签 -> 出现次数)"""
+        if self.pattern is None:
+            self.compile()
+        
+        counts = {group: Counter() for group in self.groups}
+        for match in self.pattern.finditer(text):
+            start = match.start()
+            for term in self.implied[match.group(1)]:
+                end = start + len(term)
+                for group, label, word_boundary in self.roles[term]:
+                    if word_boundary and not self._bounded(text, start, end):
+                        continue
+                    counts[group][label] += 1
+        
+        return counts
+
+
 class LocalTrumpSummarizer:
     """本地Trump帖子智能小结生成器"""
     
-    def __init__(self):
-        self.db = TrumpPostsDB()
+    def __init__(self, db_path: str = DATABASE_PATH):
+        self.db = TrumpPostsDB(db_path)
         self.et_tz = pytz.timezone(TIMEZONE)
         
         # 政治关键词词典
@@ -41,30 +111,58 @@ class LocalTrumpSummarizer:
             'neutral': ['said', 'reported', 'announced', 'stated', 'mentioned']
         }
         
-    def extract_keywords(self, posts: List[Dict]) -> Dict[str, int]:
-        """提取关键词和频率"""
-        all_text = ' '.join([post.get('content', '') for post in posts]).lower()
+        # 内容分类规则（按顺序匹配，命中第一个即归类）
+        self.category_rules = {
+            '媒体批评': ['fake news', 'media', 'press', '媒体', '新闻'],
+            '政策主张': ['policy', 'border', 'economy', '政策', '边境', '经济'],
+            '政治观点': ['election', 'vote', 'campaign', '选举', '竞选'],
+            '个人生活': ['family', 'personal', 'golf', '家庭', '个人']
+        }
+        
+        # 重要人物关键词
+        self.important_people = ['Biden', 'Harris', 'Pelosi', 'McCarthy', 'DeSantis', '拜登', '哈里斯']
+        
+        # 所有词典编译成一个匹配器，每条帖子只扫描一遍
+        self.matcher = KeywordMatcher()
+        self.matcher.add_group('keyword', self.political_keywords, word_boundary=True)
+        self.matcher.add_group('sentiment', self.sentiment_words, word_boundary=True)
+        self.matcher.add_group('category', self.category_rules, word_boundary=False)
+        self.matcher.add_group('person', {person: [person] for person in self.important_people}, word_boundary=False)
+        self.matcher.compile()
+        
+    def match_posts(self, posts: List[Dict]) -> Dict:
+        """单遍扫描所有帖子，返回话题计数、情感得分、提及人物和每条帖子的分类"""
+        keyword_counts = Counter()
+        sentiment_scores = Counter()
+        people = set()
+        post_categories = []
         
-        keyword_counts = {}
-        for category, keywords in self.political_keywords.items():
-            count = 0
-            for keyword in keywords:
-                count += len(re.findall(r'\b' + re.escape(keyword.lower()) + r'\b', all_text))
-            if count > 0:
-                keyword_counts[category] = count
+        for post in posts:
+            hits = self.matcher.scan((post.get('content') or '').lower())
+            keyword_counts.update(hits['keyword'])
+            sentiment_scores.update(hits['sentiment'])
+            people.update(hits['person'])
+            post_categories.append(next(
+                (category for category in self.category_rules if hits['category'][category]), '其他'
+            ))
         
-        return keyword_counts
+        return {
+            'keywords': {category: keyword_counts[category]
+                         for category in self.political_keywords if keyword_counts[category]},
+            'sentiment': {sentiment: sentiment_scores[sentiment] for sentiment in self.sentiment_words},
+            'people': people,
+            'post_categories': post_categories
+        }
+    
+    def extract_keywords(self, posts: List[Dict], matches: Optional[Dict] = None) -> Dict[str, int]:
+        """提取关键词和频率"""
+        matches = matches or self.match_posts(posts)
+        return matches['keywords']
     
-    def analyze_sentiment(self, posts: List[Dict]) -> str:
+    def analyze_sentiment(self, posts: List[Dict], matches: Optional[Dict] = None) -> str:
         """分析情感倾向"""
-        all_text = ' '.join([post.get('content', '') for post in posts]).lower()
-        
-        sentiment_scores = {}
-        for sentiment, words in self.sentiment_words.items():
-            score = 0
-            for word in words:
-                score += len(re.findall(r'\b' + re.escape(word) + r'\b', all_text))
-            sentiment_scores[sentiment] = score
+        matches = matches or self.match_posts(posts)
+        sentiment_scores = matches['sentiment']
         
         if sentiment_scores['positive'] > sentiment_scores['negative']:
             return "积极乐观"
@@ -73,25 +171,20 @@ class LocalTrumpSummarizer:
         else:
             return "中性陈述"
     
-    def extract_mentions(self, posts: List[Dict]) -> List[str]:
+    def extract_mentions(self, posts: List[Dict], matches: Optional[Dict] = None) -> List[str]:
         """提取@提及和重要人物"""
-        mentions = set()
-        all_text = ' '.join([post.get('content', '') for post in posts])
+        matches = matches or self.match_posts(posts)
+        mentions = set(matches['people'])
         
         # 提取@mentions
-        at_mentions = re.findall(r'@(\w+)', all_text)
-        mentions.update(at_mentions)
-        
-        # 重要人物关键词
-        important_people = ['Biden', 'Harris', 'Pelosi', 'McCarthy', 'DeSantis', '拜登', '哈里斯']
-        for person in important_people:
-            if person.lower() in all_text.lower():
-                mentions.add(person)
+        for post in posts:
+            mentions.update(re.findall(r'@(\w+)', post.get('content') or ''))
         
         return list(mentions)[:5]  # 最多返回5个
     
-    def categorize_content(self, posts: List[Dict]) -> Dict[str, List[str]]:
+    def categorize_content(self, posts: List[Dict], matches: Optional[Dict] = None) -> Dict[str, List[str]]:
         """对内容进行分类"""
+        matches = matches or self.match_posts(posts)
         categories = {
             '政治观点': [],
             '媒体批评': [],
@@ -100,21 +193,11 @@ class LocalTrumpSummarizer:
             '其他': []
         }
         
-        for post in posts:
-            content = post.get('content', '').lower()
+        for post, category in zip(posts, matches['post_categories']):
+            content = (post.get('content') or '').lower()
             post_time = post.get('post_time', '')
             short_content = content[:50] + "..." if len(content) > 50 else content
-            
-            if any(word in content for word in ['fake news', 'media', 'press', '媒体', '新闻']):
-                categories['媒体批评'].append(f"[{post_time}] {short_content}")
-            elif any(word in content for word in ['policy', 'border', 'economy', '政策', '边境', '经济']):
-                categories['政策主张'].append(f"[{post_time}] {short_content}")
-            elif any(word in content for word in ['election', 'vote', 'campaign', '选举', '竞选']):
-                categories['政治观点'].append(f"[{post_time}] {short_content}")
-            elif any(word in content for word in ['family', 'personal', 'golf', '家庭', '个人']):
-                categories['个人生活'].append(f"[{post_time}] {short_content}")
-            else:
-                categories['其他'].append(f"[{post_time}] {short_content}")
+            categories[category].append(f"[{post_time}] {short_content}")
         
         # 移除空分类
         return {k: v for k, v in categories.items() if v}
@@ -143,20 +226,24 @@ class LocalTrumpSummarizer:
         else:
             return f"时间分布：从{min(times)}:00到{max(times)}:00，分布较广"
     
-    def create_intelligent_summary(self, posts: List[Dict], date: str) -> str:
+    def create_intelligent_summary(self, posts: List[Dict], date: str,
+                                   stats: Optional[Dict] = None) -> str:
         """生成智能小结"""
         
-        # 基础统计
-        post_count = len(posts)
-        total_likes = sum(post.get('likes_count', 0) for post in posts)
-        total_reposts = sum(post.get('reposts_count', 0) for post in posts)
-        total_comments = sum(post.get('comments_count', 0) for post in posts)
-        
-        # 分析组件
-        keywords = self.extract_keywords(posts)
-        sentiment = self.analyze_sentiment(posts)
-        mentions = self.extract_mentions(posts)
-        categories = self.categorize_content(posts)
+        # 基础统计（读取每日统计汇总表）
+        if stats is None:
+            stats = self.db.get_daily_stats(date)
+        post_count = stats['post_count']
+        total_likes = stats['total_likes']
+        total_reposts = stats['total_reposts']
+        total_comments = stats['total_comments']
+        
+        # 分析组件（共用一次关键词扫描结果）
+        matches = self.match_posts(posts)
+        keywords = self.extract_keywords(posts, matches)
+        sentiment = self.analyze_sentiment(posts, matches)
+        mentions = self.extract_mentions(posts, matches)
+        categories = self.categorize_content(posts, matches)
         time_pattern = self.generate_time_analysis(posts)
         
         # 构建小结
@@ -236,21 +323,17 @@ class LocalTrumpSummarizer:
             logger.info(f"找到 {len(posts)} 条帖子，开始生成智能小结")
             
             # 生成智能小结
-            summary = self.create_intelligent_summary(posts, date)
+            stats = self.db.get_daily_stats(date)
+            summary = self.create_intelligent_summary(posts, date, stats)
             
             # 保存到数据库
-            post_count = len(posts)
-            total_likes = sum(post.get('likes_count', 0) for post in posts)
-            total_reposts = sum(post.get('reposts_count', 0) for post in posts)
-            total_comments = sum(post.get('comments_count', 0) for post in posts)
-            
             summary_data = {
                 'summary_date': date,
                 'summary_content': summary,
-                'post_count': post_count,
-                'total_likes': total_likes,
-                'total_reposts': total_reposts,
-                'total_comments': total_comments,
+                'post_count': stats['post_count'],
+                'total_likes': stats['total_likes'],
+                'total_reposts': stats['total_reposts'],
+                'total_comments': stats['total_comments'],
                 'generated_by': 'Local_AI'
             }
             
@@ -262,6 +345,87 @@ class LocalTrumpSummarizer:
         except Exception as e:
             logger.error(f"生成本地智能小结失败: {e}")
             return None
+    
+    def summarize_job(self, job: Tuple[str, List[Dict], Dict]) -> Dict:
+        """生成单日小结并预渲染HTML，返回daily_summaries的一行"""
+        date, posts, stats = job
+        summary = self.create_intelligent_summary(posts, date, stats)
+        return {
+            'summary_date': date,
+            'summary_content': summary,
+            'summary_html': format_analysis(summary),
+            'post_count': stats['post_count'],
+            'total_likes': stats['total_likes'],
+            'total_reposts': stats['total_reposts'],
+            'total_comments': stats['total_comments'],
+            'generated_by': 'Local_AI'
+        }
+    
+    def backfill_summaries(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                           workers: Optional[int] = None, batch_size: int = SUMMARY_BACKFILL_BATCH,
+                           replace_others: bool = False) -> Dict:
+        """
+        批量回填日期范围内（默认全部）所有有帖子日期的本地小结：
+        一个有序游标流式读取帖子并按日分组，进程池并行生成，每batch_size天一个事务写入。
+        默认不覆盖Claude等其他来源的小结；workers=1时在当前进程内执行
+        """
+        started = time.time()
+        stats_by_date = self.db.get_daily_stats_range(date_from, date_to)
+        jobs = (
+            (date, posts, stats_by_date.get(date) or self.db.get_daily_stats(date))
+            for date, posts in self.db.iter_posts_by_day(date_from, date_to)
+        )
+        batches = iter(lambda: list(islice(jobs, batch_size)), [])
+        
+        workers = workers or os.cpu_count() or 1
+        result = {'days': 0, 'written': 0, 'workers': workers}
+        
+        def write(rows: Iterable[Dict]):
+            rows = list(rows)
+            result['days'] += len(rows)
+            result['written'] += self.db.bulk_upsert_summaries(rows, replace_others=replace_others)
+            logger.info(f"已回填 {result['days']} 天小结 (最新: {rows[-1]['summary_date']})")
+        
+        if workers == 1:
+            for batch in batches:
+                write(map(self.summarize_job, batch))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_backfill_worker,
+                                     initargs=(self.db.db_path,)) as executor:
+                chunksize = max(1, batch_size // (workers * 4))
+                # 提交下一批后再写入上一批，让写库与生成重叠
+                pending = None
+                for batch in batches:
+                    submitted = executor.map(_summarize_day, batch, chunksize=chunksize)
+                    if pending is not None:
+                        write(pending)
+                    pending = submitted
+                if pending is not None:
+                    write(pending)
+        
+        elapsed = time.time() - started
+        result.update({
+            'skipped': result['days'] - result['written'],
+            'elapsed_seconds': round(elapsed, 2),
+            'days_per_second': round(result['days'] / elapsed, 1) if elapsed else result['days']
+        })
+        logger.info(f"本地小结回填完成: {result}")
+        return result
+
+
+# 回填进程池中每个进程各自持有一个小结器（词典和匹配器只编译一次）
+_backfill_summarizer = None
+
+
+def _init_backfill_worker(db_path: str):
+    """回填进程初始化"""
+    global _backfill_summarizer
+    _backfill_summarizer = LocalTrumpSummarizer(db_path)
+
+
+def _summarize_day(job: Tuple[str, List[Dict], Dict]) -> Dict:
+    """回填进程任务：生成单日小结"""
+    return _backfill_summarizer.summarize_job(job)
 
 
 def main():
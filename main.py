@@ -14,10 +14,16 @@ Trump Truth Social 爬虫主程序
     python main.py --historical 30   # 爬取过去30天的历史数据
     python main.py --test            # 测试运行一次
     python main.py --status          # 查看数据库状态
+    python main.py --build-site      # 增量生成静态网站
+    python main.py --search tariff   # 全文搜索帖子
+    python main.py --refresh-engagement  # 刷新最近帖子的互动数据
+    python main.py --backfill-summaries  # 批量重新生成全部日期的本地小结
+    python main.py --summarize-missing   # 并发补生成最近缺失的AI小结
 """
 
 import argparse
 import sys
+import time
 import logging
 from datetime import datetime, timedelta
 
@@ -27,8 +33,11 @@ from scheduler import TrumpScraperScheduler
 from database import TrumpPostsDB
 from summarizer import TrumpPostSummarizer
 from claude_summarizer import ClaudeSummarizer
+from local_summarizer import LocalTrumpSummarizer
 from daily_export import DailyExporter
-from config import TIMEZONE
+from site_builder import StaticSiteBuilder
+from summary_pipeline import SummaryPipeline, print_result
+from config import TIMEZONE, ENGAGEMENT_REFRESH_DAYS, SUMMARY_PIPELINE_CONCURRENCY, SUMMARY_CATCHUP_DAYS
 import pytz
 
 # logger will be initialized after setup_logging() is called
@@ -53,7 +62,7 @@ def test_scrape():
     if results:
         print(f"\n✅ 测试成功！爬取到 {len(results)} 个帖子")
         logger.info(f"测试成功！爬取到 {len(results)} 个帖子")
-        print(create_summary_report(results))
+        print(create_summary_report(results, scraper.db))
     else:
         print(f"\n📝 测试完成，没有发现新帖子")
         logger.info("测试完成，没有新帖子")
@@ -80,7 +89,7 @@ def historical_scrape(days_back: int):
     if results:
         print(f"\n✅ 历史数据爬取成功！")
         logger.info(f"历史数据爬取成功！共获取 {len(results)} 个帖子")
-        print(create_summary_report(results))
+        print(create_summary_report(results, scraper.db))
     else:
         print(f"\n📝 历史数据爬取完成，没有发现新帖子")
         logger.info("历史数据爬取完成，没有新帖子")
@@ -88,8 +97,29 @@ def historical_scrape(days_back: int):
     return len(results)
 
 
-def generate_summary(date: str):
-    """生成指定日期的小结"""
+def refresh_engagement(days_back: int):
+    """刷新最近N天帖子的互动数据，并显示互动增速最快的帖子"""
+    print(f"\n📈 刷新过去 {days_back} 天帖子的互动数据")
+    print("=" * 50)
+    
+    logger.info(f"开始刷新过去 {days_back} 天帖子的互动数据...")
+    
+    scraper = TruthSocialScraper()
+    refreshed = scraper.refresh_engagement(days_back=days_back)
+    
+    velocity = scraper.db.get_engagement_velocity(hours=24, limit=10)
+    if velocity:
+        print(f"\n🔥 过去24小时互动增速最快的帖子:")
+        for item in velocity:
+            print(f"   {item['post_id']}: ❤️ +{item['likes_per_hour']:.0f}/小时  "
+                  f"🔄 +{item['reposts_per_hour']:.0f}/小时  "
+                  f"💬 +{item['comments_per_hour']:.0f}/小时")
+    
+    return refreshed
+
+
+def generate_summary(date: str, use_cache: bool = True):
+    """生成指定日期的小结（use_cache=False 时忽略已缓存的API响应）"""
     try:
         print(f"\n📝 正在生成 {date} 的小结...")
         print("🤖 优先尝试Claude API，失败时使用Hugging Face...")
@@ -97,7 +127,7 @@ def generate_summary(date: str):
         
         # 首先尝试Claude API
         try:
-            claude_summarizer = ClaudeSummarizer()
+            claude_summarizer = ClaudeSummarizer(use_cache=use_cache)
             summary = claude_summarizer.generate_daily_summary(date)
             
             if summary:
@@ -114,7 +144,7 @@ def generate_summary(date: str):
         
         # 使用Hugging Face备用
         try:
-            hf_summarizer = TrumpPostSummarizer()
+            hf_summarizer = TrumpPostSummarizer(use_cache=use_cache)
             summary = hf_summarizer.generate_daily_summary(date)
             
             if summary and "由于AI服务暂时不可用" not in summary:
@@ -135,6 +165,34 @@ def generate_summary(date: str):
         logger.error(f"生成小结失败: {e}")
 
 
+def summarize_missing(date_from: str = None, date_to: str = None, concurrency: int = SUMMARY_PIPELINE_CONCURRENCY,
+                      use_cache: bool = True, force: bool = False):
+    """并发补生成日期范围内缺失的小结，每完成一天立即保存"""
+    try:
+        print(f"\n🗓️ 正在补生成小结 ({date_from or f'最近{SUMMARY_CATCHUP_DAYS}天'} ~ {date_to or '今天'})...")
+        print("=" * 50)
+        
+        pipeline = SummaryPipeline(use_cache=use_cache, concurrency=concurrency)
+        dates = pipeline.pending_dates(date_from, date_to, skip_existing=not force)
+        
+        if not dates:
+            print("✅ 没有需要生成的小结")
+            return
+        
+        print(f"📋 {len(dates)} 天需要生成小结，最多 {pipeline.concurrency} 天同时进行")
+        started = time.monotonic()
+        summaries = pipeline.run(dates, on_result=print_result)
+        
+        print(f"\n⏱️ 完成 {len(summaries)}/{len(dates)} 天，耗时 {time.monotonic() - started:.1f} 秒")
+        
+    except ValueError as e:
+        print(f"❌ 配置错误: {e}")
+        logger.error(f"补生成小结失败: {e}")
+    except Exception as e:
+        print(f"❌ 补生成小结失败: {e}")
+        logger.error(f"补生成小结失败: {e}")
+
+
 def export_for_claude():
     """导出待处理日期的Claude分析文件"""
     try:
@@ -173,6 +231,68 @@ def export_for_claude():
         logger.error(f"导出失败: {e}")
 
 
+def build_site(full: bool = False):
+    """生成静态网站"""
+    try:
+        print("\n🏗️ 正在生成静态网站...")
+        print("=" * 50)
+        
+        builder = StaticSiteBuilder()
+        result = builder.build(full=full)
+        
+        print(f"✅ 渲染 {len(result['rendered'])} 个日期，"
+              f"跳过 {len(result['skipped'])} 个未变化日期，"
+              f"删除 {len(result['removed'])} 个日期")
+        print(f"📁 输出目录: {builder.output_dir}/")
+        
+    except Exception as e:
+        print(f"❌ 生成静态网站失败: {e}")
+        logger.error(f"生成静态网站失败: {e}")
+
+
+def search_posts(query: str, date_from: str = None, date_to: str = None, limit: int = 20):
+    """全文搜索帖子"""
+    try:
+        db = TrumpPostsDB()
+        results = db.search_posts(query, date_from=date_from, date_to=date_to, limit=limit)
+        
+        print(f"\n🔍 搜索 \"{query}\": 找到 {len(results)} 条结果")
+        print("=" * 50)
+        
+        for post in results:
+            print(f"📅 {post['post_date']} {post['post_time']}  "
+                  f"❤️ {post['likes_count'] or 0}  🔄 {post['reposts_count'] or 0}")
+            print(f"   {post['snippet']}")
+            if post['post_url']:
+                print(f"   🔗 {post['post_url']}")
+            print()
+        
+    except Exception as e:
+        print(f"❌ 搜索失败: {e}")
+        logger.error(f"搜索失败: {e}")
+
+
+def backfill_summaries(date_from: str = None, date_to: str = None, workers: int = None,
+                       replace_others: bool = False):
+    """批量回填日期范围内的本地智能小结"""
+    try:
+        print(f"\n🔁 正在回填本地小结 ({date_from or '最早'} ~ {date_to or '最新'})...")
+        print("=" * 50)
+        
+        result = LocalTrumpSummarizer().backfill_summaries(
+            date_from, date_to, workers=workers, replace_others=replace_others
+        )
+        
+        print(f"✅ 处理 {result['days']} 天，写入 {result['written']} 篇小结，"
+              f"跳过 {result['skipped']} 篇其他来源的小结")
+        print(f"⏱️ 耗时 {result['elapsed_seconds']} 秒，{result['days_per_second']} 天/秒 "
+              f"({result['workers']} 个进程)")
+        
+    except Exception as e:
+        print(f"❌ 回填小结失败: {e}")
+        logger.error(f"回填小结失败: {e}")
+
+
 def show_status():
     """显示数据库状态"""
     db = TrumpPostsDB()
@@ -255,12 +375,106 @@ def main():
         help='生成指定日期的小结 (格式: YYYY-MM-DD)'
     )
     
+    parser.add_argument(
+        '--summarize-missing',
+        action='store_true',
+        help=f'并发补生成日期范围内（默认最近{SUMMARY_CATCHUP_DAYS}天）缺失的AI小结'
+    )
+    
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=SUMMARY_PIPELINE_CONCURRENCY,
+        metavar='N',
+        help=f'与 --summarize-missing 一起使用，同时生成的日期数 (默认: {SUMMARY_PIPELINE_CONCURRENCY})'
+    )
+    
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='与 --summarize-missing 一起使用，已有小结的日期也重新生成'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='与 --summary 或 --summarize-missing 一起使用，不读取也不写入API响应缓存，强制重新生成'
+    )
+    
     parser.add_argument(
         '--export',
         action='store_true',
         help='导出待处理日期的Claude分析文件'
     )
     
+    parser.add_argument(
+        '--build-site',
+        action='store_true',
+        help='增量生成静态网站（只重新渲染有变化的日期）'
+    )
+    
+    parser.add_argument(
+        '--full-rebuild',
+        action='store_true',
+        help='与 --build-site 一起使用，强制全量重建'
+    )
+    
+    parser.add_argument(
+        '--refresh-engagement',
+        type=int,
+        nargs='?',
+        const=ENGAGEMENT_REFRESH_DAYS,
+        metavar='DAYS',
+        help=f'刷新最近N天帖子的互动数据并记录快照 (默认: {ENGAGEMENT_REFRESH_DAYS})'
+    )
+    
+    parser.add_argument(
+        '--search',
+        type=str,
+        metavar='QUERY',
+        help='全文搜索帖子内容（词尾加*表示前缀匹配）'
+    )
+    
+    parser.add_argument(
+        '--date-from',
+        type=str,
+        metavar='DATE',
+        help='与 --search、--backfill-summaries 或 --summarize-missing 一起使用，起始日期 (格式: YYYY-MM-DD)'
+    )
+    
+    parser.add_argument(
+        '--date-to',
+        type=str,
+        metavar='DATE',
+        help='与 --search、--backfill-summaries 或 --summarize-missing 一起使用，结束日期 (格式: YYYY-MM-DD)'
+    )
+    
+    parser.add_argument(
+        '--limit',
+        type=int,
+        default=20,
+        help='与 --search 一起使用，最多返回的结果数 (默认: 20)'
+    )
+    
+    parser.add_argument(
+        '--backfill-summaries',
+        action='store_true',
+        help='批量重新生成日期范围内（默认全部）的本地智能小结'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        metavar='N',
+        help='与 --backfill-summaries 一起使用，并行进程数 (默认: CPU核数)'
+    )
+    
+    parser.add_argument(
+        '--replace-all',
+        action='store_true',
+        help='与 --backfill-summaries 一起使用，同时覆盖Claude等其他来源的小结'
+    )
+    
     args = parser.parse_args()
     
     # 设置日志
@@ -288,11 +502,27 @@ def main():
             historical_scrape(args.historical)
             
         elif args.summary:
-            generate_summary(args.summary)
+            generate_summary(args.summary, use_cache=not args.no_cache)
+            
+        elif args.summarize_missing:
+            summarize_missing(args.date_from, args.date_to, args.concurrency,
+                              use_cache=not args.no_cache, force=args.force)
             
         elif args.export:
             export_for_claude()
             
+        elif args.build_site:
+            build_site(full=args.full_rebuild)
+            
+        elif args.refresh_engagement:
+            refresh_engagement(args.refresh_engagement)
+            
+        elif args.search:
+            search_posts(args.search, args.date_from, args.date_to, args.limit)
+            
+        elif args.backfill_summaries:
+            backfill_summaries(args.date_from, args.date_to, args.workers, args.replace_all)
+            
         else:
             # 默认启动定时爬虫
             logger.info("启动Trump Truth Social定时爬虫...")
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Truth Social 页面快照解析器
+使用lxml从页面HTML（driver.page_source 或保存的快照文件）离线解析帖子数据，
+与浏览器解耦，可在进程池中并行运行，也可针对快照做回归测试
+"""
+
+import sys
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import List, Dict, Optional
+import pytz
+import lxml.html
+
+from config import TIMEZONE
+
+logger = logging.getLogger(__name__)
+
+et_tz = pytz.timezone(TIMEZONE)
+
+
+def _has_class(class_name: str) -> str:
+    """生成按class匹配的XPath条件"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+# 与scraper中的CSS选择器一一对应
+STATUS_XPATH = f"//*[{_has_class('status')}]"
+WRAPPER_XPATH = f".//*[{_has_class('status__wrapper')}]"
+POST_LINK_XPATH = ".//a[contains(@href, '/posts/')]"
+CONTENT_XPATH = (
+    f".//*[{_has_class('status-content')} or {_has_class('status__content')} "
+    f"or {_has_class('status__content-wrapper')}]"
+)
+TIME_XPATH = ".//time"
+COUNT_XPATH = ".//*[@data-testid='{}']"
+MEDIA_XPATH = ".//img | .//video"
+
+# 渲染文本时视为块级（换行）的标签
+BLOCK_TAGS = {
+    'p', 'div', 'br', 'li', 'ul', 'ol', 'section', 'article', 'blockquote',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'footer'
+}
+
+# 不参与渲染文本的标签
+SKIP_TAGS = {'svg', 'script', 'style', 'noscript', 'template'}
+
+
+def inner_text(element) -> str:
+    """近似浏览器innerText：块级元素换行，忽略svg/script等不可见文本"""
+    parts = []
+
+    def walk(node):
+        tag = node.tag if isinstance(node.tag, str) else ''
+        if tag in SKIP_TAGS:
+            return
+        if tag in BLOCK_TAGS:
+            parts.append('\n')
+        if tag and node.text:
+            parts.append(node.text)
+        for child in node:
+            walk(child)
+            if child.tail:
+                parts.append(child.tail)
+        if tag in BLOCK_TAGS:
+            parts.append('\n')
+
+    walk(element)
+
+    lines = [' '.join(line.split()) for line in ''.join(parts).split('\n')]
+    return '\n'.join(line for line in lines if line)
+
+
+def parse_count(text: Optional[str]) -> int:
+    """解析互动计数文本"""
+    try:
+        return int(text.replace(',', '')) if text else 0
+    except ValueError:
+        return 0
+
+
+def build_post_data(raw_post: Dict) -> Optional[Dict]:
+    """将提取到的原始字段转换为post_data字典"""
+    post_data = {}
+
+    # 帖子ID：优先data-id，其次从链接中提取
+    post_id = raw_post.get('post_id')
+    if not post_id and raw_post.get('href'):
+        post_id = raw_post['href'].split('/posts/')[-1].split('?')[0]
+
+    if not post_id:
+        logger.warning("无法提取帖子ID")
+        return None
+
+    post_data['post_id'] = post_id
+
+    # 帖子内容
+    if raw_post.get('content') is not None:
+        post_data['content'] = raw_post['content'].strip()
+    elif raw_post.get('text') is not None:
+        content = raw_post['text'].strip()
+        # 移除用户名和时间戳部分
+        lines = content.split('\n')
+        if len(lines) > 3:
+            content = '\n'.join(lines[3:])  # 跳过用户名、@handle和时间
+        post_data['content'] = content
+    else:
+        logger.warning(f"帖子 {post_id} 无法提取内容")
+        return None
+
+    # 时间信息
+    title_time = raw_post.get('title_time')
+    datetime_str = raw_post.get('datetime')
+
+    if title_time:
+        # 解析title中的时间 (格式: "Jul 07, 2025, 10:24 AM")
+        try:
+            parsed_time = datetime.strptime(title_time, "%b %d, %Y, %I:%M %p")
+        except ValueError:
+            logger.warning(f"帖子 {post_id} 时间格式解析失败: {title_time}")
+            return None
+
+        # 假设时间是东部时间
+        post_datetime_et = et_tz.localize(parsed_time)
+        post_datetime_utc = post_datetime_et.astimezone(pytz.UTC)
+
+    elif datetime_str:
+        # 备用：使用datetime属性
+        try:
+            post_datetime_utc = datetime.fromisoformat(datetime_str.replace('Z', '+00:00'))
+        except ValueError:
+            logger.warning(f"帖子 {post_id} 时间格式解析失败: {datetime_str}")
+            return None
+        post_datetime_et = post_datetime_utc.astimezone(et_tz)
+
+    else:
+        logger.warning(f"帖子 {post_id} 无法提取时间")
+        return None
+
+    post_data['timestamp_et'] = post_datetime_et.isoformat()
+    post_data['post_date'] = post_datetime_et.strftime("%Y-%m-%d")
+    post_data['post_time'] = post_datetime_et.strftime("%H:%M:%S")
+    post_data['timestamp_utc'] = post_datetime_utc.isoformat()
+    post_data['timestamp_epoch'] = int(post_datetime_utc.timestamp())
+
+    # 互动数据
+    post_data['likes_count'] = parse_count(raw_post.get('likes'))
+    post_data['reposts_count'] = parse_count(raw_post.get('reposts'))
+    post_data['comments_count'] = parse_count(raw_post.get('comments'))
+
+    # 媒体URL
+    media_urls = [src for src in raw_post.get('media') or [] if src and src.startswith("http")]
+    post_data['media_urls'] = json.dumps(media_urls) if media_urls else None
+
+    # 构建帖子URL
+    post_data['post_url'] = f"https://truthsocial.com/@realDonaldTrump/posts/{post_id}"
+
+    return post_data
+
+
+def extract_raw_post(status_element) -> Dict:
+    """从单个.status节点提取原始字段（与批量提取脚本的字段一致）"""
+    raw_post = {}
+
+    wrappers = status_element.xpath(WRAPPER_XPATH)
+    raw_post['post_id'] = wrappers[0].get('data-id') if wrappers else None
+
+    links = status_element.xpath(POST_LINK_XPATH)
+    raw_post['href'] = links[0].get('href') if links else None
+
+    content_elements = status_element.xpath(CONTENT_XPATH)
+    if content_elements:
+        raw_post['content'] = inner_text(content_elements[0])
+    else:
+        raw_post['text'] = inner_text(status_element)
+
+    time_elements = status_element.xpath(TIME_XPATH)
+    if time_elements:
+        raw_post['title_time'] = time_elements[0].get('title')
+        raw_post['datetime'] = time_elements[0].get('datetime')
+
+    for key, testid in (
+        ('likes', 'like-count'),
+        ('reposts', 'repost-count'),
+        ('comments', 'comment-count'),
+    ):
+        count_elements = status_element.xpath(COUNT_XPATH.format(testid))
+        raw_post[key] = inner_text(count_elements[0]) if count_elements else ''
+
+    raw_post['media'] = [media.get('src') for media in status_element.xpath(MEDIA_XPATH)]
+
+    return raw_post
+
+
+def parse_page_source(html: str) -> List[Dict]:
+    """解析整页HTML，返回所有有效帖子的post_data列表"""
+    if not html or not html.strip():
+        return []
+
+    try:
+        document = lxml.html.fromstring(html)
+    except Exception as e:
+        logger.error(f"页面HTML解析失败: {e}")
+        return []
+
+    posts = []
+    for status_element in document.xpath(STATUS_XPATH):
+        post_data = build_post_data(extract_raw_post(status_element))
+        if post_data:
+            posts.append(post_data)
+
+    return posts
+
+
+def parse_snapshot_file(file_path: str) -> List[Dict]:
+    """解析保存的页面快照文件"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return parse_page_source(f.read())
+
+
+def parse_snapshot_files(file_paths: List[str], max_workers: Optional[int] = None) -> Dict[str, List[Dict]]:
+    """使用进程池并行解析多个快照文件"""
+    if len(file_paths) <= 1:
+        return {path: parse_snapshot_file(path) for path in file_paths}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(file_paths, executor.map(parse_snapshot_file, file_paths)))
+
+
+def main():
+    """解析页面快照并输出结果"""
+    file_paths = sys.argv[1:] or ['trump_page_source.html']
+
+    print("🔍 Truth Social 页面快照解析")
+    print("=" * 50)
+
+    for file_path, posts in parse_snapshot_files(file_paths).items():
+        print(f"📄 {file_path}: {len(posts)} 个帖子")
+        for post in posts:
+            content = post['content'].replace('\n', ' ')
+            print(f"  • [{post['post_date']} {post['post_time']}] {post['post_id']}: {content[:60]}")
+
+
+if __name__ == "__main__":
+    main()
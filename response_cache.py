@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+小结API响应缓存
+以 (服务, 模型, 请求参数, 提示词) 的哈希为键把成功的API响应保存在本地SQLite中，
+Claude和Hugging Face小结器共用；按总大小做LRU淘汰，可选过期时间。
+同一天的帖子没有变化时，重跑或中断后重试小结会直接命中缓存
+"""
+
+import sys
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+from typing import Dict, Optional
+
+from config import API_CACHE_PATH, API_CACHE_MAX_MB, API_CACHE_TTL_HOURS
+from db_connection import get_connection
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """内容寻址的API响应缓存"""
+
+    def __init__(self, db_path: str = API_CACHE_PATH, max_mb: float = API_CACHE_MAX_MB,
+                 ttl_hours: Optional[float] = API_CACHE_TTL_HOURS, enabled: bool = True):
+        self.db_path = db_path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.ttl_seconds = ttl_hours * 3600 if ttl_hours else None
+        self.enabled = enabled and self.max_bytes > 0
+
+        if self.enabled:
+            self.init_database()
+
+    def init_database(self):
+        """创建缓存表"""
+        try:
+            with get_connection(self.db_path) as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS api_responses (
+                        cache_key TEXT PRIMARY KEY,
+                        provider TEXT NOT NULL,
+                        model TEXT NOT NULL,
+                        response TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        created_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL,
+                        hits INTEGER DEFAULT 0
+                    )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_api_responses_accessed ON api_responses(accessed_at)')
+        except sqlite3.Error as e:
+            logger.warning(f"API响应缓存不可用: {e}")
+            self.enabled = False
+
+    @staticmethod
+    def make_key(provider: str, model: str, request: Dict) -> str:
+        """请求内容的哈希（键顺序无关）"""
+        canonical = json.dumps({'provider': provider, 'model': model, 'request': request},
+                               ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, provider: str, model: str, request: Dict) -> Optional[str]:
+        """查找缓存的响应，未命中或已过期时返回None"""
+        if not self.enabled:
+            return None
+
+        key = self.make_key(provider, model, request)
+        now = time.time()
+        try:
+            with get_connection(self.db_path) as conn:
+                row = conn.execute('SELECT response, created_at FROM api_responses WHERE cache_key = ?',
+                                   (key,)).fetchone()
+                if row is None:
+                    return None
+
+                if self.ttl_seconds and now - row['created_at'] > self.ttl_seconds:
+                    conn.execute('DELETE FROM api_responses WHERE cache_key = ?', (key,))
+                    return None
+
+                conn.execute('UPDATE api_responses SET accessed_at = ?, hits = hits + 1 WHERE cache_key = ?',
+                             (now, key))
+                logger.info(f"API响应缓存命中: {provider}/{model}")
+                return row['response']
+
+        except sqlite3.Error as e:
+            logger.warning(f"读取API响应缓存失败: {e}")
+            return None
+
+    def put(self, provider: str, model: str, request: Dict, response: str):
+        """保存成功的响应，超过容量时淘汰最久未使用的条目"""
+        if not self.enabled or not response:
+            return
+
+        key = self.make_key(provider, model, request)
+        now = time.time()
+        try:
+            with get_connection(self.db_path) as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO api_responses
+                    (cache_key, provider, model, response, size, created_at, accessed_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (key, provider, model, response, len(response.encode('utf-8')), now, now))
+                self.evict(conn)
+
+        except sqlite3.Error as e:
+            logger.warning(f"写入API响应缓存失败: {e}")
+
+    def evict(self, conn: sqlite3.Connection):
+        """删除过期条目，并按最近访问时间保留总大小不超过上限的条目"""
+        if self.ttl_seconds:
+            conn.execute('DELETE FROM api_responses WHERE created_at < ?', (time.time() - self.ttl_seconds,))
+
+        conn.execute('''
+            DELETE FROM api_responses WHERE cache_key IN (
+                SELECT cache_key FROM (
+                    SELECT cache_key, SUM(size) OVER (ORDER BY accessed_at DESC, cache_key) AS running
+                    FROM api_responses
+                ) WHERE running > ?
+            )
+        ''', (self.max_bytes,))
+
+    def stats(self) -> Dict:
+        """缓存条目数、总大小和命中次数"""
+        if not self.enabled:
+            return {'enabled': False}
+
+        try:
+            with get_connection(self.db_path) as conn:
+                row = conn.execute('''
+                    SELECT COUNT(*) AS entries, COALESCE(SUM(size), 0) AS bytes, COALESCE(SUM(hits), 0) AS hits
+                    FROM api_responses
+                ''').fetchone()
+                return {'enabled': True, **dict(row)}
+
+        except sqlite3.Error as e:
+            logger.warning(f"读取API响应缓存统计失败: {e}")
+            return {'enabled': True}
+
+    def clear(self) -> int:
+        """清空缓存，返回删除的条目数"""
+        if not self.enabled:
+            return 0
+
+        with get_connection(self.db_path) as conn:
+            return conn.execute('DELETE FROM api_responses').rowcount
+
+
+def main():
+    """查看或清空API响应缓存"""
+    print("🗄️ 小结API响应缓存")
+    print("=" * 50)
+
+    cache = ResponseCache()
+    if '--clear' in sys.argv[1:]:
+        print(f"🧹 已删除 {cache.clear()} 条缓存")
+
+    stats = cache.stats()
+    if not stats['enabled']:
+        print("⚠️ 缓存未启用")
+        return
+
+    print(f"📦 {stats.get('entries', 0)} 条响应，{stats.get('bytes', 0) / 1024:.1f} KB，"
+          f"累计命中 {stats.get('hits', 0)} 次")
+    print(f"📁 {cache.db_path} (上限 {API_CACHE_MAX_MB} MB，"
+          f"{f'{API_CACHE_TTL_HOURS} 小时过期' if API_CACHE_TTL_HOURS else '不过期'})")
+
+
+if __name__ == "__main__":
+    main()
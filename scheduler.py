@@ -6,8 +6,9 @@ from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.cron import CronTrigger
 import pytz
 
-from config import TIMEZONE, SCHEDULE_MINUTE
+from config import TIMEZONE, SCHEDULE_MINUTE, ENGAGEMENT_REFRESH_DAYS, ENGAGEMENT_REFRESH_MINUTE
 from scraper import TruthSocialScraper
+from browser_session import ManagedBrowserSession
 from daily_export import DailyExporter
 from utils import setup_logging
 
@@ -19,7 +20,9 @@ class TrumpScraperScheduler:
     
     def __init__(self):
         self.scheduler = BlockingScheduler(timezone=pytz.timezone(TIMEZONE))
-        self.scraper = TruthSocialScraper()
+        # 常驻浏览器会话，所有定时爬取共用，避免每次冷启动Chrome
+        self.browser_session = ManagedBrowserSession()
+        self.scraper = TruthSocialScraper(browser_session=self.browser_session)
         self.exporter = DailyExporter()
         self.setup_signal_handlers()
     
@@ -28,6 +31,7 @@ class TrumpScraperScheduler:
         def signal_handler(signum, frame):
             logger.info("接收到关闭信号，正在停止调度器...")
             self.scheduler.shutdown()
+            self.browser_session.close()
             sys.exit(0)
         
         signal.signal(signal.SIGINT, signal_handler)
@@ -84,6 +88,18 @@ class TrumpScraperScheduler:
         except Exception as e:
             logger.error(f"历史数据爬取任务失败: {e}")
     
+    def engagement_refresh_job(self):
+        """定时刷新最近帖子的互动数据"""
+        try:
+            current_time = datetime.now(pytz.timezone(TIMEZONE))
+            logger.info(f"开始执行互动数据刷新任务 - {current_time}")
+            
+            refreshed = self.scraper.refresh_engagement(days_back=ENGAGEMENT_REFRESH_DAYS)
+            logger.info(f"互动数据刷新完成，更新 {refreshed} 个帖子")
+            
+        except Exception as e:
+            logger.error(f"互动数据刷新任务失败: {e}")
+    
     def add_hourly_job(self):
         """添加每小时执行的爬取任务"""
         self.scheduler.add_job(
@@ -95,6 +111,17 @@ class TrumpScraperScheduler:
         )
         logger.info(f"已添加每小时爬取任务，将在每小时的第 {SCHEDULE_MINUTE} 分钟执行")
     
+    def add_engagement_refresh_job(self):
+        """添加每小时执行的互动数据刷新任务"""
+        self.scheduler.add_job(
+            func=self.engagement_refresh_job,
+            trigger=CronTrigger(minute=ENGAGEMENT_REFRESH_MINUTE),
+            id='engagement_refresh',
+            name='每小时刷新最近帖子的互动数据',
+            replace_existing=True
+        )
+        logger.info(f"已添加互动数据刷新任务，将在每小时的第 {ENGAGEMENT_REFRESH_MINUTE} 分钟执行")
+    
     def add_historical_job(self, days_back: int = 30):
         """添加一次性历史数据爬取任务"""
         self.scheduler.add_job(
@@ -114,6 +141,7 @@ class TrumpScraperScheduler:
             
             # 添加定时任务
             self.add_hourly_job()
+            self.add_engagement_refresh_job()
             
             # 如果需要，添加历史数据爬取任务
             if run_historical:
@@ -134,11 +162,14 @@ class TrumpScraperScheduler:
         except Exception as e:
             logger.error(f"调度器启动失败: {e}")
             raise
+        finally:
+            self.browser_session.close()
     
     def stop(self):
         """停止调度器"""
         try:
             self.scheduler.shutdown()
+            self.browser_session.close()
             logger.info("调度器已停止")
         except Exception as e:
             logger.error(f"停止调度器失败: {e}")
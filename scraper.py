@@ -2,7 +2,6 @@ import time
 import logging
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
-import json
 import pytz
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -14,26 +13,127 @@ from selenium.common.exceptions import (
     TimeoutException, NoSuchElementException
 )
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
 import random
 
 from config import (
     TRUTH_SOCIAL_URL, BROWSER_OPTIONS, SCROLL_PAUSE_TIME,
-    MAX_SCROLL_ATTEMPTS, MAX_NO_NEW_POSTS, TIMEZONE, MAX_RETRIES, RETRY_DELAY, USER_AGENT
+    MAX_SCROLL_ATTEMPTS, MAX_NO_NEW_POSTS, TIMEZONE, MAX_RETRIES, RETRY_DELAY, USER_AGENT,
+    EXTRACTION_MODE, INCREMENTAL_STOP, INCREMENTAL_OVERLAP, ENGAGEMENT_REFRESH_DAYS
 )
 from database import TrumpPostsDB
+from page_parser import build_post_data, parse_page_source
 from utils import setup_logging
 
 logger = setup_logging()
 
+# 批量提取脚本：一次往返返回页面上所有帖子的原始字段
+BATCH_EXTRACT_SCRIPT = """
+return Array.from(document.querySelectorAll('.status')).map(function (el) {
+    var wrapper = el.querySelector('.status__wrapper');
+    var link = el.querySelector("a[href*='/posts/']");
+    var contentEl = el.querySelector('.status-content, .status__content, .status__content-wrapper');
+    var timeEl = el.querySelector('time');
+    var countText = function (selector) {
+        var node = el.querySelector(selector);
+        return node ? node.innerText : '';
+    };
+    return {
+        post_id: wrapper ? wrapper.getAttribute('data-id') : null,
+        href: link ? link.href : null,
+        content: contentEl ? contentEl.innerText : null,
+        text: contentEl ? null : el.innerText,
+        title_time: timeEl ? timeEl.getAttribute('title') : null,
+        datetime: timeEl ? timeEl.getAttribute('datetime') : null,
+        likes: countText("[data-testid='like-count']"),
+        reposts: countText("[data-testid='repost-count']"),
+        comments: countText("[data-testid='comment-count']"),
+        media: Array.from(el.querySelectorAll('img, video')).map(function (m) { return m.src; })
+    };
+});
+"""
+
+
+# 已解析的ChromeDriver路径，进程内只解析一次
+_chromedriver_path = None
+
+
+def resolve_chromedriver_path() -> Optional[str]:
+    """解析并缓存ChromeDriver路径"""
+    global _chromedriver_path
+    if _chromedriver_path is None:
+        try:
+            # 尝试自动下载ChromeDriver
+            _chromedriver_path = ChromeDriverManager().install()
+            logger.info("自动下载ChromeDriver成功")
+        except Exception as e:
+            logger.warning(f"自动下载ChromeDriver失败: {e}")
+            return None
+    return _chromedriver_path
+
+
+def create_chrome_driver():
+    """创建浏览器驱动 - 增强反检测版本"""
+    try:
+        chrome_options = Options()
+        
+        # 基础无头设置
+        chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--window-size=1920,1080")
+        
+        # 反检测增强选项
+        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        chrome_options.add_experimental_option('useAutomationExtension', False)
+        
+        # 模拟真实用户代理
+        chrome_options.add_argument(f"--user-agent={USER_AGENT}")
+        
+        # 禁用一些可能暴露自动化的功能
+        chrome_options.add_argument("--disable-extensions")
+        chrome_options.add_argument("--disable-plugins")
+        chrome_options.add_argument("--disable-images")  # 加速加载
+        
+        driver = None
+        driver_path = resolve_chromedriver_path()
+        if driver_path:
+            try:
+                driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+            except Exception as e:
+                logger.warning(f"使用已下载的ChromeDriver启动失败: {e}")
+        
+        if driver is None:
+            logger.info("尝试使用系统Chrome...")
+            driver = webdriver.Chrome(options=chrome_options)
+        
+        # 设置超时
+        driver.set_page_load_timeout(60)
+        driver.implicitly_wait(15)
+        
+        # 反检测脚本
+        driver.execute_script(
+            "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+        )
+        
+        logger.info("Chrome浏览器驱动设置成功（匿名访问 + 反检测）")
+        return driver
+        
+    except Exception as e:
+        logger.error(f"设置浏览器驱动失败: {e}")
+        raise
+
 
 class TruthSocialScraper:
     """Truth Social Trump帖子爬虫"""
     
-    def __init__(self):
+    def __init__(self, browser_session=None):
         self.db = TrumpPostsDB()
         self.driver = None
         self.et_tz = pytz.timezone(TIMEZONE)
+        # 可选的常驻浏览器会话（由调度器持有），为None时每次爬取新建浏览器
+        self.browser_session = browser_session
     
     def human_like_scroll(self, pause_range=(3, 6)):
         """模拟人类滚动行为 - 匿名访问优化版"""
@@ -62,53 +162,7 @@ class TruthSocialScraper:
     
     def setup_driver(self):
         """设置浏览器驱动 - 增强反检测版本"""
-        try:
-            chrome_options = Options()
-            
-            # 基础无头设置
-            chrome_options.add_argument("--headless")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--window-size=1920,1080")
-            
-            # 反检测增强选项
-            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-            
-            # 模拟真实用户代理
-            chrome_options.add_argument(f"--user-agent={USER_AGENT}")
-            
-            # 禁用一些可能暴露自动化的功能
-            chrome_options.add_argument("--disable-extensions")
-            chrome_options.add_argument("--disable-plugins")
-            chrome_options.add_argument("--disable-images")  # 加速加载
-            
-            try:
-                # 尝试自动下载ChromeDriver
-                service = Service(ChromeDriverManager().install())
-                self.driver = webdriver.Chrome(service=service, options=chrome_options)
-                logger.info("自动下载ChromeDriver成功")
-            except Exception as e:
-                logger.warning(f"自动下载ChromeDriver失败: {e}")
-                logger.info("尝试使用系统Chrome...")
-                self.driver = webdriver.Chrome(options=chrome_options)
-            
-            # 设置超时
-            self.driver.set_page_load_timeout(60)
-            self.driver.implicitly_wait(15)
-            
-            # 反检测脚本
-            self.driver.execute_script(
-                "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
-            )
-            
-            logger.info("Chrome浏览器驱动设置成功（匿名访问 + 反检测）")
-            
-        except Exception as e:
-            logger.error(f"设置浏览器驱动失败: {e}")
-            raise
+        self.driver = create_chrome_driver()
     
     def close_driver(self):
         """关闭浏览器驱动"""
@@ -130,13 +184,21 @@ class TruthSocialScraper:
         earliest_date_found = None
         target_reached = False
         
-        logger.info(f"开始人性化匿名爬取，目标日期: {target_date}")
+        # 增量模式：以库中最新帖子为水位线，连续遇到已存储的旧帖子即停止
+        watermark_id = None
+        known_run = 0
+        if target_date is None and INCREMENTAL_STOP:
+            watermark_id = self.db.get_latest_post_id()
+        
+        logger.info(f"开始人性化匿名爬取，目标日期: {target_date}，水位线: {watermark_id}")
         
         # 添加实时进度显示
         print(f"\n🚀 开始人性化匿名爬取 Truth Social 帖子...")
         if target_date:
             print(f"📅 目标日期: {target_date}")
             print(f"🎯 停止条件: 找到 {target_date} 或更早的帖子")
+        elif watermark_id:
+            print(f"💧 增量模式: 水位线 {watermark_id}，连续 {INCREMENTAL_OVERLAP} 个已存储旧帖子后停止")
         print(f"🐌 使用慢速人性化滚动（匿名访问）")
         print(f"🔄 最大滚动轮次: {MAX_SCROLL_ATTEMPTS} 次")
         print("=" * 60)
@@ -144,10 +206,20 @@ class TruthSocialScraper:
         try:
             while scroll_attempts < MAX_SCROLL_ATTEMPTS:
                 # 获取当前页面上的所有帖子
-                current_posts = self.driver.find_elements(
-                    By.CSS_SELECTOR, ".status"
-                )
-                current_post_count = len(current_posts)
+                if EXTRACTION_MODE == 'element':
+                    current_posts = self.driver.find_elements(
+                        By.CSS_SELECTOR, ".status"
+                    )
+                    current_post_count = len(current_posts)
+                else:
+                    # 批量模式：一次调用拿到所有帖子数据
+                    if EXTRACTION_MODE == 'html':
+                        current_posts = self.extract_posts_from_page_source()
+                    else:
+                        current_posts = self.extract_posts_batch()
+                    current_post_count = self.driver.execute_script(
+                        "return document.querySelectorAll('.status').length"
+                    )
                 
                 # 实时显示进度
                 progress_percent = (scroll_attempts + 1) / MAX_SCROLL_ATTEMPTS * 100
@@ -166,31 +238,52 @@ class TruthSocialScraper:
                 # 处理当前页面上的每个帖子
                 new_posts_found = 0
                 oldest_post_date_this_round = None
+                round_new_posts = []
+                
+                # 批量模式下一次查询出本轮已存储的帖子
+                existing_post_ids = None
+                if EXTRACTION_MODE != 'element':
+                    existing_post_ids = self.db.existing_post_ids(
+                        post['post_id'] for post in current_posts
+                    )
                 
                 for post_element in current_posts:
                     try:
                         # 先尝试获取帖子ID来避免重复处理
-                        try:
-                            wrapper = post_element.find_element(
-                                By.CSS_SELECTOR, ".status__wrapper"
-                            )
-                            post_id = wrapper.get_attribute("data-id")
-                        except NoSuchElementException:
-                            # 如果无法获取ID，跳过这个帖子
-                            continue
+                        if EXTRACTION_MODE != 'element':
+                            post_id = post_element['post_id']
+                        else:
+                            try:
+                                wrapper = post_element.find_element(
+                                    By.CSS_SELECTOR, ".status__wrapper"
+                                )
+                                post_id = wrapper.get_attribute("data-id")
+                            except NoSuchElementException:
+                                # 如果无法获取ID，跳过这个帖子
+                                continue
                         
                         # 如果已经处理过这个帖子，跳过
                         if post_id in processed_post_ids:
                             continue
                         
                         # 检查数据库中是否已存在
-                        if self.db.post_exists(post_id):
+                        if existing_post_ids is not None:
+                            already_stored = post_id in existing_post_ids
+                        else:
+                            already_stored = self.db.post_exists(post_id)
+                        
+                        if already_stored:
                             processed_post_ids.add(post_id)
                             logger.info(f"帖子已存在，跳过: {post_id}")
+                            if watermark_id and self._is_at_or_before_watermark(post_id, watermark_id):
+                                known_run += 1
                             continue
                         
                         # 提取帖子数据
-                        post_data = self.extract_post_data(post_element)
+                        if EXTRACTION_MODE != 'element':
+                            post_data = post_element
+                        else:
+                            post_data = self.extract_post_data(post_element)
                         
                         if post_data and post_data.get('post_date'):
                             post_date = post_data['post_date']
@@ -210,35 +303,50 @@ class TruthSocialScraper:
                                 print(f"\n🎯 找到目标日期帖子！日期: {post_date}")
                                 logger.info(f"找到目标日期帖子: {post_date} <= {target_date}")
                             
-                            # 保存到数据库
-                            if self.db.insert_post(post_data):
-                                scraped_posts.append(post_data)
-                                processed_post_ids.add(post_id)
-                                new_posts_found += 1
-                                logger.info(
-                                    f"成功处理帖子: {post_id} (日期: {post_date})"
-                                )
-                                
-                                # 实时显示新帖子
-                                earliest_info = f"最早: {earliest_date_found}" if earliest_date_found else "最早: 未知"
-                                print(f"\r📊 进度: [{scroll_attempts+1:2d}/{MAX_SCROLL_ATTEMPTS}] "
-                                      f"({progress_percent:5.1f}%) | "
-                                      f"页面帖子: {current_post_count:2d} | "
-                                      f"已处理: {len(processed_post_ids):2d} | "
-                                      f"新增: {len(scraped_posts):2d} ✨ | {earliest_info}", end="", flush=True)
-                            else:
-                                logger.error(f"保存帖子失败: {post_id}")
+                            # 本轮结束后统一写入数据库
+                            round_new_posts.append(post_data)
+                            processed_post_ids.add(post_id)
+                            known_run = 0
                         
                     except Exception as e:
                         logger.error(f"处理帖子时出错: {e}")
                         continue
                 
+                # 一个事务写入本轮所有新帖子
+                if round_new_posts:
+                    if self.db.bulk_upsert_posts(round_new_posts):
+                        scraped_posts.extend(round_new_posts)
+                        new_posts_found = len(round_new_posts)
+                        for post_data in round_new_posts:
+                            logger.info(
+                                f"成功处理帖子: {post_data['post_id']} (日期: {post_data['post_date']})"
+                            )
+                        
+                        # 实时显示新帖子
+                        earliest_info = f"最早: {earliest_date_found}" if earliest_date_found else "最早: 未知"
+                        print(f"\r📊 进度: [{scroll_attempts+1:2d}/{MAX_SCROLL_ATTEMPTS}] "
+                              f"({progress_percent:5.1f}%) | "
+                              f"页面帖子: {current_post_count:2d} | "
+                              f"已处理: {len(processed_post_ids):2d} | "
+                              f"新增: {len(scraped_posts):2d} ✨ | {earliest_info}", end="", flush=True)
+                    else:
+                        # 写入失败的帖子下一轮重新处理
+                        for post_data in round_new_posts:
+                            processed_post_ids.discard(post_data['post_id'])
+                        logger.error(f"保存帖子失败: {len(round_new_posts)} 个")
+                
                 logger.info(
                     f"本轮处理了 {new_posts_found} 个新帖子，"
                     f"最老帖子日期: {oldest_post_date_this_round}, "
                     f"全局最早日期: {earliest_date_found}"
                 )
                 
+                # 增量停止条件：已连续遇到足够多的水位线之前的已存储帖子
+                if watermark_id and known_run >= INCREMENTAL_OVERLAP:
+                    print(f"\n💧 已到达水位线 {watermark_id}（连续 {known_run} 个已存储帖子），停止爬取")
+                    logger.info(f"已到达水位线 {watermark_id}，连续 {known_run} 个已存储帖子，停止滚动")
+                    break
+                
                 # 优化的停止条件：基于日期目标
                 if target_date and target_reached:
                     # 已经找到目标日期的帖子，但再滚动几轮确保完整性
@@ -335,6 +443,13 @@ class TruthSocialScraper:
             logger.error(f"滚动和爬取过程失败: {e}")
             return scraped_posts
     
+    @staticmethod
+    def _is_at_or_before_watermark(post_id: str, watermark_id: str) -> bool:
+        """判断帖子是否不晚于水位线（Truth Social帖子ID随时间递增）"""
+        if post_id.isdigit() and watermark_id.isdigit():
+            return int(post_id) <= int(watermark_id)
+        return post_id == watermark_id
+    
     def _reached_target_date(self, target_date: str) -> bool:
         """检查是否已经滚动到目标日期 - 修复版本"""
         try:
@@ -383,140 +498,100 @@ class TruthSocialScraper:
             return False
     
     def extract_post_data(self, post_element) -> Optional[Dict]:
-        """从帖子元素提取数据"""
+        """从帖子元素提取数据（逐字段调用WebDriver）"""
         try:
-            post_data = {}
-            
-            # 获取帖子HTML
-            post_html = post_element.get_attribute("outerHTML")
-            soup = BeautifulSoup(post_html, 'html.parser')
+            raw_post = {}
             
             # 提取帖子ID
             try:
                 # Truth Social在.status__wrapper中有data-id属性
                 wrapper = post_element.find_element(By.CSS_SELECTOR, ".status__wrapper")
-                post_id = wrapper.get_attribute("data-id")
+                raw_post['post_id'] = wrapper.get_attribute("data-id")
             except NoSuchElementException:
                 # 如果找不到wrapper，尝试从链接中提取ID
                 try:
                     link_element = post_element.find_element(By.CSS_SELECTOR, "a[href*='/posts/']")
-                    href = link_element.get_attribute("href")
-                    post_id = href.split('/posts/')[-1].split('?')[0]
+                    raw_post['href'] = link_element.get_attribute("href")
                 except NoSuchElementException:
-                    post_id = None
-            
-            if not post_id:
-                logger.warning("无法提取帖子ID")
-                return None
-            
-            post_data['post_id'] = post_id
+                    pass
             
             # 提取帖子内容
             try:
                 # Truth Social使用.status-content类来包含帖子内容
-                content_element = post_element.find_element(By.CSS_SELECTOR, ".status-content, .status__content")
-                content = content_element.text.strip()
-                post_data['content'] = content
+                content_element = post_element.find_element(
+                    By.CSS_SELECTOR, ".status-content, .status__content, .status__content-wrapper"
+                )
+                raw_post['content'] = content_element.text
             except NoSuchElementException:
-                # 如果找不到标准内容元素，尝试获取整个帖子的文本
-                try:
-                    content = post_element.text.strip()
-                    # 移除用户名和时间戳部分
-                    lines = content.split('\n')
-                    if len(lines) > 3:
-                        content = '\n'.join(lines[3:])  # 跳过用户名、@handle和时间
-                    post_data['content'] = content
-                except Exception:
-                    logger.warning(f"帖子 {post_id} 无法提取内容")
-                    return None
+                # 如果找不到标准内容元素，使用整个帖子的文本
+                raw_post['text'] = post_element.text
             
             # 提取时间信息
             try:
                 time_element = post_element.find_element(By.CSS_SELECTOR, "time")
-                # Truth Social在title属性中有完整的时间信息
-                title_time = time_element.get_attribute("title")
-                datetime_str = time_element.get_attribute("datetime")
-                
-                if title_time:
-                    # 解析title中的时间 (格式: "Jul 07, 2025, 10:24 AM")
-                    try:
-                        # 转换为标准格式
-                        parsed_time = datetime.strptime(title_time, "%b %d, %Y, %I:%M %p")
-                        # 假设时间是东部时间
-                        post_datetime_et = self.et_tz.localize(parsed_time)
-                        post_data['timestamp_et'] = post_datetime_et.isoformat()
-                        post_data['post_date'] = post_datetime_et.strftime("%Y-%m-%d")
-                        post_data['post_time'] = post_datetime_et.strftime("%H:%M:%S")
-                        
-                        # 转换为UTC
-                        post_datetime_utc = post_datetime_et.astimezone(pytz.UTC)
-                        post_data['timestamp_utc'] = post_datetime_utc.isoformat()
-                        
-                    except ValueError:
-                        logger.warning(f"帖子 {post_id} 时间格式解析失败: {title_time}")
-                        return None
-                        
-                elif datetime_str:
-                    # 备用：使用datetime属性
-                    post_datetime_utc = datetime.fromisoformat(datetime_str.replace('Z', '+00:00'))
-                    post_data['timestamp_utc'] = post_datetime_utc.isoformat()
-                    
-                    post_datetime_et = post_datetime_utc.astimezone(self.et_tz)
-                    post_data['timestamp_et'] = post_datetime_et.isoformat()
-                    post_data['post_date'] = post_datetime_et.strftime("%Y-%m-%d")
-                    post_data['post_time'] = post_datetime_et.strftime("%H:%M:%S")
-                    
-                else:
-                    logger.warning(f"帖子 {post_id} 无法提取时间")
-                    return None
-                    
+                raw_post['title_time'] = time_element.get_attribute("title")
+                raw_post['datetime'] = time_element.get_attribute("datetime")
             except NoSuchElementException:
-                logger.warning(f"帖子 {post_id} 无法找到时间元素")
-                return None
+                pass
             
             # 提取互动数据
-            try:
-                likes_element = post_element.find_element(By.CSS_SELECTOR, "[data-testid='like-count']")
-                post_data['likes_count'] = int(likes_element.text.replace(',', '')) if likes_element.text else 0
-            except (NoSuchElementException, ValueError):
-                post_data['likes_count'] = 0
-            
-            try:
-                reposts_element = post_element.find_element(By.CSS_SELECTOR, "[data-testid='repost-count']")
-                post_data['reposts_count'] = int(reposts_element.text.replace(',', '')) if reposts_element.text else 0
-            except (NoSuchElementException, ValueError):
-                post_data['reposts_count'] = 0
-            
-            try:
-                comments_element = post_element.find_element(By.CSS_SELECTOR, "[data-testid='comment-count']")
-                post_data['comments_count'] = int(comments_element.text.replace(',', '')) if comments_element.text else 0
-            except (NoSuchElementException, ValueError):
-                post_data['comments_count'] = 0
+            for key, selector in (
+                ('likes', "[data-testid='like-count']"),
+                ('reposts', "[data-testid='repost-count']"),
+                ('comments', "[data-testid='comment-count']"),
+            ):
+                try:
+                    raw_post[key] = post_element.find_element(By.CSS_SELECTOR, selector).text
+                except NoSuchElementException:
+                    raw_post[key] = ''
             
             # 提取媒体URL
-            media_urls = []
             try:
                 media_elements = post_element.find_elements(By.CSS_SELECTOR, "img, video")
-                for media in media_elements:
-                    src = media.get_attribute("src")
-                    if src and src.startswith("http"):
-                        media_urls.append(src)
+                raw_post['media'] = [media.get_attribute("src") for media in media_elements]
             except Exception:
-                pass
-            
-            post_data['media_urls'] = json.dumps(media_urls) if media_urls else None
+                raw_post['media'] = []
             
-            # 构建帖子URL
-            post_data['post_url'] = f"https://truthsocial.com/@realDonaldTrump/posts/{post_id}"
-            
-            return post_data
+            return build_post_data(raw_post)
             
         except Exception as e:
             logger.error(f"提取帖子数据失败: {e}")
             return None
     
+    def extract_posts_batch(self) -> List[Dict]:
+        """一次execute_script批量提取页面上所有帖子的数据"""
+        try:
+            raw_posts = self.driver.execute_script(BATCH_EXTRACT_SCRIPT) or []
+        except Exception as e:
+            logger.error(f"批量提取帖子数据失败: {e}")
+            return []
+        
+        posts = []
+        for raw_post in raw_posts:
+            post_data = build_post_data(raw_post)
+            if post_data:
+                posts.append(post_data)
+        
+        logger.info(f"批量提取完成: 页面帖子 {len(raw_posts)} 个，有效 {len(posts)} 个")
+        return posts
+    
+    def extract_posts_from_page_source(self) -> List[Dict]:
+        """获取page_source后用lxml离线解析所有帖子"""
+        try:
+            page_source = self.driver.page_source
+        except Exception as e:
+            logger.error(f"获取页面源码失败: {e}")
+            return []
+        
+        posts = parse_page_source(page_source)
+        logger.info(f"页面源码解析完成: 有效帖子 {len(posts)} 个")
+        return posts
+    
     def scrape_posts(self, days_back: int = 0) -> List[Dict]:
         """爬取帖子数据"""
+        if self.browser_session is not None:
+            return self.scrape_with_session(days_back)
+        
         scraped_posts = []
         
         try:
@@ -526,21 +601,7 @@ class TruthSocialScraper:
             logger.info(f"访问 {TRUTH_SOCIAL_URL}")
             self.driver.get(TRUTH_SOCIAL_URL)
             
-            # 等待页面加载
-            WebDriverWait(self.driver, 30).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".status"))
-            )
-            
-            # 如果需要爬取历史数据，计算目标日期
-            target_date = None
-            if days_back > 0:
-                target_date = (datetime.now(self.et_tz) - timedelta(days=days_back)).strftime("%Y-%m-%d")
-                logger.info(f"目标爬取日期: {target_date}")
-            
-            # 边滚动边处理帖子
-            scraped_posts = self.scroll_and_scrape_posts(target_date)
-            
-            logger.info(f"爬取完成，共获取 {len(scraped_posts)} 个新帖子")
+            scraped_posts = self.scrape_loaded_page(days_back)
             return scraped_posts
             
         except TimeoutException:
@@ -552,6 +613,123 @@ class TruthSocialScraper:
         finally:
             self.close_driver()
     
+    def scrape_with_session(self, days_back: int = 0) -> List[Dict]:
+        """使用常驻浏览器会话爬取，只刷新时间线而不重启浏览器"""
+        try:
+            with self.browser_session.lease() as driver:
+                self.driver = driver
+                return self.scrape_loaded_page(days_back)
+            
+        except TimeoutException:
+            logger.error("页面加载超时")
+            return []
+        except Exception as e:
+            logger.error(f"爬取过程失败: {e}")
+            return []
+        finally:
+            self.driver = None
+    
+    def scrape_loaded_page(self, days_back: int = 0) -> List[Dict]:
+        """在已打开的时间线页面上爬取帖子"""
+        # 等待页面加载
+        WebDriverWait(self.driver, 30).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, ".status"))
+        )
+        
+        # 如果需要爬取历史数据，计算目标日期
+        target_date = None
+        if days_back > 0:
+            target_date = (datetime.now(self.et_tz) - timedelta(days=days_back)).strftime("%Y-%m-%d")
+            logger.info(f"目标爬取日期: {target_date}")
+        
+        # 边滚动边处理帖子
+        scraped_posts = self.scroll_and_scrape_posts(target_date)
+        
+        logger.info(f"爬取完成，共获取 {len(scraped_posts)} 个新帖子")
+        return scraped_posts
+    
+    def refresh_engagement(self, days_back: int = ENGAGEMENT_REFRESH_DAYS) -> int:
+        """重新读取最近N天已存储帖子的互动数据，返回刷新的帖子数"""
+        if self.browser_session is not None:
+            try:
+                with self.browser_session.lease() as driver:
+                    self.driver = driver
+                    return self.refresh_loaded_page(days_back)
+                
+            except Exception as e:
+                logger.error(f"刷新互动数据失败: {e}")
+                return 0
+            finally:
+                self.driver = None
+        
+        try:
+            self.setup_driver()
+            
+            logger.info(f"访问 {TRUTH_SOCIAL_URL}")
+            self.driver.get(TRUTH_SOCIAL_URL)
+            
+            return self.refresh_loaded_page(days_back)
+            
+        except Exception as e:
+            logger.error(f"刷新互动数据失败: {e}")
+            return 0
+        finally:
+            self.close_driver()
+    
+    def refresh_loaded_page(self, days_back: int) -> int:
+        """在已打开的时间线上滚动到N天前，每轮批量更新沿途已存储帖子的计数"""
+        WebDriverWait(self.driver, 30).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, ".status"))
+        )
+        
+        cutoff_date = (datetime.now(self.et_tz) - timedelta(days=days_back)).strftime("%Y-%m-%d")
+        logger.info(f"开始刷新互动数据，范围: {cutoff_date} 之后的帖子")
+        print(f"\n📈 刷新 {cutoff_date} 之后帖子的互动数据...")
+        
+        seen_post_ids = set()
+        refreshed = 0
+        older_seen = 0
+        idle_rounds = 0
+        
+        for scroll_attempt in range(MAX_SCROLL_ATTEMPTS):
+            # 刷新只需要计数，始终使用批量提取（element模式逐字段读取太慢）
+            if EXTRACTION_MODE == 'html':
+                current_posts = self.extract_posts_from_page_source()
+            else:
+                current_posts = self.extract_posts_batch()
+            
+            round_posts = []
+            for post_data in current_posts:
+                if post_data['post_id'] in seen_post_ids or not post_data.get('post_date'):
+                    continue
+                seen_post_ids.add(post_data['post_id'])
+                
+                if post_data['post_date'] >= cutoff_date:
+                    round_posts.append(post_data)
+                    older_seen = 0  # 只统计连续的范围外帖子，置顶的旧帖之后仍可能是范围内的帖子
+                else:
+                    older_seen += 1
+            
+            # 一个事务更新本轮所有帖子
+            if round_posts:
+                refreshed += self.db.update_engagement(round_posts)
+                idle_rounds = 0
+            else:
+                idle_rounds += 1
+            
+            print(f"\r📊 刷新进度: [{scroll_attempt + 1:2d}/{MAX_SCROLL_ATTEMPTS}] | "
+                  f"已读取: {len(seen_post_ids):3d} | 已刷新: {refreshed:3d}", end="", flush=True)
+            
+            # 连续遇到多个范围外的旧帖子（容忍置顶帖）或长时间没有新内容时停止
+            if older_seen >= INCREMENTAL_OVERLAP or idle_rounds >= MAX_NO_NEW_POSTS:
+                break
+            
+            self.human_like_scroll(pause_range=(2, 4))
+        
+        print(f"\n✅ 互动数据刷新完成，共刷新 {refreshed} 个帖子")
+        logger.info(f"互动数据刷新完成: 读取 {len(seen_post_ids)} 个帖子，刷新 {refreshed} 个")
+        return refreshed
+    
     def run_with_retry(self, days_back: int = 0) -> List[Dict]:
         """带重试机制的爬取"""
         for attempt in range(MAX_RETRIES):
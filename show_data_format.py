@@ -64,7 +64,8 @@ def show_data_format():
         'media_urls': '媒体文件链接 (JSON数组)',
         'post_url': '帖子完整URL',
         'scraped_at': '爬取时间戳',
-        'created_at': '数据库插入时间'
+        'created_at': '数据库插入时间',
+        'timestamp_epoch': 'UTC秒级整数时间戳 (用于排序和范围查询)'
     }
     
     for field, description in field_descriptions.items():
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+静态网站生成器
+使用网站的Jinja模板把主页、每日分析页、归档页和统计API渲染成静态文件，
+可直接部署到CDN；增量构建，只重新渲染帖子或小结有变化的日期
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, List
+import pytz
+
+from flask import render_template
+
+from config import TIMEZONE, SITE_OUTPUT_DIR
+from database import TrumpPostsDB
+import web_app
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+
+# 静态部署的路由配置：让 /api/stats 指向生成的JSON文件
+SITE_VERCEL_CONFIG = {
+    "cleanUrls": True,
+    "rewrites": [
+        {"source": "/api/stats", "destination": "/api/stats.json"},
+        {"source": "/api/daily/:date", "destination": "/api/daily/:date.json"}
+    ]
+}
+
+
+class StaticSiteBuilder:
+    """静态网站生成器"""
+
+    def __init__(self, output_dir: str = SITE_OUTPUT_DIR):
+        self.db = TrumpPostsDB()
+        self.et_tz = pytz.timezone(TIMEZONE)
+        self.output_dir = output_dir
+        self.manifest_path = os.path.join(output_dir, '.build_manifest.json')
+
+    def load_manifest(self) -> Dict:
+        """读取上次构建的清单"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save_manifest(self, manifest: Dict):
+        """保存本次构建的清单"""
+        self.write_file('.build_manifest.json', json.dumps(manifest, ensure_ascii=False, indent=2))
+
+    def write_file(self, relative_path: str, content: str):
+        """原子写入输出文件，避免CDN读到半个文件"""
+        file_path = os.path.join(self.output_dir, relative_path)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        tmp_path = file_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, file_path)
+
+    def remove_path(self, relative_path: str):
+        """删除已不存在日期的输出"""
+        path = os.path.join(self.output_dir, relative_path)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    @staticmethod
+    def templates_fingerprint() -> str:
+        """模板和静态资源的指纹，变化时需要全量重建"""
+        digest = hashlib.sha256()
+        for directory in (TEMPLATES_DIR, STATIC_DIR):
+            for root, _, files in sorted(os.walk(directory)):
+                for name in sorted(files):
+                    path = os.path.join(root, name)
+                    digest.update(os.path.relpath(path, BASE_DIR).encode('utf-8'))
+                    with open(path, 'rb') as f:
+                        digest.update(f.read())
+        return digest.hexdigest()
+
+    def collect_dates(self) -> Dict[str, Dict]:
+        """汇总每个日期的帖子统计和小结信息"""
+        dates = {}
+
+        for row in self.db.get_daily_post_stats():
+            dates[row['post_date']] = {
+                'date': row['post_date'],
+                'post_count': row['post_count'],
+                'total_likes': row['total_likes'] or 0,
+                'total_reposts': row['total_reposts'] or 0,
+                'total_comments': row['total_comments'] or 0,
+                'last_scraped_at': row['last_scraped_at'],
+                'has_summary': False,
+                'summary_generated_at': None
+            }
+
+        for row in self.db.get_summary_index():
+            if row['status'] == 'draft':
+                continue  # 生成中的草稿不进入静态网站，完成后按新指纹渲染
+            entry = dates.setdefault(row['summary_date'], {
+                'date': row['summary_date'],
+                'post_count': row['post_count'] or 0,
+                'total_likes': 0,
+                'total_reposts': 0,
+                'total_comments': 0,
+                'last_scraped_at': None
+            })
+            entry['has_summary'] = True
+            entry['summary_generated_at'] = row['generated_at']
+
+        return dates
+
+    @staticmethod
+    def date_fingerprint(entry: Dict) -> str:
+        """单个日期的内容指纹"""
+        return hashlib.sha256(json.dumps(entry, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def render_daily(self, date: str) -> bool:
+        """渲染单日分析页，没有小结或小结尚未完成的日期不生成页面"""
+        daily = web_app.get_daily_from_db(self.db, date)
+        if not daily or daily['summary'].get('status') == 'draft':
+            self.remove_path(os.path.join('daily', date))
+            return False
+
+        html = render_template('daily.html', date=date, **daily)
+        self.write_file(os.path.join('daily', date, 'index.html'), html)
+        return True
+
+    def render_site_pages(self):
+        """渲染主页、归档页和统计API"""
+        data = web_app.get_data()
+
+        self.write_file('index.html', render_template('index.html', **web_app.get_index_context(data)))
+        self.write_file(os.path.join('archive', 'index.html'),
+                        render_template('archive.html', **web_app.get_archive_context(data)))
+        self.write_file(os.path.join('api', 'stats.json'),
+                        json.dumps(web_app.get_stats_payload(data), ensure_ascii=False))
+
+    def build(self, full: bool = False) -> Dict[str, List[str]]:
+        """构建静态网站，返回本次渲染、跳过和删除的日期"""
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        manifest = self.load_manifest()
+        templates_fingerprint = self.templates_fingerprint()
+        if manifest.get('templates') != templates_fingerprint:
+            logger.info("模板或静态资源有变化，执行全量构建")
+            full = True
+
+        previous = {} if full else manifest.get('dates', {})
+        dates = self.collect_dates()
+        fingerprints = {date: self.date_fingerprint(entry) for date, entry in dates.items()}
+
+        changed = sorted(date for date in dates if previous.get(date) != fingerprints[date])
+        removed = sorted(date for date in manifest.get('dates', {}) if date not in dates)
+        result = {
+            'rendered': changed,
+            'skipped': sorted(date for date in dates if date not in changed),
+            'removed': removed
+        }
+
+        if not changed and not removed and not full:
+            logger.info("数据没有变化，跳过构建")
+            return result
+
+        with web_app.app.test_request_context('/'):
+            for date in changed:
+                self.render_daily(date)
+                self.write_file(os.path.join('api', 'daily', f'{date}.json'),
+                                json.dumps(dates[date], ensure_ascii=False))
+
+            for date in removed:
+                self.remove_path(os.path.join('daily', date))
+                self.remove_path(os.path.join('api', 'daily', f'{date}.json'))
+
+            self.render_site_pages()
+
+        # 静态资源和部署配置
+        shutil.copytree(STATIC_DIR, os.path.join(self.output_dir, 'static'), dirs_exist_ok=True)
+        self.write_file('vercel.json', json.dumps(SITE_VERCEL_CONFIG, indent=2))
+
+        self.save_manifest({
+            'templates': templates_fingerprint,
+            'built_at': datetime.now(self.et_tz).isoformat(),
+            'dates': fingerprints
+        })
+
+        logger.info(f"静态网站构建完成: 渲染 {len(changed)} 个日期，跳过 {len(result['skipped'])} 个，"
+                    f"删除 {len(removed)} 个")
+        return result
+
+
+def main():
+    """构建静态网站"""
+    print("🏗️ Trump Truth Social 静态网站生成")
+    print("=" * 50)
+
+    result = StaticSiteBuilder().build()
+    print(f"✅ 渲染 {len(result['rendered'])} 个日期，跳过 {len(result['skipped'])} 个，"
+          f"删除 {len(result['removed'])} 个")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,23 @@ Trump Truth Social 帖子自动小结系统
 """
 
 import os
+import json
+import time
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import pytz
 
 from database import TrumpPostsDB
-from config import TIMEZONE
+from response_cache import ResponseCache
+from chunked_summary import pack_blocks, map_reduce
+from api_client import get_api_client, CircuitOpenError
+from config import (
+    TIMEZONE, HF_REQUEST_TIMEOUT, HF_HEDGE_FANOUT, HF_HEDGE_DELAY, HF_MODEL_STATS_FILE,
+    HF_PROMPT_TOKEN_BUDGET, SUMMARY_PIPELINE_CONCURRENCY
+)
 from utils import setup_logging
 import logging
 
@@ -23,10 +33,64 @@ except Exception:
     logger = logging.getLogger(__name__)
 
 
+class ModelLatencyStats:
+    """各模型的请求延迟和成功率（指数滑动平均），持久化到JSON，用于决定模型的尝试顺序"""
+    
+    def __init__(self, path: str = HF_MODEL_STATS_FILE, alpha: float = 0.3):
+        self.path = path
+        self.alpha = alpha
+        self.lock = threading.Lock()
+        self.stats = self.load()
+    
+    def load(self) -> Dict[str, Dict]:
+        """读取历史统计"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+    
+    def save(self):
+        """保存统计（失败不影响小结生成）"""
+        with self.lock:
+            snapshot = json.dumps(self.stats, ensure_ascii=False, indent=2)
+        try:
+            tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"保存模型统计失败: {e}")
+    
+    def record(self, model_name: str, latency: float, success: Optional[bool]):
+        """记录一次请求的耗时和结果；success为None表示请求被放弃，latency只是下限，不计入成功率"""
+        with self.lock:
+            entry = self.stats.setdefault(model_name, {
+                'latency': latency, 'success_rate': 1.0 if success is not False else 0.0, 'requests': 0
+            })
+            if success is not None or latency > entry['latency']:
+                entry['latency'] += self.alpha * (latency - entry['latency'])
+            if success is not None:
+                entry['success_rate'] += self.alpha * ((1.0 if success else 0.0) - entry['success_rate'])
+            entry['requests'] += 1
+    
+    def expected_cost(self, model_name: str) -> float:
+        """得到一次成功结果的期望耗时；没有统计的模型按超时时间估计"""
+        entry = self.stats.get(model_name)
+        if not entry:
+            return float(HF_REQUEST_TIMEOUT)
+        return entry['latency'] / max(entry['success_rate'], 0.05)
+    
+    def ranked(self, models: List[str]) -> List[str]:
+        """按期望耗时排序（稳定排序，没有统计时保持配置的优先级）"""
+        with self.lock:
+            return sorted(models, key=self.expected_cost)
+
+
 class TrumpPostSummarizer:
     """Trump帖子自动小结生成器"""
     
-    def __init__(self, hf_api_token: Optional[str] = None):
+    def __init__(self, hf_api_token: Optional[str] = None, use_cache: bool = True):
         self.db = TrumpPostsDB()
         self.et_tz = pytz.timezone(TIMEZONE)
         
@@ -50,6 +114,25 @@ class TrumpPostSummarizer:
             "Authorization": f"Bearer {self.hf_token}",
             "Content-Type": "application/json"
         }
+        
+        # 各模型延迟统计，决定对冲请求的顺序
+        self.model_stats = ModelLatencyStats()
+        
+        # API响应缓存（与Claude小结器共用）
+        self.cache = ResponseCache(enabled=use_cache)
+        
+        # 共享连接池，带重试退避和按模型熔断
+        self.client = get_api_client('huggingface')
+    
+    @staticmethod
+    def render_post(index: int, post: Dict) -> str:
+        """提示词中的单条帖子"""
+        post_time = post.get('post_time', '未知时间')
+        content = post.get('content', '').strip()
+        post_url = post.get('post_url', '')
+        
+        return (f"{index}. [{post_time}] {content}\n"
+                f"   链接: {post_url}\n\n")
     
     def create_summary_prompt(self, posts: List[Dict], date: str) -> str:
         """创建小结提示词"""
@@ -58,14 +141,7 @@ class TrumpPostSummarizer:
         sorted_posts = sorted(posts, key=lambda x: x.get('post_time', ''))
         
         # 构建帖子内容
-        posts_text = ""
-        for i, post in enumerate(sorted_posts, 1):
-            post_time = post.get('post_time', '未知时间')
-            content = post.get('content', '').strip()
-            post_url = post.get('post_url', '')
-            
-            posts_text += (f"{i}. [{post_time}] {content}\n"
-                           f"   链接: {post_url}\n\n")
+        posts_text = "".join(self.render_post(i, post) for i, post in enumerate(sorted_posts, 1))
         
         # 小结提示词（中英文混合，确保模型理解）
         prompt = f"""
@@ -91,25 +167,100 @@ class TrumpPostSummarizer:
 """
         return prompt
     
+    def create_chunk_prompt(self, blocks: List[str], date: str, part: int, total: int) -> str:
+        """分块模式：单组帖子的摘要提示词"""
+        return f"""
+请用中文简要总结Trump在Truth Social上{date}发布的以下帖子（第{part}/{total}组），列出主要观点，控制在100字以内：
+
+{''.join(blocks)}"""
+    
+    def create_reduce_prompt(self, partials: List[str], date: str) -> str:
+        """分块模式：合并各组摘要的提示词"""
+        sections = '\n'.join(f"{i}. {partial}" for i, partial in enumerate(partials, 1))
+        return f"""
+以下是Trump在Truth Social上{date}发布的帖子的分组摘要：
+
+{sections}
+
+请把这些摘要合并成一份简洁的中文小结，突出重点话题和关键信息，保持客观，控制在200字以内。"""
+    
+    def create_combine_prompt(self, partials: List[str], date: str) -> str:
+        """分块模式：分组摘要过多时，先把一部分摘要合并成一段（分层合并的中间步骤）"""
+        sections = '\n'.join(f"{i}. {partial}" for i, partial in enumerate(partials, 1))
+        return f"""
+以下是Trump在Truth Social上{date}发布的部分帖子的分组摘要：
+
+{sections}
+
+请把这些摘要合并成一段更精简的中文摘要，保留主要观点，控制在100字以内。"""
+    
+    def summarize_posts(self, posts: List[Dict], date: str) -> Optional[str]:
+        """
+        生成AI小结：帖子内容在token预算内时一次请求；
+        超出时分组并发摘要再合并，合并失败时直接拼接各组摘要
+        """
+        sorted_posts = sorted(posts, key=lambda x: x.get('post_time', ''))
+        blocks = [self.render_post(i, post) for i, post in enumerate(sorted_posts, 1)]
+        groups = pack_blocks(blocks, HF_PROMPT_TOKEN_BUDGET)
+        
+        if len(groups) <= 1:
+            return self.generate_summary_with_fallback(self.create_summary_prompt(posts, date))
+        
+        logger.info(f"{date} 共 {len(posts)} 条帖子，分 {len(groups)} 组摘要后合并")
+        
+        def merge(partials: List[str]) -> str:
+            merged = self.generate_summary_with_fallback(self.create_reduce_prompt(partials, date))
+            if not merged:
+                logger.warning("合并摘要失败，直接拼接各组摘要")
+                merged = '\n\n'.join(partials)
+            return merged
+        
+        summary = map_reduce(
+            groups,
+            lambda group, part: self.generate_summary_with_fallback(
+                self.create_chunk_prompt(group, date, part, len(groups))
+            ),
+            merge,
+            budget=HF_PROMPT_TOKEN_BUDGET,
+            combine=lambda partials: self.generate_summary_with_fallback(self.create_combine_prompt(partials, date))
+        )
+        if not summary:
+            return None
+        
+        links = '\n'.join(f"• {post.get('post_url', '')}" for post in sorted_posts)
+        return f"## {date} Trump Truth Social 动态小结\n\n{summary}\n\n### 原文链接：\n{links}"
+    
+    @staticmethod
+    def build_payload(prompt: str) -> Dict:
+        """Hugging Face API请求体（也是响应缓存键的一部分）"""
+        return {
+            "inputs": prompt,
+            "parameters": {
+                "max_length": 500,
+                "min_length": 100,
+                "do_sample": True,
+                "temperature": 0.7,
+                "top_p": 0.9,
+                "no_repeat_ngram_size": 3
+            }
+        }
+    
     def call_huggingface_api(self, prompt: str, model_name: str) -> Optional[str]:
-        """调用Hugging Face API生成小结"""
+        """调用Hugging Face API生成小结，成功的结果写入响应缓存"""
+        payload = self.build_payload(prompt)
+        summary = self.request_huggingface_api(payload, model_name)
+        if summary:
+            self.cache.put('huggingface', model_name, payload, summary)
+        return summary
+    
+    def request_huggingface_api(self, payload: Dict, model_name: str) -> Optional[str]:
+        """发送Hugging Face API请求并解析生成的文本"""
         try:
             api_url = f"{self.api_base}/{model_name}"
             
-            payload = {
-                "inputs": prompt,
-                "parameters": {
-                    "max_length": 500,
-                    "min_length": 100,
-                    "do_sample": True,
-                    "temperature": 0.7,
-                    "top_p": 0.9,
-                    "no_repeat_ngram_size": 3
-                }
-            }
-            
             logger.info(f"调用Hugging Face API: {model_name}")
-            response = requests.post(api_url, headers=self.headers, json=payload, timeout=30)
+            response = self.client.post(api_url, endpoint=model_name, headers=self.headers,
+                                        json=payload, timeout=HF_REQUEST_TIMEOUT)
             
             if response.status_code == 200:
                 try:
@@ -145,6 +296,9 @@ class TrumpPostSummarizer:
                 logger.error(f"API调用失败: {response.status_code} - {response.text}")
                 return None
                 
+        except CircuitOpenError as e:
+            logger.warning(f"跳过模型: {e}")
+            return None
         except requests.exceptions.Timeout:
             logger.error("API调用超时")
             return None
@@ -152,29 +306,89 @@ class TrumpPostSummarizer:
             logger.error(f"调用Hugging Face API失败: {e}")
             return None
     
-    def generate_summary_with_fallback(self, prompt: str) -> Optional[str]:
-        """使用多个模型生成小结（备用机制）"""
-        for model_name in self.models:
-            logger.info(f"尝试使用模型: {model_name}")
-            
-            summary = self.call_huggingface_api(prompt, model_name)
+    def timed_api_call(self, prompt: str, model_name: str, claim: threading.Lock) -> Optional[str]:
+        """
+        调用模型并记录耗时和结果。claim是该请求的记录权：请求返回时先抢到则记录实际耗时，
+        对冲已结束、放弃方先抢到时由放弃方记录下限耗时，每个请求只记录一次
+        """
+        started = time.monotonic()
+        summary = self.call_huggingface_api(prompt, model_name)
+        if claim.acquire(blocking=False):
+            self.model_stats.record(model_name, time.monotonic() - started, bool(summary))
+        return summary
+    
+    def generate_summary_with_fallback(self, prompt: str, fanout: int = HF_HEDGE_FANOUT,
+                                       hedge_delay: float = HF_HEDGE_DELAY) -> Optional[str]:
+        """
+        使用多个模型生成小结（对冲请求）：按历史期望耗时排序模型，先请求第一个，
+        hedge_delay秒内没有结果或请求失败时再发出下一个，最多fanout个同时在途，
+        采用最先返回的有效结果，其余请求不再等待。fanout=1时退化为逐个尝试
+        """
+        fanout = max(1, fanout)
+        queue = self.model_stats.ranked(self.models)
+        
+        # 任一模型对同样的提示词有缓存结果时直接使用
+        payload = self.build_payload(prompt)
+        for model_name in queue:
+            summary = self.cache.get('huggingface', model_name, payload)
             if summary:
-                logger.info(f"成功使用模型 {model_name} 生成小结")
+                logger.info(f"使用模型 {model_name} 的缓存小结")
                 return summary
-            else:
-                logger.warning(f"模型 {model_name} 生成失败，尝试下一个...")
         
-        logger.error("所有模型都生成失败")
-        return None
+        # 跳过熔断冷却中的模型（近期连续失败，请求也会被客户端直接拒绝）
+        skipped = [model_name for model_name in queue if not self.client.is_available(model_name)]
+        if skipped:
+            logger.info(f"跳过熔断中的模型: {', '.join(skipped)}")
+            queue = [model_name for model_name in queue if model_name not in skipped]
+        
+        logger.info(f"模型尝试顺序: {', '.join(queue)}")
+        
+        started = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=fanout, thread_name_prefix='hf-hedge')
+        pending = {}  # future -> (模型, 发出时间, 记录权)
+        
+        try:
+            while queue or pending:
+                if queue and len(pending) < fanout:
+                    model_name = queue.pop(0)
+                    logger.info(f"尝试使用模型: {model_name}")
+                    claim = threading.Lock()
+                    future = executor.submit(self.timed_api_call, prompt, model_name, claim)
+                    pending[future] = (model_name, time.monotonic(), claim)
+                
+                # 还能对冲时最多等hedge_delay秒，否则等到有请求返回
+                can_hedge = bool(queue) and len(pending) < fanout
+                done, _ = wait(pending, timeout=hedge_delay if can_hedge else None,
+                               return_when=FIRST_COMPLETED)
+                
+                finished = [(pending.pop(future)[0], future.result()) for future in done]
+                for model_name, summary in finished:
+                    if summary:
+                        logger.info(f"成功使用模型 {model_name} 生成小结，"
+                                    f"耗时 {time.monotonic() - started:.1f} 秒")
+                        return summary
+                    logger.warning(f"模型 {model_name} 生成失败，尝试下一个...")
+            
+            logger.error("所有模型都生成失败")
+            return None
+        
+        finally:
+            # 放弃仍在途的请求：结果丢弃，已等待的时间作为耗时下限计入统计
+            # （请求恰好在此时返回并已自行记录的不再重复记录）
+            for model_name, sent_at, claim in pending.values():
+                if claim.acquire(blocking=False):
+                    self.model_stats.record(model_name, time.monotonic() - sent_at, None)
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.model_stats.save()
     
     def create_fallback_summary(self, posts: List[Dict], date: str) -> str:
         """创建备用小结（当API失败时）"""
-        post_count = len(posts)
-        
-        # 计算互动数据
-        total_likes = sum(post.get('likes_count', 0) for post in posts)
-        total_reposts = sum(post.get('reposts_count', 0) for post in posts)
-        total_comments = sum(post.get('comments_count', 0) for post in posts)
+        # 互动数据直接读取每日统计汇总表
+        stats = self.db.get_daily_stats(date)
+        post_count = stats['post_count']
+        total_likes = stats['total_likes']
+        total_reposts = stats['total_reposts']
+        total_comments = stats['total_comments']
         
         # 提取关键词（简单实现）
         all_content = ' '.join([post.get('content', '') for post in posts])
@@ -197,20 +411,16 @@ class TrumpPostSummarizer:
                                 posts: List[Dict]) -> bool:
         """将小结保存到数据库"""
         try:
-            # 计算统计数据
-            post_count = len(posts)
-            total_likes = sum(post.get('likes_count', 0) for post in posts)
-            total_reposts = sum(post.get('reposts_count', 0) for post in posts)
-            total_comments = sum(post.get('comments_count', 0) 
-                               for post in posts)
+            # 统计数据读取每日统计汇总表
+            stats = self.db.get_daily_stats(date)
             
             summary_data = {
                 'summary_date': date,
                 'summary_content': summary_content,
-                'post_count': post_count,
-                'total_likes': total_likes,
-                'total_reposts': total_reposts,
-                'total_comments': total_comments,
+                'post_count': stats['post_count'],
+                'total_likes': stats['total_likes'],
+                'total_reposts': stats['total_reposts'],
+                'total_comments': stats['total_comments'],
                 'generated_by': 'AI'
             }
             
@@ -234,11 +444,8 @@ class TrumpPostSummarizer:
             
             logger.info(f"找到 {len(posts)} 条帖子，开始生成小结")
             
-            # 创建提示词
-            prompt = self.create_summary_prompt(posts, date)
-            
-            # 尝试使用AI生成小结
-            ai_summary = self.generate_summary_with_fallback(prompt)
+            # 尝试使用AI生成小结（帖子过多时分块生成）
+            ai_summary = self.summarize_posts(posts, date)
             
             if ai_summary:
                 summary = ai_summary
@@ -259,17 +466,13 @@ class TrumpPostSummarizer:
             return None
     
     def generate_recent_summaries(self, days: int = 7) -> Dict[str, str]:
-        """生成最近几天的小结"""
-        summaries = {}
-        
-        for i in range(days):
-            date = (datetime.now(self.et_tz) - timedelta(days=i)).strftime('%Y-%m-%d')
-            summary = self.generate_daily_summary(date)
-            
-            if summary:
-                summaries[date] = summary
+        """生成最近几天还没有小结的日期（各日期并发请求，最多SUMMARY_PIPELINE_CONCURRENCY个同时进行）"""
+        from summary_pipeline import SummaryPipeline
         
-        return summaries
+        dates = [(datetime.now(self.et_tz) - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days)]
+        dates = [date for date in dates if not self.db.summary_exists(date)]
+        pipeline = SummaryPipeline([self], concurrency=max(1, min(days, SUMMARY_PIPELINE_CONCURRENCY)))
+        return pipeline.run(dates)
 
 
 def main():
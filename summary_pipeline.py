@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+多日小结流水线
+补生成一段时间内缺失的AI小结：跳过已有小结和没有帖子的日期，
+用asyncio同时保持有限个日期的请求在途，每个日期完成后立即写入数据库。
+一周的缺失小结大约只需要一次API往返的时间，而不是逐日串行的七次
+"""
+
+import sys
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import pytz
+
+from database import TrumpPostsDB
+from config import TIMEZONE, SUMMARY_PIPELINE_CONCURRENCY, SUMMARY_CATCHUP_DAYS
+
+logger = logging.getLogger(__name__)
+
+
+class SummaryPipeline:
+    """按日期并发生成小结；summarizers按优先级排列，前一个失败时用下一个"""
+
+    def __init__(self, summarizers: Optional[List] = None, use_cache: bool = True,
+                 concurrency: int = SUMMARY_PIPELINE_CONCURRENCY):
+        self.db = TrumpPostsDB()
+        self.et_tz = pytz.timezone(TIMEZONE)
+        self.concurrency = max(1, concurrency)
+        self.summarizers = summarizers if summarizers is not None else self.default_summarizers(use_cache)
+        if not self.summarizers:
+            raise ValueError("没有可用的小结服务，请设置CLAUDE_API_KEY或HUGGINGFACE_API_TOKEN")
+
+    @staticmethod
+    def default_summarizers(use_cache: bool) -> List:
+        """与 main.py --summary 相同的顺序：优先Claude，未配置或失败时用Hugging Face"""
+        from claude_summarizer import ClaudeSummarizer
+        from summarizer import TrumpPostSummarizer
+
+        summarizers = []
+        for summarizer_class in (ClaudeSummarizer, TrumpPostSummarizer):
+            try:
+                summarizers.append(summarizer_class(use_cache=use_cache))
+            except ValueError as e:
+                logger.warning(f"{summarizer_class.__name__} 未启用: {e}")
+        return summarizers
+
+    def pending_dates(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                      skip_existing: bool = True) -> List[str]:
+        """日期范围内有帖子、且（skip_existing时）还没有小结的日期，从新到旧"""
+        if not date_to:
+            date_to = datetime.now(self.et_tz).strftime('%Y-%m-%d')
+        if not date_from:
+            date_from = (datetime.strptime(date_to, '%Y-%m-%d')
+                         - timedelta(days=SUMMARY_CATCHUP_DAYS - 1)).strftime('%Y-%m-%d')
+
+        stats = self.db.get_daily_stats_range(date_from, date_to)
+        dates = sorted((date for date, day in stats.items() if day['post_count']), reverse=True)
+        if skip_existing:
+            dates = [date for date in dates if not self.db.summary_exists(date)]
+        return dates
+
+    def summarize_day(self, date: str) -> Optional[Dict]:
+        """在工作线程中依次尝试各小结服务（各服务的generate_daily_summary会自行写入数据库）"""
+        started = time.monotonic()
+        for summarizer in self.summarizers:
+            try:
+                summary = summarizer.generate_daily_summary(date)
+            except Exception as e:
+                logger.warning(f"{type(summarizer).__name__} 生成 {date} 小结失败: {e}")
+                continue
+
+            if summary:
+                return {
+                    'date': date,
+                    'summary': summary,
+                    'generated_by': type(summarizer).__name__,
+                    'elapsed_seconds': round(time.monotonic() - started, 2)
+                }
+        return None
+
+    async def run_async(self, dates: List[str], on_result=None) -> Dict[str, str]:
+        """并发处理所有日期，最多concurrency个同时在途；每完成一个日期调用一次on_result(日期, 结果)"""
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        summaries = {}
+
+        # 专用线程池：默认线程池在CPU核数少的机器上会限制在途请求数
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='summary-day') as executor:
+
+            async def process(date: str):
+                async with semaphore:
+                    return date, await loop.run_in_executor(executor, self.summarize_day, date)
+
+            for next_done in asyncio.as_completed([process(date) for date in dates]):
+                date, result = await next_done
+                if result:
+                    summaries[date] = result['summary']
+                if on_result:
+                    on_result(date, result)
+
+        return summaries
+
+    def run(self, dates: List[str], on_result=None) -> Dict[str, str]:
+        """同步入口，返回 日期 -> 小结"""
+        if not dates:
+            return {}
+        logger.info(f"开始生成 {len(dates)} 天的小结，最多 {self.concurrency} 个同时进行")
+        return asyncio.run(self.run_async(dates, on_result))
+
+
+def print_result(date: str, result: Optional[Dict]):
+    """逐个打印完成的日期"""
+    if result:
+        print(f"✅ {date} ({result['generated_by']}, {result['elapsed_seconds']} 秒)")
+    else:
+        print(f"❌ {date} 生成失败")
+
+
+def main():
+    """补生成最近缺失的小结（完整参数见 main.py --summarize-missing）"""
+    print("🗓️ 多日小结流水线")
+    print("=" * 50)
+
+    try:
+        pipeline = SummaryPipeline()
+    except ValueError as e:
+        print(f"❌ 配置错误: {e}")
+        sys.exit(1)
+
+    dates = pipeline.pending_dates()
+    if not dates:
+        print(f"✅ 最近 {SUMMARY_CATCHUP_DAYS} 天的小结都已生成")
+        return
+
+    print(f"📋 {len(dates)} 天需要生成小结: {', '.join(dates)}")
+    started = time.monotonic()
+    summaries = pipeline.run(dates, on_result=print_result)
+    print(f"\n⏱️ 完成 {len(summaries)}/{len(dates)} 天，耗时 {time.monotonic() - started:.1f} 秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+测试小结API客户端（api_client.py）
+
+在本地启动一个桩服务器模拟API，不需要网络和API Token，测试：
+1. 长连接复用
+2. 503/429按Retry-After重试
+3. 重试耗尽后返回最后的响应
+4. 连续失败后熔断、冷却后恢复
+5. 半开试探遇到其他请求错误时重新熔断，冷却后仍能恢复
+6. 延迟统计
+"""
+
+import os
+import sys
+import time
+import threading
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加当前目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api_client import ApiClient, CircuitOpenError
+from utils import setup_logging
+
+logger = setup_logging()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """按路径返回预设的状态码序列，序列用完后返回200"""
+
+    protocol_version = 'HTTP/1.1'  # 支持keep-alive
+    scripts = {}
+    connections = set()
+    lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.lock:
+            self.connections.add(self.client_address)
+            script = self.scripts.get(self.path, [])
+            status, retry_after = script.pop(0) if script else (200, None)
+
+        body = b'{"ok": true}'
+        self.send_response(status)
+        if retry_after is not None:
+            self.send_header('Retry-After', retry_after)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server():
+    """在随机端口启动桩服务器"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def make_client():
+    return ApiClient('stub', max_retries=2, backoff_base=0.01, backoff_max=1.0,
+                     breaker_threshold=2, breaker_cooldown=0.5)
+
+
+def check_keep_alive(base_url):
+    """测试多次请求复用同一连接"""
+    print("\n🔌 测试长连接复用...")
+    StubHandler.connections.clear()
+    client = make_client()
+    for _ in range(5):
+        client.post(f"{base_url}/ok", json={'inputs': 'test'}, timeout=5)
+
+    if len(StubHandler.connections) == 1:
+        print("✅ 5次请求只建立了1个连接")
+        return True
+    print(f"❌ 建立了 {len(StubHandler.connections)} 个连接")
+    return False
+
+
+def check_retry_after(base_url):
+    """测试503/429按Retry-After重试后成功"""
+    print("\n🔁 测试Retry-After重试...")
+    StubHandler.scripts['/retry'] = [(503, '0.2'), (429, '0')]
+    client = make_client()
+
+    started = time.monotonic()
+    response = client.post(f"{base_url}/retry", timeout=5)
+    elapsed = time.monotonic() - started
+    retries = client.metrics()[f"{base_url}/retry"]['retries']
+
+    if response.status_code == 200 and retries == 2 and elapsed >= 0.2:
+        print(f"✅ 重试 {retries} 次后成功，耗时 {elapsed:.2f} 秒（遵守了Retry-After）")
+        return True
+    print(f"❌ 状态码 {response.status_code}，重试 {retries} 次，耗时 {elapsed:.2f} 秒")
+    return False
+
+
+def check_retry_exhausted(base_url):
+    """测试重试耗尽和Retry-After过长时返回最后的响应"""
+    print("\n⛔ 测试重试耗尽...")
+    StubHandler.scripts['/down'] = [(500, None)] * 3
+    StubHandler.scripts['/slow'] = [(503, '3600')]
+    client = make_client()
+
+    exhausted = client.post(f"{base_url}/down", timeout=5)
+    too_long = client.post(f"{base_url}/slow", timeout=5)
+    metrics = client.metrics()
+
+    if (exhausted.status_code == 500 and metrics[f"{base_url}/down"]['retries'] == 2
+            and too_long.status_code == 503 and metrics[f"{base_url}/slow"]['retries'] == 0):
+        print("✅ 最多重试2次；Retry-After超过上限时立即返回")
+        return True
+    print(f"❌ 意外结果: {metrics}")
+    return False
+
+
+def check_circuit_breaker(base_url):
+    """测试连续失败后熔断，冷却后试探恢复"""
+    print("\n🧯 测试熔断...")
+    StubHandler.scripts['/flaky'] = [(502, '0')] * 6
+    client = make_client()
+
+    for _ in range(2):
+        client.post(f"{base_url}/flaky", endpoint='flaky-model', timeout=5)
+
+    try:
+        client.post(f"{base_url}/flaky", endpoint='flaky-model', timeout=5)
+        print("❌ 熔断后请求仍被发出")
+        return False
+    except CircuitOpenError as e:
+        print(f"✅ 熔断生效: {e}")
+
+    if client.is_available('flaky-model'):
+        print("❌ is_available 未反映熔断状态")
+        return False
+
+    time.sleep(0.6)
+    response = client.post(f"{base_url}/flaky", endpoint='flaky-model', timeout=5)
+    if response.status_code == 200 and client.is_available('flaky-model'):
+        print("✅ 冷却后试探请求成功，熔断恢复")
+        return True
+    print(f"❌ 冷却后状态码 {response.status_code}")
+    return False
+
+
+def check_half_open_failure(base_url):
+    """测试半开试探抛出非网络类请求错误时记为失败，不会一直占用试探名额"""
+    print("\n🩹 测试半开试探异常...")
+    client = ApiClient('stub', max_retries=0, breaker_threshold=1, breaker_cooldown=0.5)
+    errors = [requests.exceptions.ConnectionError('connection refused'),
+              requests.exceptions.ChunkedEncodingError('connection broken')]
+    real_post = client.session.post
+
+    def flaky_post(url, **kwargs):
+        if errors:
+            raise errors.pop(0)
+        return real_post(url, **kwargs)
+
+    client.session.post = flaky_post
+    for _ in range(2):
+        try:
+            client.post(f"{base_url}/ok", endpoint='probe-model', timeout=5)
+        except requests.exceptions.RequestException:
+            pass
+        if client.is_available('probe-model'):
+            print("❌ 请求失败后端点未熔断")
+            return False
+        time.sleep(0.6)
+
+    if not client.is_available('probe-model'):
+        print("❌ 冷却结束后端点仍不可用")
+        return False
+    response = client.post(f"{base_url}/ok", endpoint='probe-model', timeout=5)
+    if response.status_code == 200 and client.is_available('probe-model'):
+        print("✅ 试探失败后重新熔断，再次冷却后恢复")
+        return True
+    print(f"❌ 冷却后状态码 {response.status_code}")
+    return False
+
+
+def check_metrics(base_url):
+    """测试延迟统计"""
+    print("\n📊 测试延迟统计...")
+    client = make_client()
+    for _ in range(3):
+        client.post(f"{base_url}/ok", endpoint='ok-model', timeout=5)
+
+    stats = client.metrics().get('ok-model', {})
+    print(f"   {stats}")
+    if stats.get('calls') == 3 and stats.get('failures') == 0 and stats.get('p95_seconds', -1) >= 0:
+        print("✅ 统计正确")
+        return True
+    print("❌ 统计不正确")
+    return False
+
+
+def run_checks():
+    """启动桩服务器并执行全部检查，返回每项是否通过"""
+    server, base_url = start_stub_server()
+    print(f"🖥️ 桩服务器: {base_url}")
+
+    try:
+        return [
+            check_keep_alive(base_url),
+            check_retry_after(base_url),
+            check_retry_exhausted(base_url),
+            check_circuit_breaker(base_url),
+            check_half_open_failure(base_url),
+            check_metrics(base_url),
+        ]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_api_client():
+    """pytest入口"""
+    assert all(run_checks())
+
+
+def main():
+    """主测试函数"""
+    print("🧪 小结API客户端测试")
+    print("=" * 50)
+
+    results = run_checks()
+
+    print("\n" + "=" * 50)
+    passed = sum(results)
+    print(f"📋 测试结果: {passed}/{len(results)} 通过")
+    if passed == len(results):
+        print("🎉 所有测试通过！")
+    else:
+        print("⚠️ 部分测试失败")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
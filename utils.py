@@ -56,11 +56,15 @@ def format_et_date(date_str: str) -> str:
         return date_str
 
 
-def create_summary_report(posts: List[Dict]) -> str:
-    """创建爬取结果摘要报告"""
+def create_summary_report(posts: List[Dict], db=None) -> str:
+    """创建爬取结果摘要报告（各日期的累计互动数据读取daily_stats汇总表）"""
     if not posts:
         return "没有爬取到新帖子"
     
+    if db is None:
+        from database import TrumpPostsDB
+        db = TrumpPostsDB()
+    
     # 按日期分组
     posts_by_date = {}
     for post in posts:
@@ -84,16 +88,15 @@ def create_summary_report(posts: List[Dict]) -> str:
     
     for date in sorted_dates:
         date_posts = posts_by_date[date]
-        total_likes = sum(post.get('likes_count', 0) for post in date_posts)
-        total_reposts = sum(post.get('reposts_count', 0) for post in date_posts)
-        total_comments = sum(post.get('comments_count', 0) for post in date_posts)
+        stats = db.get_daily_stats(date)
         
         report_lines.extend([
             f"  {format_et_date(date)}:",
-            f"    帖子数: {len(date_posts)}",
-            f"    总点赞数: {total_likes:,}",
-            f"    总转发数: {total_reposts:,}",
-            f"    总评论数: {total_comments:,}",
+            f"    新增帖子数: {len(date_posts)}",
+            f"    当日帖子数: {stats['post_count']}",
+            f"    总点赞数: {stats['total_likes']:,}",
+            f"    总转发数: {stats['total_reposts']:,}",
+            f"    总评论数: {stats['total_comments']:,}",
             ""
         ])
     
@@ -4,13 +4,20 @@ Trump Truth Social 分析网站
 Flask后端应用 - 数据库优先，硬编码备用
 """
 
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, request
 from datetime import datetime, timedelta
 import pytz
 import json
-import re
 import os
 import sqlite3
+import threading
+from collections import OrderedDict
+
+from db_connection import get_connection
+from database import TrumpPostsDB
+from db_migrations import column_exists
+from analysis_formatter import format_analysis
+from config import CLAUDE_STREAM_READ_TIMEOUT, DRAFT_PAGE_MAX_RELOADS, WEB_CACHE_MAX_ENTRIES
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'trump_tracker_2025'
@@ -21,12 +28,10 @@ TIMEZONE = "US/Eastern"
 
 
 def get_db_connection():
-    """获取数据库连接"""
+    """获取数据库连接（线程内复用的长连接，WAL模式，不要手动关闭）"""
     try:
         if os.path.exists(DATABASE_PATH):
-            conn = sqlite3.connect(DATABASE_PATH)
-            conn.row_factory = sqlite3.Row
-            return conn
+            return get_connection(DATABASE_PATH)
         else:
             print(f"数据库文件不存在: {DATABASE_PATH}")
             return None
@@ -35,6 +40,91 @@ def get_db_connection():
         return None
 
 
+_posts_db = None
+
+
+def get_posts_db():
+    """
+    获取TrumpPostsDB实例（数据库文件不存在时返回None，不会创建新库）。
+    网站只读数据，不执行结构迁移：迁移和回填由写入进程（main.py、调度器、import_summary.py）完成
+    """
+    global _posts_db
+    if not os.path.exists(DATABASE_PATH):
+        return None
+    if _posts_db is None:
+        _posts_db = TrumpPostsDB(DATABASE_PATH, migrate=False)
+    return _posts_db
+
+
+def get_daily_from_db(db, date):
+    """按日期直接索引查询小结和帖子"""
+    summary = db.get_summary_by_date(date)
+    if not summary:
+        return None
+    
+    posts = db.get_posts_by_date(date)
+    stats = db.get_daily_stats(date)
+    
+    return {
+        'summary': summary,
+        'posts': posts,
+        'stats': {
+            'post_count': summary['post_count'] or stats['post_count'],
+            'total_likes': stats['total_likes'],
+            'total_reposts': stats['total_reposts'],
+            'total_comments': stats['total_comments']
+        }
+    }
+
+
+def get_daily_from_data(data, date):
+    """从JSON/备用数据中查找指定日期（无数据库时使用）"""
+    summary = None
+    
+    for s in data['summaries']:
+        if s['analysis_date'] == date:
+            summary = {
+                'summary_content': s['summary_text'],
+                'summary_text': s['summary_text'],
+                'key_topics': json.dumps(s.get('key_topics', []), ensure_ascii=False),
+                'post_count': s['post_count'],
+                'generated_by': s.get('generated_by'),
+                'generated_at': s.get('generated_at')
+            }
+            break
+    
+    if not summary:
+        return None
+    
+    # 获取该日期的帖子（从recent_posts中筛选）
+    posts = []
+    for post in data['recent_posts']:
+        if post['created_at'].startswith(date):
+            posts.append({
+                'content': post['content'],
+                'post_time': post['created_at'].split(' ')[1] if ' ' in post['created_at'] else '',
+                'likes_count': post.get('engagement_score', 0),
+                'reposts_count': 0,
+                'comments_count': 0
+            })
+    
+    return {
+        'summary': summary,
+        'posts': posts,
+        'stats': {
+            'post_count': summary['post_count'],
+            'total_likes': sum(post.get('likes_count', 0) for post in posts),
+            'total_reposts': 0,
+            'total_comments': 0
+        }
+    }
+
+
+def final_summary_filter(conn):
+    """只取完整小结的WHERE条件；写入进程尚未迁移出status列的旧库没有草稿，不需要过滤"""
+    return "WHERE status = 'final'" if column_exists(conn, 'daily_summaries', 'status') else ''
+
+
 def get_real_summaries_from_db():
     """从数据库获取真实的Claude分析"""
     try:
@@ -43,9 +133,10 @@ def get_real_summaries_from_db():
             return []
         
         cursor = conn.cursor()
-        cursor.execute('''
-            SELECT summary_date, summary_content, post_count, generated_at, generated_by
+        cursor.execute(f'''
+            SELECT summary_date, summary_content, summary_html, post_count, generated_at, generated_by
             FROM daily_summaries 
+            {final_summary_filter(conn)}
             ORDER BY summary_date DESC
         ''')
         
@@ -55,12 +146,12 @@ def get_real_summaries_from_db():
                 'analysis_date': row['summary_date'],
                 'post_count': row['post_count'],
                 'summary_text': row['summary_content'],
+                'summary_html': row['summary_html'],
                 'key_topics': [],  # 简化处理
                 'generated_at': row['generated_at'],
                 'generated_by': row['generated_by']
             })
         
-        conn.close()
         print(f"✅ 从数据库成功加载 {len(summaries)} 条分析")
         return summaries
         
@@ -80,7 +171,7 @@ def get_real_posts_from_db():
         cursor.execute('''
             SELECT post_id, content, timestamp_et, likes_count, reposts_count, comments_count
             FROM trump_posts 
-            ORDER BY timestamp_et DESC
+            ORDER BY timestamp_epoch DESC
             LIMIT 50
         ''')
         
@@ -93,7 +184,6 @@ def get_real_posts_from_db():
                 'engagement_score': row['likes_count']
             })
         
-        conn.close()
         print(f"✅ 从数据库成功加载 {len(posts)} 条帖子")
         return posts
         
@@ -111,24 +201,24 @@ def get_real_stats_from_db():
         
         cursor = conn.cursor()
         
-        # 获取总帖子数
-        cursor.execute('SELECT COUNT(*) FROM trump_posts')
+        # 获取总帖子数（按日汇总表求和，不扫描帖子表）
+        cursor.execute('SELECT COALESCE(SUM(post_count), 0) FROM daily_stats')
         total_posts = cursor.fetchone()[0]
         
-        # 获取总分析数
-        cursor.execute('SELECT COUNT(*) FROM daily_summaries')
+        # 获取总分析数（不含生成中的草稿）
+        cursor.execute(f"SELECT COUNT(*) FROM daily_summaries {final_summary_filter(conn)}")
         total_summaries = cursor.fetchone()[0]
         
         # 获取最新帖子时间
-        cursor.execute('SELECT MAX(timestamp_et) FROM trump_posts')
-        latest_post = cursor.fetchone()[0]
+        cursor.execute('SELECT timestamp_et FROM trump_posts ORDER BY timestamp_epoch DESC LIMIT 1')
+        latest_row = cursor.fetchone()
+        latest_post = latest_row[0] if latest_row else None
         
-        # 获取每日统计
+        # 获取每日统计（读取daily_stats汇总表）
         cursor.execute('''
-            SELECT DATE(timestamp_et) as date, COUNT(*) as post_count
-            FROM trump_posts 
-            GROUP BY DATE(timestamp_et)
-            ORDER BY date DESC
+            SELECT stat_date as date, post_count
+            FROM daily_stats 
+            ORDER BY stat_date DESC
             LIMIT 7
         ''')
         
@@ -139,8 +229,6 @@ def get_real_stats_from_db():
                 'post_count': row['post_count']
             })
         
-        conn.close()
-        
         return {
             'total_posts': total_posts,
             'total_days': len(daily_stats),
@@ -252,8 +340,92 @@ def get_fallback_data():
     }
 
 
+# 进程级数据缓存：数据库或JSON文件真正变化时才失效
+# 按最近使用顺序保存，超过WEB_CACHE_MAX_ENTRIES时淘汰最久未访问的条目（每个日期页面各占一条）
+_data_cache = OrderedDict()
+_cache_version = None
+_cache_lock = threading.Lock()
+_version_conn = None
+_version_conn_inode = None
+
+
+def get_data_version():
+    """获取当前数据版本
+
+    使用一个专用的只读连接查询PRAGMA data_version：其他任何连接（爬虫、
+    小结生成器等）提交写入后该值都会变化；数据库文件被替换时inode变化。
+    """
+    global _version_conn, _version_conn_inode
+    
+    db_version = None
+    with _cache_lock:
+        try:
+            if os.path.exists(DATABASE_PATH):
+                inode = os.stat(DATABASE_PATH).st_ino
+                if _version_conn is None or _version_conn_inode != inode:
+                    if _version_conn is not None:
+                        _version_conn.close()
+                    _version_conn = sqlite3.connect(DATABASE_PATH, check_same_thread=False)
+                    _version_conn_inode = inode
+                data_version = _version_conn.execute('PRAGMA data_version').fetchone()[0]
+                db_version = (inode, data_version)
+        except Exception as e:
+            print(f"❌ 获取数据版本失败: {e}")
+            _version_conn = None
+            return None
+    
+    json_version = None
+    if os.path.exists('latest_data.json'):
+        json_version = os.path.getmtime('latest_data.json')
+    
+    return (db_version, json_version)
+
+
+def cached(key, loader):
+    """
+    按数据版本缓存loader的结果，数据未变化时直接返回缓存。
+    数据版本变化时整体清空旧版本的条目，条目数超过上限时淘汰最久未访问的
+    """
+    global _cache_version
+    
+    version = get_data_version()
+    
+    if version is not None:
+        with _cache_lock:
+            if version != _cache_version:
+                _data_cache.clear()
+                _cache_version = version
+            entry = _data_cache.get(key)
+            if entry and entry[0] == version:
+                _data_cache.move_to_end(key)
+                return entry[1]
+    
+    value = loader()
+    
+    if version is not None and value is not None:
+        with _cache_lock:
+            if version == _cache_version:
+                _data_cache[key] = (version, value)
+                _data_cache.move_to_end(key)
+                while len(_data_cache) > WEB_CACHE_MAX_ENTRIES:
+                    _data_cache.popitem(last=False)
+    
+    return value
+
+
 def get_data():
-    """获取数据 - 优先数据库，然后JSON文件，最后备用数据"""
+    """获取数据（带缓存）- 优先数据库，然后JSON文件，最后备用数据"""
+    data = cached('data', load_data)
+    if data is not None:
+        return data
+    
+    # 备用数据不缓存，数据源恢复后立即生效
+    print("⚠️ 数据库和JSON文件都不可用，使用备用数据")
+    return get_fallback_data()
+
+
+def load_data():
+    """加载数据 - 优先数据库，然后JSON文件；都不可用时返回None"""
     print("🔍 正在加载数据...")
     
     # 尝试从数据库加载（本地开发环境）
@@ -280,174 +452,101 @@ def get_data():
     except Exception as e:
         print(f"❌ JSON文件加载失败: {e}")
     
-    # 最后使用备用数据
-    print("⚠️ 数据库和JSON文件都不可用，使用备用数据")
-    return get_fallback_data()
+    return None
 
 
-def format_analysis(content):
-    """格式化Claude分析内容为HTML"""
-    if not content:
-        return ""
-    
-    # 先处理HTML转义
-    content = content.replace('<br>', '\n').replace('<br/>', '\n')
+# 注册模板函数
+app.jinja_env.globals['format_analysis'] = format_analysis
+
+
+def get_index_context(data):
+    """主页模板数据"""
+    # 格式化统计数据
+    stats = {
+        'total_posts': data['statistics']['total_posts'],
+        'total_summaries': len(data['summaries']),
+        'coverage_days': data['statistics']['total_days']
+    }
     
-    # 分割成段落
-    paragraphs = content.split('\n\n')
-    formatted_html = []
+    # 格式化摘要数据，为模板兼容性调整格式
+    recent_summaries = []
+    for summary in data['summaries'][:7]:  # 最近7天
+        recent_summaries.append({
+            'date': summary['analysis_date'],
+            'post_count': summary['post_count'],
+            'has_summary': True,
+            'summary': {
+                'summary_text': summary['summary_text'],
+                'summary_html': summary.get('summary_html'),
+                'key_topics': json.dumps(summary.get('key_topics', []), ensure_ascii=False)
+            }
+        })
     
-    for para in paragraphs:
-        if not para.strip():
-            continue
-            
-        # 处理标题
-        if para.startswith('##'):
-            title = para.replace('##', '').strip()
-            formatted_html.append(f'<h2>{title}</h2>')
-        elif para.startswith('**核心观点**'):
-            content_part = para.replace('**核心观点**:', '').strip()
-            formatted_html.append(f'''
-                <div class="analysis-section core-points">
-                    <h3>🎯 核心观点</h3>
-                    <p>{content_part}</p>
-                </div>
-            ''')
-        elif para.startswith('**主要内容**'):
-            content_part = para.replace('**主要内容**:', '').strip()
-            # 处理列表项
-            if '- ' in content_part:
-                items = content_part.split('- ')
-                list_html = '<ul>'
-                for item in items:
-                    if item.strip():
-                        list_html += f'<li>{item.strip()}</li>'
-                list_html += '</ul>'
-                formatted_html.append(f'''
-                    <div class="analysis-section main-content">
-                        <h3>📋 主要内容</h3>
-                        {list_html}
-                    </div>
-                ''')
-            else:
-                formatted_html.append(f'''
-                    <div class="analysis-section main-content">
-                        <h3>📋 主要内容</h3>
-                        <p>{content_part}</p>
-                    </div>
-                ''')
-        elif para.startswith('**语调特点**'):
-            content_part = para.replace('**语调特点**:', '').strip()
-            formatted_html.append(f'''
-                <div class="analysis-section tone-analysis">
-                    <h3>🎭 语调特点</h3>
-                    <p>{content_part}</p>
-                </div>
-            ''')
-        elif para.startswith('**值得关注**'):
-            content_part = para.replace('**值得关注**:', '').strip()
-            formatted_html.append(f'''
-                <div class="analysis-section notable-points">
-                    <h3>⚠️ 值得关注</h3>
-                    <p>{content_part}</p>
-                </div>
-            ''')
-        else:
-            # 处理加粗文本
-            para = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', para)
-            # 处理换行
-            para = para.replace('\n', '<br>')
-            if para.strip():
-                formatted_html.append(f'<p>{para}</p>')
+    return {'summaries': recent_summaries, 'stats': stats}
+
+
+def get_archive_context(data):
+    """归档页模板数据：所有有分析的日期"""
+    all_dates = []
+    for summary in data['summaries']:
+        all_dates.append({
+            'date': summary['analysis_date'],
+            'post_count': summary['post_count'],
+            'has_summary': True
+        })
     
-    return ''.join(formatted_html)
+    return {'dates': all_dates}
 
 
-# 注册模板函数
-app.jinja_env.globals['format_analysis'] = format_analysis
+def get_stats_payload(data):
+    """/api/stats 返回的数据"""
+    return {
+        'success': True,
+        'total_posts': data['statistics']['total_posts'],
+        'total_summaries': len(data['summaries']),
+        'recent_data': data['statistics']['daily_stats']
+    }
 
 
 @app.route('/')
 def index():
     """主页 - 显示最新分析和统计"""
     try:
-        data = get_data()
-        
-        # 格式化统计数据
-        stats = {
-            'total_posts': data['statistics']['total_posts'],
-            'total_summaries': len(data['summaries']),
-            'coverage_days': data['statistics']['total_days']
-        }
-        
-        # 格式化摘要数据，为模板兼容性调整格式
-        recent_summaries = []
-        for summary in data['summaries'][:7]:  # 最近7天
-            recent_summaries.append({
-                'date': summary['analysis_date'],
-                'post_count': summary['post_count'],
-                'has_summary': True,
-                'summary': {
-                    'summary_text': summary['summary_text'],
-                    'key_topics': json.dumps(summary.get('key_topics', []), ensure_ascii=False)
-                }
-            })
-        
-        return render_template('index.html', 
-                             summaries=recent_summaries,
-                             stats=stats)
+        return render_template('index.html', **get_index_context(get_data()))
     
     except Exception as e:
         return f"Error: {e}", 500
 
 
+def is_live_draft(summary):
+    """草稿是否仍在生成：最近一次写入距今不超过几倍流读取超时（中断后遗留的草稿不再刷新）"""
+    if not summary or summary.get('status') != 'draft' or not summary.get('generated_at'):
+        return False
+    try:
+        written_at = datetime.fromisoformat(summary['generated_at'])
+    except ValueError:
+        return False
+    if written_at.tzinfo is None:
+        written_at = pytz.timezone(TIMEZONE).localize(written_at)
+    return (datetime.now(pytz.utc) - written_at).total_seconds() <= 3 * CLAUDE_STREAM_READ_TIMEOUT
+
+
 @app.route('/daily/<date>')
 def daily_analysis(date):
     """每日详细分析页面"""
     try:
-        data = get_data()
-        
-        # 查找指定日期的摘要
-        summary = None
-        post_count = 0
-        
-        for s in data['summaries']:
-            if s['analysis_date'] == date:
-                summary = {
-                    'summary_text': s['summary_text'],
-                    'key_topics': json.dumps(s.get('key_topics', []), ensure_ascii=False)
-                }
-                post_count = s['post_count']
-                break
+        db = get_posts_db()
+        if db:
+            # 数据库可用：按日期直接索引查询，覆盖整个归档
+            daily = cached(('daily', date), lambda: get_daily_from_db(db, date))
+        else:
+            daily = get_daily_from_data(get_data(), date)
         
-        if not summary:
+        if not daily:
             return "该日期没有分析数据", 404
         
-        # 获取该日期的帖子（从recent_posts中筛选）
-        posts = []
-        for post in data['recent_posts']:
-            if post['created_at'].startswith(date):
-                posts.append({
-                    'content': post['content'],
-                    'post_time': post['created_at'].split(' ')[1] if ' ' in post['created_at'] else '',
-                    'likes_count': post.get('engagement_score', 0),
-                    'reposts_count': 0,
-                    'comments_count': 0
-                })
-        
-        # 计算统计数据
-        stats = {
-            'post_count': post_count,
-            'total_likes': sum(post.get('likes_count', 0) for post in posts),
-            'total_reposts': 0,
-            'total_comments': 0
-        }
-        
-        return render_template('daily.html',
-                             date=date,
-                             posts=posts,
-                             summary=summary,
-                             stats=stats)
+        return render_template('daily.html', date=date, draft_live=is_live_draft(daily['summary']),
+                               max_reloads=DRAFT_PAGE_MAX_RELOADS, **daily)
     
     except Exception as e:
         return f"Error: {e}", 500
@@ -457,13 +556,46 @@ def daily_analysis(date):
 def api_stats():
     """API接口 - 获取总体统计数据"""
     try:
-        data = get_data()
-        
+        return jsonify(get_stats_payload(get_data()))
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/api/search')
+def api_search():
+    """API接口 - 全文搜索帖子（q=关键词, from/to=日期范围, limit=条数）"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({
+            'success': False,
+            'error': '缺少搜索关键词参数q'
+        }), 400
+    
+    try:
+        db = get_posts_db()
+        if not db:
+            return jsonify({
+                'success': False,
+                'error': '数据库不可用'
+            }), 503
+    
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        results = db.search_posts(
+            query,
+            date_from=request.args.get('from'),
+            date_to=request.args.get('to'),
+            limit=limit
+        )
+    
         return jsonify({
             'success': True,
-            'total_posts': data['statistics']['total_posts'],
-            'total_summaries': len(data['summaries']),
-            'recent_data': data['statistics']['daily_stats']
+            'query': query,
+            'count': len(results),
+            'results': results
         })
     
     except Exception as e:
@@ -483,18 +615,7 @@ def about():
 def archive():
     """历史归档页面"""
     try:
-        data = get_data()
-        
-        # 获取所有有分析的日期
-        all_dates = []
-        for summary in data['summaries']:
-            all_dates.append({
-                'date': summary['analysis_date'],
-                'post_count': summary['post_count'],
-                'has_summary': True
-            })
-        
-        return render_template('archive.html', dates=all_dates)
+        return render_template('archive.html', **get_archive_context(get_data()))
     
     except Exception as e:
         return f"Error: {e}", 500